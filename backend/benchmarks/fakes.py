@@ -0,0 +1,171 @@
+# backend/benchmarks/fakes.py
+# Faux go-librespot (REST) et faux snapserver (JSON-RPC WebSocket) pour les benchmarks
+import asyncio
+import json
+from time import monotonic
+from typing import Dict, List
+
+import websockets
+from aiohttp import web
+
+TRACKS = [
+    {"name": f"Track {i}", "artist_names": [f"Artist {i % 4}"], "album_name": f"Album {i % 3}",
+     "album_cover_url": f"https://example.invalid/cover/{i % 3}.jpg", "duration": 180000 + i * 1000}
+    for i in range(12)
+]
+
+
+class FakeLibrespot:
+    """API REST minimale de go-librespot : /status et les commandes /player/*"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 3678, latency: float = 0.002):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.track_index = 0
+        self.paused = False
+        self.started_at = monotonic()
+        self.status_requests = 0
+        self._runner = None
+
+    def status(self) -> Dict:
+        track = TRACKS[self.track_index % len(TRACKS)]
+        return {
+            "username": "bench",
+            "device_name": "Sonoak bench",
+            "stopped": False,
+            "paused": self.paused,
+            "volume": 50,
+            "track": {**track, "position": int((monotonic() - self.started_at) * 1000)}
+        }
+
+    async def _status(self, request):
+        self.status_requests += 1
+        await asyncio.sleep(self.latency)
+        return web.json_response(self.status())
+
+    async def _command(self, request):
+        action = request.match_info["action"]
+        if action == "next":
+            self.track_index += 1
+            self.started_at = monotonic()
+        elif action == "prev":
+            self.track_index = max(0, self.track_index - 1)
+            self.started_at = monotonic()
+        elif action == "playpause":
+            self.paused = not self.paused
+        elif action in ("pause", "resume"):
+            self.paused = action == "pause"
+        await asyncio.sleep(self.latency)
+        return web.json_response({})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/status", self._status)
+        app.router.add_post("/player/{action}", self._command)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+
+class FakeSnapserver:
+    """Snapserver JSON-RPC en mémoire : Server.GetStatus, Client.Set*, Group.Set*, batches"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 1780, rooms: int = 8, latency: float = 0.001):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.requests = 0
+        self.messages = 0
+        self.clients = [
+            {
+                "id": f"room-{i}",
+                "connected": True,
+                "host": {"name": f"room-{i}", "os": "Linux", "arch": "aarch64"},
+                "config": {"name": "", "latency": 0, "volume": {"muted": False, "percent": 50}},
+                "lastSeen": {"sec": 0, "usec": 0}
+            }
+            for i in range(rooms)
+        ]
+        self.group = {"id": "group-1", "name": "", "muted": False, "stream_id": "default", "clients": self.clients}
+        self._server = None
+        self._connections = set()
+
+    def server_status(self) -> Dict:
+        return {
+            "server": {
+                "server": {"host": {"name": "bench-server.local", "os": "Linux", "arch": "aarch64"}},
+                "groups": [self.group],
+                "streams": [{
+                    "id": "default",
+                    "status": "playing",
+                    "uri": {
+                        "raw": "pipe:///tmp/snapfifo?codec=flac&name=default&sampleformat=48000:16:2&chunk_ms=20",
+                        "scheme": "pipe",
+                        "query": {"codec": "flac", "name": "default", "sampleformat": "48000:16:2", "chunk_ms": "20"}
+                    },
+                    "properties": {}
+                }]
+            }
+        }
+
+    def _client(self, client_id):
+        return next((c for c in self.clients if c["id"] == client_id), None)
+
+    def handle(self, request: Dict) -> (Dict, List[Dict]):
+        """Retourne la réponse et les notifications à diffuser"""
+        self.requests += 1
+        method, params = request.get("method"), request.get("params", {})
+        notifications = []
+        if method == "Server.GetStatus":
+            result = self.server_status()
+        elif method == "Server.GetRPCVersion":
+            result = {"major": 2, "minor": 0, "patch": 0}
+        elif method == "Client.SetVolume":
+            client = self._client(params["id"])
+            client["config"]["volume"] = params["volume"]
+            result = {"volume": params["volume"]}
+            notifications.append({"method": "Client.OnVolumeChanged", "params": {"id": params["id"], "volume": params["volume"]}})
+        elif method == "Client.SetLatency":
+            self._client(params["id"])["config"]["latency"] = params["latency"]
+            result = {"latency": params["latency"]}
+        elif method == "Group.SetMute":
+            self.group["muted"] = params["mute"]
+            result = {"mute": params["mute"]}
+        else:
+            return {"id": request.get("id"), "jsonrpc": "2.0",
+                    "error": {"code": -32601, "message": "Method not found"}}, []
+        return {"id": request.get("id"), "jsonrpc": "2.0", "result": result}, notifications
+
+    async def _handler(self, ws):
+        self._connections.add(ws)
+        try:
+            async for raw in ws:
+                self.messages += 1
+                message = json.loads(raw)
+                await asyncio.sleep(self.latency)
+                items = message if isinstance(message, list) else [message]
+                responses, notifications = [], []
+                for item in items:
+                    response, notes = self.handle(item)
+                    responses.append(response)
+                    notifications.extend(notes)
+                await ws.send(json.dumps(responses if isinstance(message, list) else responses[0]))
+                for note in notifications:
+                    for other in list(self._connections):
+                        if other is not ws:
+                            await other.send(json.dumps({"jsonrpc": "2.0", **note}))
+        finally:
+            self._connections.discard(ws)
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
@@ -0,0 +1,266 @@
+# backend/benchmarks/loadtest.py
+"""
+Rejoue des traces de messages WebSocket contre le backend et mesure la diffusion.
+
+Le backend est lancé dans un sous-processus (benchmarks.server) avec ALSA, lgpio,
+D-Bus, go-librespot et snapserver simulés. Pour chaque trace, N clients écoutent
+chaque service concerné pendant qu'un client pilote rejoue les messages. La
+latence mesurée va de l'envoi d'un message au premier message reçu ensuite par
+chaque client du même service (diffusion comprise).
+
+Usage (depuis backend/) :
+    python -m benchmarks.loadtest --clients 20 --trace volume_drag --trace track_skips
+    python -m benchmarks.loadtest --compare benchmarks/results/<précédent>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from time import monotonic, perf_counter
+from typing import Dict, List, Optional
+
+import aiohttp
+import websockets
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+TRACES_DIR = os.path.join(BENCH_DIR, "traces")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def load_trace(name: str) -> Dict:
+    path = name if os.path.exists(name) else os.path.join(TRACES_DIR, f"{name}.json")
+    with open(path) as f:
+        return json.load(f)
+
+
+class ProcessSampler:
+    """CPU et mémoire d'un processus via /proc (Linux)"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK")
+
+    def cpu_seconds(self) -> float:
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        # utime et stime sont les champs 14 et 15 (index 11 et 12 après le nom)
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def memory_kb(self) -> Dict[str, int]:
+        values = {}
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    values[key] = int(value.split()[0])
+        return {"rss_kb": values.get("VmRSS"), "peak_rss_kb": values.get("VmHWM")}
+
+
+class Listener:
+    def __init__(self, service: str, stimuli: Dict[str, list]):
+        self.service = service
+        self.stimuli = stimuli
+        self.seen_seq = 0
+        self.latencies: List[float] = []
+        self.messages = 0
+        self.bytes = 0
+
+    async def run(self, url: str, ready: asyncio.Event, counter: list):
+        async with websockets.connect(url, max_size=None) as ws:
+            counter[0] += 1
+            if counter[0] == counter[1]:
+                ready.set()
+            async for raw in ws:
+                now = perf_counter()
+                self.messages += 1
+                self.bytes += len(raw)
+                seq, sent_at = self.stimuli[self.service]
+                if seq > self.seen_seq:
+                    self.seen_seq = seq
+                    self.latencies.append(now - sent_at)
+
+
+async def run_trace(base_url: str, trace: Dict, clients: int, speed: float,
+                    settle: float, sampler: ProcessSampler) -> Dict:
+    events = trace["events"]
+    services = sorted({event["service"] for event in events})
+    stimuli = {service: [0, 0.0] for service in services}
+
+    ready = asyncio.Event()
+    counter = [0, clients * len(services)]
+    listeners = [Listener(service, stimuli) for service in services for _ in range(clients)]
+    tasks = [asyncio.create_task(l.run(f"{base_url}/ws/{l.service}", ready, counter)) for l in listeners]
+    await asyncio.wait_for(ready.wait(), 30)
+
+    drivers = {service: await websockets.connect(f"{base_url}/ws/{service}") for service in services}
+    drains = [asyncio.create_task(_drain(ws)) for ws in drivers.values()]
+
+    cpu_start, wall_start = sampler.cpu_seconds(), monotonic()
+    received_start = sum(l.messages for l in listeners)
+    replay_start = perf_counter()
+    for seq, event in enumerate(events, start=1):
+        delay = replay_start + event["t"] / speed - perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        stimuli[event["service"]][:] = [seq, perf_counter()]
+        await drivers[event["service"]].send(json.dumps(event["message"]))
+    await asyncio.sleep(settle)
+
+    duration = monotonic() - wall_start
+    cpu = sampler.cpu_seconds() - cpu_start
+    received = sum(l.messages for l in listeners) - received_start
+
+    for task in tasks + drains:
+        task.cancel()
+    for ws in drivers.values():
+        await ws.close()
+    await asyncio.gather(*tasks, *drains, return_exceptions=True)
+
+    latencies = [value for l in listeners for value in l.latencies]
+    return {
+        "services": services,
+        "clients_per_service": clients,
+        "messages_sent": len(events),
+        "messages_received": received,
+        "bytes_received": sum(l.bytes for l in listeners),
+        "duration_s": round(duration, 3),
+        "messages_per_second": round(received / duration, 1) if duration else None,
+        "latency_ms": {
+            name: round(value * 1000, 3) if value is not None else None
+            for name, value in (
+                ("p50", percentile(latencies, 0.5)),
+                ("p90", percentile(latencies, 0.9)),
+                ("p99", percentile(latencies, 0.99)),
+                ("max", max(latencies) if latencies else None),
+            )
+        },
+        "latency_samples": len(latencies),
+        "server_cpu_percent": round(100 * cpu / duration, 1) if duration else None,
+        **sampler.memory_kb()
+    }
+
+
+async def _drain(ws):
+    async for _ in ws:
+        pass
+
+
+async def wait_for_server(base_http: str, timeout: float = 30.0):
+    deadline = monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while monotonic() < deadline:
+            try:
+                async with session.get(f"{base_http}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Le backend de benchmark n'a pas démarré")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, baseline_path: str, tolerance: float) -> bool:
+    """Affiche les écarts avec une exécution précédente ; False si p90 régresse au-delà de la tolérance"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    ok = True
+    print(f"\nComparaison avec {baseline.get('commit')} ({baseline_path})")
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            continue
+        old_p90, new_p90 = previous["latency_ms"]["p90"], result["latency_ms"]["p90"]
+        if old_p90 and new_p90:
+            change = (new_p90 - old_p90) / old_p90
+            flag = "REGRESSION" if change > tolerance else "ok"
+            ok = ok and change <= tolerance
+            print(f"  {name}: p90 {old_p90:.2f} -> {new_p90:.2f} ms ({change:+.0%}) {flag}")
+        print(f"  {name}: {previous['messages_per_second']} -> {result['messages_per_second']} msg/s, "
+              f"cpu {previous['server_cpu_percent']} -> {result['server_cpu_percent']}%")
+    return ok
+
+
+async def run(args) -> Dict:
+    base_http = f"http://127.0.0.1:{args.port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.server", "--port", str(args.port), "--rooms", str(args.rooms)],
+        cwd=BACKEND_DIR
+    )
+    try:
+        await wait_for_server(base_http)
+        # Laisse les services finir leur démarrage (polling, connexion snapserver)
+        await asyncio.sleep(1.0)
+        sampler = ProcessSampler(process.pid)
+        results = {}
+        for name in args.trace:
+            trace = load_trace(name)
+            print(f"Trace {trace.get('name', name)} ({len(trace['events'])} messages, {args.clients} clients/service)...")
+            results[trace.get("name", name)] = await run_trace(
+                f"ws://127.0.0.1:{args.port}", trace, args.clients, args.speed, args.settle, sampler
+            )
+            print(json.dumps(results[trace.get("name", name)], indent=2))
+        return {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "params": {"clients": args.clients, "speed": args.speed, "rooms": args.rooms},
+            "results": results
+        }
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de diffusion WebSocket du backend Sonoak")
+    parser.add_argument("--clients", type=int, default=10, help="Clients à l'écoute par service")
+    parser.add_argument("--trace", action="append", help="Nom de trace (benchmarks/traces) ou chemin JSON")
+    parser.add_argument("--speed", type=float, default=1.0, help="Facteur d'accélération du rejeu")
+    parser.add_argument("--settle", type=float, default=1.0, help="Attente après le dernier message (s)")
+    parser.add_argument("--rooms", type=int, default=8, help="Clients du faux snapserver")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Fichier JSON de résultats (défaut : benchmarks/results/)")
+    parser.add_argument("--compare", help="Résultats précédents à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Régression p90 tolérée (0.2 = 20%%)")
+    args = parser.parse_args()
+    args.trace = args.trace or ["volume_drag", "track_skips", "source_flapping"]
+
+    report = asyncio.run(run(args))
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['commit'] or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nRésultats enregistrés dans {output}")
+
+    if args.compare and not compare(report, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# backend/benchmarks/rotary.py
+"""
+Rejoue des trains d'impulsions de l'encodeur à travers la puce GPIO simulée et
+mesure la chaîne cran -> cible de volume (contrôleur réel, mixer simulé).
+
+Pour chaque trace et chaque courbe d'accélération :
+    - crans détectés / attendus (aucun ne doit être perdu, rebonds compris)
+    - volume final et variation obtenue
+    - latence entre le front CLK d'un cran et l'application du pas de volume
+
+Les traces sont des JSON (benchmarks/traces/rotary_*.json : fronts [décalage_s, "clk"|"dt"|"sw", niveau])
+ou un journal d'événements enregistré sur le Pi (SONOAK_JOURNAL_PATH), dont les
+fronts gpio sont rejoués tels quels.
+
+Usage (depuis backend/) :
+    python -m benchmarks.rotary --trace rotary_fine --trace rotary_sweep
+    python -m benchmarks.rotary --journal /var/lib/sonoak/journal.bin --curve linear
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+os.environ["SONOAK_HARDWARE"] = "sim"
+os.environ.setdefault("SONOAK_STATE_FILE", "")
+
+from benchmarks.loadtest import load_trace, percentile  # noqa: E402
+from monitoring.journal import read_journal  # noqa: E402
+from services.volume.acceleration import CURVES, RotaryAcceleration  # noqa: E402
+from services.volume.manager import VolumeManager  # noqa: E402
+from services.volume.rotary_controller import RotaryVolumeController  # noqa: E402
+from websocket.manager import WebSocketManager  # noqa: E402
+
+Edge = Tuple[float, str, int]
+
+
+def journal_edges(path: str) -> List[Edge]:
+    """Fronts gpio d'un journal, décalés pour commencer à 0"""
+    edges: List[Edge] = []
+    start = None
+    for record in read_journal(path):
+        if record.source != "gpio":
+            continue
+        start = record.t if start is None else start
+        offset = record.t - start
+        if "sw" in record.payload:
+            edges.append((offset, "sw", record.payload["sw"]))
+        else:
+            edges.append((offset, "dt", record.payload["dt"]))
+            edges.append((offset, "clk", record.payload["clk"]))
+    return edges
+
+
+def detent_times(edges: List[Edge], settle: float = 0.002) -> List[float]:
+    """Instants des crans : premier front CLK de chaque rafale dont le niveau final a changé"""
+    clk = sorted((t, level) for t, pin, level in edges if pin == "clk")
+    detents = []
+    level = 1
+    i = 0
+    while i < len(clk):
+        burst_start = clk[i][0]
+        while i + 1 < len(clk) and clk[i + 1][0] - clk[i][0] < settle:
+            i += 1
+        if clk[i][1] != level:
+            level = clk[i][1]
+            detents.append(burst_start)
+        i += 1
+    return detents
+
+
+async def replay(edges: List[Edge], curve: str, start_volume: int, args) -> Dict:
+    volume_manager = VolumeManager(WebSocketManager())
+    await volume_manager.initialize()
+    await volume_manager.set_volume(start_volume)
+    await volume_manager.ramp.wait()
+
+    acceleration = RotaryAcceleration(curve, args.dead_band, args.fast, args.max_gain, args.base_step)
+    controller = RotaryVolumeController(volume_manager, acceleration=acceleration, debounce=args.debounce)
+    await controller.initialize()
+
+    applied: List[float] = []
+    detected = 0
+    adjust = volume_manager.adjust_volume
+    accelerate = acceleration.step
+
+    def counted_step(direction, now):
+        nonlocal detected
+        detected += 1
+        return accelerate(direction, now)
+
+    async def timed_adjust(delta, step=None):
+        applied.append(monotonic())
+        await adjust(delta, step)
+
+    volume_manager.adjust_volume = timed_adjust
+    acceleration.step = counted_step
+
+    chip = controller.chip
+    pins = {"clk": controller.CLK, "dt": controller.DT, "sw": controller.SW}
+    start = monotonic() + 0.05
+    chip.queue_edges(((offset, pins[pin], level) for offset, pin, level in edges), start=start)
+    duration = max((offset for offset, _, _ in edges), default=0.0)
+    await asyncio.sleep(duration + 0.05 + args.settle)
+
+    detents = detent_times(edges)
+    latencies = []
+    for offset in detents:
+        at = start + offset
+        after = next((t for t in applied if t >= at), None)
+        if after is not None:
+            latencies.append((after - at) * 1000)
+    final = await volume_manager.get_volume()
+
+    controller.cleanup()
+    await volume_manager.cleanup()
+    return {
+        "detents_expected": len(detents),
+        "detents_detected": detected,
+        "volume": {"start": start_volume, "end": final, "change": final - start_volume},
+        "latency_ms": {
+            "p50": _round(percentile(latencies, 0.5)),
+            "p90": _round(percentile(latencies, 0.9)),
+            "max": _round(max(latencies) if latencies else None)
+        },
+        "volume_updates": len(applied)
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+async def run(args) -> Dict:
+    sources = []
+    for name in args.trace or []:
+        trace = load_trace(name)
+        sources.append((trace.get("name", name), [tuple(edge) for edge in trace["edges"]],
+                        trace.get("start_volume", 50)))
+    if args.journal:
+        sources.append((os.path.basename(args.journal), journal_edges(args.journal), 50))
+
+    results = {}
+    for name, edges, start_volume in sources:
+        results[name] = {}
+        for curve in args.curve:
+            result = await replay(edges, curve, start_volume, args)
+            results[name][curve] = result
+            print(f"{name} [{curve}]: {json.dumps(result)}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejeu de trains d'impulsions de l'encodeur")
+    parser.add_argument("--trace", action="append", help="Nom de trace (benchmarks/traces) ou chemin JSON")
+    parser.add_argument("--journal", help="Journal d'événements enregistré (fronts gpio)")
+    parser.add_argument("--curve", action="append", choices=sorted(CURVES), help="Courbe(s) à comparer")
+    parser.add_argument("--dead-band", type=float, default=5.0)
+    parser.add_argument("--fast", type=float, default=40.0)
+    parser.add_argument("--max-gain", type=float, default=6.0)
+    parser.add_argument("--base-step", type=float, default=1.0)
+    parser.add_argument("--debounce", type=float, default=0.005)
+    parser.add_argument("--settle", type=float, default=0.3, help="Attente après le dernier front (s)")
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    args = parser.parse_args()
+    if not args.trace and not args.journal:
+        args.trace = ["rotary_fine", "rotary_sweep", "rotary_reverse"]
+    args.curve = args.curve or ["none", "quadratic"]
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    # Code de sortie non nul si un cran a été perdu
+    lost = any(r["detents_detected"] != r["detents_expected"] for trace in results.values() for r in trace.values())
+    sys.exit(1 if lost else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# backend/benchmarks/server.py
+# Lance le backend avec matériel simulé (SONOAK_HARDWARE=sim), faux go-librespot et faux snapserver.
+# Usage : python -m benchmarks.server --port 8765  (depuis backend/)
+import argparse
+import asyncio
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def serve(port: int, librespot_port: int, snapserver_port: int, rooms: int, log_level: str):
+    from benchmarks.fakes import FakeLibrespot, FakeSnapserver
+
+    librespot = FakeLibrespot(port=librespot_port)
+    snapserver = FakeSnapserver(port=snapserver_port, rooms=rooms)
+    await librespot.start()
+    await snapserver.start()
+
+    import logging
+    import uvicorn
+    from main import app
+
+    # Les scripts de changement de source n'existent pas hors du Pi : on limite le bruit
+    logging.getLogger().setLevel(log_level.upper())
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    try:
+        await server.serve()
+    finally:
+        await snapserver.stop()
+        await librespot.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend Sonoak avec dépendances simulées")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--librespot-port", type=int, default=13678)
+    parser.add_argument("--snapserver-port", type=int, default=11780)
+    parser.add_argument("--rooms", type=int, default=8)
+    parser.add_argument("--log-level", default="CRITICAL")
+    args = parser.parse_args()
+
+    # La configuration est lue à l'import de config : l'environnement doit être prêt avant
+    os.environ["SONOAK_LIBRESPOT_HOST"] = "127.0.0.1"
+    os.environ["SONOAK_LIBRESPOT_PORT"] = str(args.librespot_port)
+    os.environ["SONOAK_SNAPSERVER_HOST"] = "127.0.0.1"
+    os.environ["SONOAK_SNAPSERVER_PORT"] = str(args.snapserver_port)
+    os.environ["SONOAK_HARDWARE"] = "sim"
+    # Chaque mesure part d'un état vierge, sauf état persistant explicitement fourni
+    os.environ.setdefault("SONOAK_STATE_FILE", "")
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+
+    asyncio.run(serve(args.port, args.librespot_port, args.snapserver_port, args.rooms, args.log_level))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# backend/config.py
+# Configuration du backend, lue depuis l'environnement (ou backend/.env)
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
+
+
+def _get_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _get_optional_float(name: str) -> Optional[float]:
+    try:
+        return float(os.environ[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def _get_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+# go-librespot (API REST + événements)
+LIBRESPOT_HOST = os.getenv("SONOAK_LIBRESPOT_HOST", "localhost")
+LIBRESPOT_PORT = _get_int("SONOAK_LIBRESPOT_PORT", 3678)
+
+# Snapserver : SONOAK_SNAPSERVER_HOST="" => découverte mDNS (_snapcast-http._tcp, nécessite zeroconf)
+SNAPSERVER_HOST = os.getenv("SONOAK_SNAPSERVER_HOST", "192.168.1.173")
+SNAPSERVER_PORT = _get_int("SONOAK_SNAPSERVER_PORT", 1780)
+SNAPSERVER_PING_INTERVAL = _get_float("SONOAK_SNAPSERVER_PING_INTERVAL", 5.0)
+SNAPSERVER_REQUEST_TIMEOUT = _get_float("SONOAK_SNAPSERVER_REQUEST_TIMEOUT", 3.0)
+SNAPSERVER_BACKOFF_MAX = _get_float("SONOAK_SNAPSERVER_BACKOFF_MAX", 30.0)
+
+# Matériel : "pi" (ALSA, lgpio, BlueZ) ou "sim" (backends simulés pour dev/CI/benchmarks)
+HARDWARE_BACKEND = os.getenv("SONOAK_HARDWARE", "pi")
+SIM_MIXER_WRITE_LATENCY = _get_float("SONOAK_SIM_MIXER_WRITE_LATENCY", 0.002)
+SIM_BLUETOOTH_LATENCY = _get_float("SONOAK_SIM_BLUETOOTH_LATENCY", 0.05)
+
+# Volume : contrôle du mixer de sortie et courbe (linear, db_linear, perceptual).
+# Vide => profil du contrôle (services/volume/curves.py:PROFILES) ; plancher/plafond en dB
+MIXER_CONTROL = os.getenv("SONOAK_MIXER_CONTROL", "Digital")
+VOLUME_CURVE = os.getenv("SONOAK_VOLUME_CURVE", "")
+VOLUME_FLOOR_DB = _get_optional_float("SONOAK_VOLUME_FLOOR_DB")
+VOLUME_CEILING_DB = _get_optional_float("SONOAK_VOLUME_CEILING_DB")
+# Rampes : cadence d'écriture du mixer, cadence des mises à jour UI, durées (s)
+VOLUME_RAMP_TICK = _get_float("SONOAK_VOLUME_RAMP_TICK", 0.01)
+VOLUME_UI_INTERVAL = _get_float("SONOAK_VOLUME_UI_INTERVAL", 0.05)
+VOLUME_RAMP_TIME = _get_float("SONOAK_VOLUME_RAMP_TIME", 0.1)
+VOLUME_RAMP_EASING = os.getenv("SONOAK_VOLUME_RAMP_EASING", "ease_out")
+# Fondu autour des changements de source (0 => désactivé)
+VOLUME_FADE_TIME = _get_float("SONOAK_VOLUME_FADE_TIME", 0.08)
+
+# Encodeur : anti-rebond (s) et accélération selon la vitesse de rotation (crans/s) :
+# gain 1 sous la bande morte, jusqu'à MAX_GAIN à partir de FAST, courbe none/linear/quadratic/cubic
+ROTARY_DEBOUNCE = _get_float("SONOAK_ROTARY_DEBOUNCE", 0.005)
+ROTARY_CURVE = os.getenv("SONOAK_ROTARY_CURVE", "quadratic")
+ROTARY_DEAD_BAND = _get_float("SONOAK_ROTARY_DEAD_BAND", 5.0)
+ROTARY_FAST = _get_float("SONOAK_ROTARY_FAST", 40.0)
+ROTARY_MAX_GAIN = _get_float("SONOAK_ROTARY_MAX_GAIN", 6.0)
+ROTARY_BASE_STEP = _get_float("SONOAK_ROTARY_BASE_STEP", 1.0)
+
+# Bluetooth : reconnexion de l'appareil préféré au démarrage si c'était la source en cours
+BLUETOOTH_AUTO_RECONNECT = os.getenv("SONOAK_BLUETOOTH_AUTO_RECONNECT", "1") == "1"
+BLUETOOTH_RECONNECT_ATTEMPTS = _get_int("SONOAK_BLUETOOTH_RECONNECT_ATTEMPTS", 3)
+BLUETOOTH_RECONNECT_TIMEOUT = _get_float("SONOAK_BLUETOOTH_RECONNECT_TIMEOUT", 15.0)
+
+# Gestes du bouton de l'encodeur : "geste=action,..." (vide => table par défaut,
+# voir services/volume/gestures.py) ; seuils d'appui long et de double appui (s)
+ROTARY_GESTURES = os.getenv("SONOAK_ROTARY_GESTURES", "")
+ROTARY_LONG_PRESS = _get_float("SONOAK_ROTARY_LONG_PRESS", 0.6)
+ROTARY_DOUBLE_PRESS = _get_float("SONOAK_ROTARY_DOUBLE_PRESS", 0.3)
+
+# Mesure de niveau (numpy requis) : périphérique de capture ALSA vide => désactivée
+# (ex. "dsnoop:CARD=Loopback,DEV=1" pour écouter la sortie via snd-aloop)
+METER_DEVICE = os.getenv("SONOAK_METER_DEVICE", "")
+METER_RATE = _get_float("SONOAK_METER_RATE", 15.0)
+METER_SILENCE_DB = _get_float("SONOAK_METER_SILENCE_DB", -60.0)
+# Silence continu au-delà duquel l'AudioManager passe en veille (minutes)
+METER_STANDBY_MINUTES = _get_float("SONOAK_METER_STANDBY_MINUTES", 10.0)
+
+# Politique de veille : arrêt des services inutilisés après inactivité (minutes, 0 = jamais)
+POWER_POLICY = os.getenv("SONOAK_POWER_POLICY", "0") == "1"
+POWER_CHECK_INTERVAL = _get_float("SONOAK_POWER_CHECK_INTERVAL", 5.0)
+POWER_LIBRESPOT_IDLE_MINUTES = _get_float("SONOAK_POWER_LIBRESPOT_IDLE_MINUTES", 30.0)
+POWER_SNAPCLIENT_IDLE_MINUTES = _get_float("SONOAK_POWER_SNAPCLIENT_IDLE_MINUTES", 15.0)
+POWER_BLUEALSA_IDLE_MINUTES = _get_float("SONOAK_POWER_BLUEALSA_IDLE_MINUTES", 10.0)
+# Ampli : commandes d'extinction / rallumage (vides => ampli non piloté)
+POWER_AMP_IDLE_MINUTES = _get_float("SONOAK_POWER_AMP_IDLE_MINUTES", 5.0)
+POWER_AMP_OFF_COMMAND = os.getenv("SONOAK_POWER_AMP_OFF_COMMAND", "")
+POWER_AMP_ON_COMMAND = os.getenv("SONOAK_POWER_AMP_ON_COMMAND", "")
+
+# Écran : mise en veille après inactivité (s, 0 = jamais), tactile evdev vide => désactivé.
+# `{level}` est remplacé par la luminosité dans la commande de rétroéclairage
+DISPLAY_TIMEOUT = _get_float("SONOAK_DISPLAY_TIMEOUT", 2400.0)
+DISPLAY_TOUCH_DEVICE = os.getenv(
+    "SONOAK_DISPLAY_TOUCH_DEVICE", "/dev/input/by-id/usb-WaveShare_WS170120_220211-event-if00"
+)
+DISPLAY_BACKLIGHT_COMMAND = os.getenv(
+    "SONOAK_DISPLAY_BACKLIGHT_COMMAND",
+    "/home/leo/sonoak/RPi-USB-Brightness/64/lite/Raspi_USB_Backlight_nogui -b {level}"
+)
+DISPLAY_ON_LEVEL = _get_int("SONOAK_DISPLAY_ON_LEVEL", 5)
+DISPLAY_OFF_LEVEL = _get_int("SONOAK_DISPLAY_OFF_LEVEL", 0)
+
+# Journal binaire des événements entrants : chemin vide => désactivé
+JOURNAL_PATH = os.getenv("SONOAK_JOURNAL_PATH", "")
+JOURNAL_SIZE_MB = _get_int("SONOAK_JOURNAL_SIZE_MB", 8)
+# Rejeu d'un journal au démarrage (vitesse 0 => sans attente entre événements)
+JOURNAL_REPLAY = os.getenv("SONOAK_JOURNAL_REPLAY", "")
+JOURNAL_REPLAY_SPEED = _get_float("SONOAK_JOURNAL_REPLAY_SPEED", 1.0)
+
+# Canal d'état local (socket Unix) pour le kiosque : chemin vide => désactivé
+LOCAL_STATE_SOCKET = os.getenv("SONOAK_LOCAL_STATE_SOCKET", "")
+
+# État persistant (dernière source, volume, appareil, piste) pour un redémarrage à chaud :
+# chemin vide => désactivé ; écrit au plus une fois par intervalle
+STATE_FILE = os.getenv("SONOAK_STATE_FILE", os.path.join(os.path.dirname(__file__), "state", "sonoak-state.json"))
+STATE_SAVE_INTERVAL = _get_float("SONOAK_STATE_SAVE_INTERVAL", 5.0)
+
+# Pont MQTT (domotique) : hôte vide => désactivé
+MQTT_HOST = os.getenv("SONOAK_MQTT_HOST", "")
+MQTT_PORT = _get_int("SONOAK_MQTT_PORT", 1883)
+MQTT_PREFIX = os.getenv("SONOAK_MQTT_PREFIX", "sonoak")
+MQTT_USERNAME = os.getenv("SONOAK_MQTT_USERNAME") or None
+MQTT_PASSWORD = os.getenv("SONOAK_MQTT_PASSWORD") or None
+
+# Traitement des messages WebSocket : files parallèles par connexion
+WS_MAX_WORKERS = _get_int("SONOAK_WS_MAX_WORKERS", 4)
+WS_MAX_QUEUE = _get_int("SONOAK_WS_MAX_QUEUE", 32)
+WS_HANDLER_DEADLINE = _get_float("SONOAK_WS_HANDLER_DEADLINE", 5.0)
@@ -0,0 +1,67 @@
+# backend/hardware/__init__.py
+# Sélection des backends matériels selon config.HARDWARE_BACKEND ("pi" ou "sim")
+import config
+
+from hardware.bluetooth import BluetoothBackend, BluezBackend, SimulatedBluetooth
+from hardware.capture import AlsaCapture, AudioCapture, SimulatedCapture
+from hardware.display import (Backlight, CommandBacklight, EvdevTouch, SimulatedBacklight,
+                              SimulatedTouch, TouchInput)
+from hardware.gpio import GpioChip, LgpioChip, SimulatedGpioChip
+from hardware.mixer import AlsaMixer, Mixer, SimulatedMixer
+from hardware.power import ServiceControl, SimulatedServiceControl, SystemdControl
+
+# Dernières instances simulées créées, pilotables par les benchmarks et /api/hardware
+SIMULATED = {}
+
+
+def is_simulated() -> bool:
+    return config.HARDWARE_BACKEND == "sim"
+
+
+def create_mixer(control: str = "Digital") -> Mixer:
+    if is_simulated():
+        SIMULATED["mixer"] = SimulatedMixer(control, write_latency=config.SIM_MIXER_WRITE_LATENCY)
+        return SIMULATED["mixer"]
+    return AlsaMixer(control)
+
+
+def create_gpio_chip(clk_pin: int = 22, dt_pin: int = 27, sw_pin: int = 23) -> GpioChip:
+    if is_simulated():
+        SIMULATED["gpio"] = SimulatedGpioChip(clk_pin, dt_pin, sw_pin)
+        return SIMULATED["gpio"]
+    return LgpioChip(0)
+
+
+def create_bluetooth() -> BluetoothBackend:
+    if is_simulated():
+        SIMULATED["bluetooth"] = SimulatedBluetooth(latency=config.SIM_BLUETOOTH_LATENCY)
+        return SIMULATED["bluetooth"]
+    return BluezBackend()
+
+
+def create_capture(device: str, rate: int = 48000, channels: int = 2, period: int = 1024) -> AudioCapture:
+    if is_simulated():
+        SIMULATED["capture"] = SimulatedCapture(rate, channels, period)
+        return SIMULATED["capture"]
+    return AlsaCapture(device, rate, channels, period)
+
+
+def create_service_control() -> ServiceControl:
+    if is_simulated():
+        SIMULATED["services"] = SimulatedServiceControl()
+        return SIMULATED["services"]
+    return SystemdControl()
+
+
+def create_backlight(command: str) -> Backlight:
+    if is_simulated():
+        SIMULATED["backlight"] = SimulatedBacklight()
+        return SIMULATED["backlight"]
+    return CommandBacklight(command)
+
+
+def create_touch(device: str) -> TouchInput:
+    if is_simulated():
+        SIMULATED["touch"] = SimulatedTouch()
+        return SIMULATED["touch"]
+    return EvdevTouch(device)
@@ -0,0 +1,267 @@
+# backend/hardware/bluetooth.py
+# Accès Bluetooth : BlueZ (D-Bus + bluetoothctl) ou adaptateur simulé
+import asyncio
+import logging
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import dbus
+    import dbus.mainloop.glib
+    from gi.repository import GLib
+except ImportError:  # absent hors du Pi : seul l'adaptateur simulé est disponible
+    dbus = None
+
+logger = logging.getLogger(__name__)
+
+DEVICE_INTERFACE = "org.bluez.Device1"
+
+
+def device_path(address: str) -> str:
+    return f"/org/bluez/hci0/dev_{'_'.join(address.split(':'))}"
+
+
+class BluetoothBackend:
+    """
+    Interface commune. Les callbacks de propriétés reçoivent
+    (interface, changed, invalidated, path=...) comme le signal D-Bus.
+    """
+
+    def setup_adapter(self) -> None:
+        raise NotImplementedError
+
+    def add_properties_listener(self, callback: Callable, device_only: bool = False) -> None:
+        raise NotImplementedError
+
+    def add_interfaces_listener(self, on_added: Callable, on_removed: Callable) -> None:
+        """InterfacesAdded(path, interfaces) / InterfacesRemoved(path, interfaces) de l'ObjectManager"""
+        raise NotImplementedError
+
+    def get_managed_objects(self) -> Dict:
+        """{chemin: {interface: propriétés}} pour tous les objets BlueZ"""
+        raise NotImplementedError
+
+    def get_device_properties(self, path: str) -> Dict:
+        raise NotImplementedError
+
+    def connect(self, path: str) -> None:
+        """Connexion à un appareil connu (bloquant : à appeler hors de la boucle asyncio)"""
+        raise NotImplementedError
+
+    def connect_audio(self, address: str) -> None:
+        """Approuve l'appareil et établit le profil audio A2DP"""
+        raise NotImplementedError
+
+    def disconnect(self, path: str) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class BluezBackend(BluetoothBackend):
+    """
+    Les signaux D-Bus sont reçus par une boucle GLib dans un thread dédié (rien
+    d'autre ne fait tourner GLib dans le backend) ; les callbacks sont ensuite
+    exécutés dans la boucle asyncio via call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        if dbus is None:
+            raise RuntimeError("dbus-python et PyGObject ne sont pas installés (SONOAK_HARDWARE=sim pour simuler)")
+        dbus.mainloop.glib.threads_init()
+        dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
+        self.bus = dbus.SystemBus()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._glib_loop: Optional["GLib.MainLoop"] = None
+        self._glib_thread: Optional[threading.Thread] = None
+
+    def _start_signal_thread(self) -> None:
+        if self._glib_thread is not None:
+            return
+        self._glib_loop = GLib.MainLoop()
+        self._glib_thread = threading.Thread(target=self._glib_loop.run, name="bluez-signals", daemon=True)
+        self._glib_thread.start()
+
+    def _in_loop(self, callback: Callable) -> Callable:
+        """Callback D-Bus (thread GLib) relayé dans la boucle asyncio"""
+        def relay(*args, **kwargs):
+            self._loop.call_soon_threadsafe(lambda: callback(*args, **kwargs))
+        return relay
+
+    def setup_adapter(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._start_signal_thread()
+        adapter_obj = self.bus.get_object('org.bluez', '/org/bluez/hci0')
+        adapter_props = dbus.Interface(adapter_obj, 'org.freedesktop.DBus.Properties')
+        adapter_props.Set('org.bluez.Adapter1', 'Powered', dbus.Boolean(True))
+        adapter_props.Set('org.bluez.Adapter1', 'Discoverable', dbus.Boolean(True))
+        adapter_props.Set('org.bluez.Adapter1', 'Pairable', dbus.Boolean(True))
+
+    def add_properties_listener(self, callback: Callable, device_only: bool = False) -> None:
+        filters = {"arg0": DEVICE_INTERFACE} if device_only else {}
+        self.bus.add_signal_receiver(
+            self._in_loop(callback),
+            dbus_interface="org.freedesktop.DBus.Properties",
+            signal_name="PropertiesChanged",
+            path_keyword="path",
+            **filters
+        )
+
+    def add_interfaces_listener(self, on_added: Callable, on_removed: Callable) -> None:
+        for signal_name, callback in (("InterfacesAdded", on_added), ("InterfacesRemoved", on_removed)):
+            self.bus.add_signal_receiver(
+                self._in_loop(callback),
+                dbus_interface="org.freedesktop.DBus.ObjectManager",
+                signal_name=signal_name,
+                bus_name="org.bluez"
+            )
+
+    def get_managed_objects(self) -> Dict:
+        manager = dbus.Interface(self.bus.get_object('org.bluez', '/'), 'org.freedesktop.DBus.ObjectManager')
+        return manager.GetManagedObjects()
+
+    def get_device_properties(self, path: str) -> Dict:
+        device = self.bus.get_object('org.bluez', path)
+        props_iface = dbus.Interface(device, 'org.freedesktop.DBus.Properties')
+        return props_iface.GetAll(DEVICE_INTERFACE)
+
+    def connect(self, path: str) -> None:
+        device = dbus.Interface(self.bus.get_object('org.bluez', path), DEVICE_INTERFACE)
+        device.Connect(timeout=15)
+
+    def connect_audio(self, address: str) -> None:
+        subprocess.run(["bluetoothctl", "trust", address], capture_output=True)
+        subprocess.run(["bluetoothctl", "connect", address], capture_output=True)
+        # Attendre la stabilisation
+        time.sleep(1)
+
+    def disconnect(self, path: str) -> None:
+        device = self.bus.get_object('org.bluez', path)
+        device_props = dbus.Interface(device, 'org.freedesktop.DBus.Properties')
+        address = str(device_props.Get(DEVICE_INTERFACE, 'Address'))
+
+        # Déconnexion brutale via bluetoothctl
+        subprocess.run(["bluetoothctl", "disconnect", address], check=True)
+
+        # Puis déconnexion via DBus
+        device_iface = dbus.Interface(device, DEVICE_INTERFACE)
+        device_iface.Disconnect()
+
+    def close(self) -> None:
+        if self._glib_loop is not None:
+            self._glib_loop.quit()
+
+
+class SimulatedBluetooth(BluetoothBackend):
+    """
+    Adaptateur en mémoire. simulate_connection/simulate_disconnection émettent
+    PropertiesChanged après `latency` secondes, comme BlueZ après l'appairage.
+    """
+
+    def __init__(self, latency: float = 0.05, audio_setup_time: float = 0.0):
+        self.latency = latency
+        self.audio_setup_time = audio_setup_time
+        self.devices: Dict[str, Dict] = {}
+        self.adapter = {"Powered": False, "Discoverable": False, "Pairable": False}
+        self._listeners: List[Callable] = []
+        self._interfaces_listeners: List[tuple] = []
+        # Appareils hors de portée : connect() échoue
+        self.unreachable = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.signals_sent = 0
+
+    def setup_adapter(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.adapter.update(Powered=True, Discoverable=True, Pairable=True)
+
+    def add_properties_listener(self, callback: Callable, device_only: bool = False) -> None:
+        self._listeners.append(callback)
+
+    def add_interfaces_listener(self, on_added: Callable, on_removed: Callable) -> None:
+        self._interfaces_listeners.append((on_added, on_removed))
+
+    def get_managed_objects(self) -> Dict:
+        return {path: {DEVICE_INTERFACE: dict(props)} for path, props in self.devices.items()}
+
+    def get_device_properties(self, path: str) -> Dict:
+        return dict(self.devices.get(path, {}))
+
+    def connect(self, path: str) -> None:
+        if path not in self.devices or self.devices[path]["Address"] in self.unreachable:
+            raise RuntimeError(f"org.bluez.Error.Failed: Page Timeout ({path})")
+        time.sleep(self.latency)
+        self.devices[path]["Connected"] = True
+        # Signal émis depuis la boucle, comme la réception D-Bus
+        self._loop.call_soon_threadsafe(self._emit, path, {"Connected": True})
+
+    def connect_audio(self, address: str) -> None:
+        path = device_path(address)
+        if path in self.devices and not self.devices[path].get("Trusted"):
+            self.devices[path]["Trusted"] = True
+            self._loop.call_soon_threadsafe(self._emit, path, {"Trusted": True})
+        if self.audio_setup_time:
+            time.sleep(self.audio_setup_time)
+
+    def disconnect(self, path: str) -> None:
+        if path in self.devices:
+            self._set_connected(path, False)
+
+    def simulate_pairing(self, address: str, name: Optional[str] = None, trusted: bool = True) -> str:
+        """Appareil appairé lors d'une session précédente (présent dans BlueZ, non connecté)"""
+        path = device_path(address)
+        if path not in self.devices:
+            self.devices[path] = {
+                "Address": address, "Name": name or address, "Paired": True, "Trusted": trusted, "Connected": False
+            }
+            self._emit_interfaces(0, path, {DEVICE_INTERFACE: dict(self.devices[path])})
+        return path
+
+    def simulate_removal(self, address: str) -> None:
+        path = device_path(address)
+        if self.devices.pop(path, None) is not None:
+            self._emit_interfaces(1, path, [DEVICE_INTERFACE])
+
+    def simulate_connection(self, address: str, name: Optional[str] = None) -> str:
+        path = device_path(address)
+        if path not in self.devices:
+            self.devices[path] = {
+                "Address": address, "Name": name or address, "Paired": True, "Trusted": False, "Connected": False
+            }
+            self._emit_interfaces(0, path, {DEVICE_INTERFACE: dict(self.devices[path])})
+        self._set_connected(path, True)
+        return path
+
+    def simulate_disconnection(self, address: str) -> None:
+        self.disconnect(device_path(address))
+
+    def _set_connected(self, path: str, connected: bool) -> None:
+        self.devices[path]["Connected"] = connected
+        # Appelé depuis la boucle (simulation) ou depuis un thread (disconnect)
+        self._loop.call_soon_threadsafe(
+            self._loop.call_later, self.latency, self._emit, path, {"Connected": connected}
+        )
+
+    def _emit_interfaces(self, index: int, path: str, interfaces) -> None:
+        for listeners in list(self._interfaces_listeners):
+            try:
+                listeners[index](path, interfaces)
+            except Exception as e:
+                logger.error(f"Erreur callback Bluetooth simulé: {e}")
+
+    def _emit(self, path: str, changed: Dict) -> None:
+        self.signals_sent += 1
+        for callback in list(self._listeners):
+            try:
+                callback(DEVICE_INTERFACE, changed, [], path=path)
+            except Exception as e:
+                logger.error(f"Erreur callback Bluetooth simulé: {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            "adapter": dict(self.adapter),
+            "devices": list(self.devices.values()),
+            "signals_sent": self.signals_sent
+        }
@@ -0,0 +1,95 @@
+# backend/hardware/capture.py
+# Capture du signal de sortie pour la mesure de niveau : ALSA (loopback / dsnoop) ou simulée
+import logging
+import math
+import struct
+import time
+from typing import Optional, Tuple
+
+try:
+    import alsaaudio
+except ImportError:  # absent hors du Pi : seule la capture simulée est disponible
+    alsaaudio = None
+
+logger = logging.getLogger(__name__)
+
+
+class AudioCapture:
+    """Interface commune : blocs S16_LE entrelacés, lecture bloquante (à appeler hors de la boucle asyncio)"""
+
+    rate = 48000
+    channels = 2
+    period = 1024
+
+    def read(self) -> bytes:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class AlsaCapture(AudioCapture):
+    def __init__(self, device: str, rate: int = 48000, channels: int = 2, period: int = 1024):
+        if alsaaudio is None:
+            raise RuntimeError("pyalsaaudio n'est pas installé (SONOAK_HARDWARE=sim pour simuler)")
+        self.device = device
+        self.rate = rate
+        self.channels = channels
+        self.period = period
+        self._pcm = alsaaudio.PCM(
+            alsaaudio.PCM_CAPTURE, alsaaudio.PCM_NORMAL, device=device,
+            channels=channels, rate=rate, format=alsaaudio.PCM_FORMAT_S16_LE, periodsize=period
+        )
+
+    def read(self) -> bytes:
+        length, data = self._pcm.read()
+        if length < 0:
+            # Débordement (overrun) : le bloc est perdu, on continue
+            logger.debug(f"Capture {self.device}: overrun ({length})")
+            return b""
+        return data
+
+    def close(self) -> None:
+        self._pcm.close()
+
+
+class SimulatedCapture(AudioCapture):
+    """Sinusoïde de niveau réglable (None = silence), cadencée comme une vraie capture"""
+
+    def __init__(self, rate: int = 48000, channels: int = 2, period: int = 1024,
+                 level_db: Optional[float] = None, frequency: float = 440.0):
+        self.rate = rate
+        self.channels = channels
+        self.period = period
+        self.level_db = level_db
+        self.frequency = frequency
+        self.blocks = 0
+        self._block: Optional[Tuple[float, bytes]] = None
+        self._next_at = time.monotonic()
+
+    def set_level(self, level_db: Optional[float]):
+        self.level_db = level_db
+
+    def read(self) -> bytes:
+        self._next_at += self.period / self.rate
+        delay = self._next_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self._next_at = time.monotonic()
+        self.blocks += 1
+        if self.level_db is None:
+            return bytes(self.period * self.channels * 2)
+        if self._block is None or self._block[0] != self.level_db:
+            # Bloc précalculé par niveau : la phase n'importe pas pour la mesure
+            amplitude = 32767 * 10 ** (self.level_db / 20)
+            step = 2 * math.pi * self.frequency / self.rate
+            samples = []
+            for n in range(self.period):
+                samples.extend((int(amplitude * math.sin(step * n)),) * self.channels)
+            self._block = (self.level_db, struct.pack(f"<{len(samples)}h", *samples))
+        return self._block[1]
+
+    def get_stats(self) -> dict:
+        return {"level_db": self.level_db, "blocks": self.blocks, "rate": self.rate, "period": self.period}
+
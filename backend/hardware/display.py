@@ -0,0 +1,102 @@
+# backend/hardware/display.py
+# Écran tactile : rétroéclairage (outil USB) et appuis tactiles (evdev), réels ou simulés
+import asyncio
+import logging
+import shlex
+from collections import deque
+from time import monotonic
+from typing import AsyncIterator
+
+try:
+    import evdev
+except ImportError:  # absent hors du Pi : seul le tactile simulé est disponible
+    evdev = None
+
+logger = logging.getLogger(__name__)
+
+
+class Backlight:
+    async def set_level(self, level: int) -> bool:
+        raise NotImplementedError
+
+
+class CommandBacklight(Backlight):
+    """Outil en ligne de commande ; `{level}` est remplacé par la luminosité"""
+
+    def __init__(self, command: str):
+        self.command = command
+
+    async def set_level(self, level: int) -> bool:
+        args = shlex.split(self.command.format(level=level))
+        process = await asyncio.create_subprocess_exec(
+            *args, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            logger.error(f"Backlight command failed ({process.returncode}): {stderr.decode(errors='replace').strip()}")
+            return False
+        return True
+
+
+class SimulatedBacklight(Backlight):
+    def __init__(self, history_size: int = 100):
+        self.level = None
+        self.history = deque(maxlen=history_size)  # (monotonic, luminosité)
+
+    async def set_level(self, level: int) -> bool:
+        self.level = level
+        self.history.append((monotonic(), level))
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            "level": self.level,
+            "history": [{"t": round(t, 3), "level": level} for t, level in self.history]
+        }
+
+
+class TouchInput:
+    """Interface commune : itérateur asynchrone des appuis (TOUCH_DOWN)"""
+
+    def touches(self) -> AsyncIterator[None]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class EvdevTouch(TouchInput):
+    """Lecture non bloquante du périphérique d'entrée (BTN_TOUCH enfoncé)"""
+
+    def __init__(self, path: str):
+        if evdev is None:
+            raise RuntimeError("evdev n'est pas installé (SONOAK_HARDWARE=sim pour simuler)")
+        self.path = path
+        self._device = evdev.InputDevice(path)
+
+    async def touches(self) -> AsyncIterator[None]:
+        ev_key = evdev.ecodes.EV_KEY
+        btn_touch = evdev.ecodes.BTN_TOUCH
+        async for event in self._device.async_read_loop():
+            if event.type == ev_key and event.code == btn_touch and event.value == 1:
+                yield None
+
+    def close(self) -> None:
+        self._device.close()
+
+
+class SimulatedTouch(TouchInput):
+    def __init__(self):
+        self.count = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def touch(self):
+        self.count += 1
+        self._queue.put_nowait(None)
+
+    async def touches(self) -> AsyncIterator[None]:
+        while True:
+            yield await self._queue.get()
+
+    def get_stats(self) -> dict:
+        return {"touches": self.count}
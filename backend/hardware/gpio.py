@@ -0,0 +1,137 @@
+# backend/hardware/gpio.py
+# Accès GPIO : lgpio (Raspberry Pi) ou puce simulée rejouant des trains d'impulsions
+import heapq
+import itertools
+import logging
+from time import monotonic
+from typing import Dict, Iterable, Tuple
+
+try:
+    import lgpio
+except ImportError:  # absent hors du Pi : seule la puce simulée est disponible
+    lgpio = None
+
+logger = logging.getLogger(__name__)
+
+
+class GpioChip:
+    """Interface commune : entrées avec pull-up, lecture de niveau"""
+
+    def claim_input(self, pin: int) -> None:
+        raise NotImplementedError
+
+    def read(self, pin: int) -> int:
+        raise NotImplementedError
+
+    def free(self, pin: int) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+class LgpioChip(GpioChip):
+    def __init__(self, chip: int = 0):
+        if lgpio is None:
+            raise RuntimeError("lgpio n'est pas installé (SONOAK_HARDWARE=sim pour simuler)")
+        self.handle = lgpio.gpiochip_open(chip)
+
+    def claim_input(self, pin: int) -> None:
+        lgpio.gpio_claim_input(self.handle, pin, lgpio.SET_PULL_UP)
+
+    def read(self, pin: int) -> int:
+        return lgpio.gpio_read(self.handle, pin)
+
+    def free(self, pin: int) -> None:
+        lgpio.gpio_free(self.handle, pin)
+
+    def close(self) -> None:
+        lgpio.gpiochip_close(self.handle)
+
+
+class SimulatedGpioChip(GpioChip):
+    """
+    Puce GPIO en mémoire. Les fronts sont planifiés sur l'horloge monotonic et
+    appliqués à la lecture : le contrôleur voit les mêmes timings qu'avec un
+    encodeur réel (crans espacés, DT en avance de phase sur CLK, rebonds).
+    """
+
+    def __init__(self, clk_pin: int = 22, dt_pin: int = 27, sw_pin: int = 23):
+        self.clk_pin = clk_pin
+        self.dt_pin = dt_pin
+        self.sw_pin = sw_pin
+        # Entrées au repos à 1 (pull-up)
+        self._levels: Dict[int, int] = {}
+        self._planned: Dict[int, int] = {}
+        self._edges = []
+        self._seq = itertools.count()
+        self.reads = 0
+        self.edges_applied = 0
+
+    def claim_input(self, pin: int) -> None:
+        self._levels.setdefault(pin, 1)
+
+    def read(self, pin: int) -> int:
+        self.reads += 1
+        now = monotonic()
+        while self._edges and self._edges[0][0] <= now:
+            _, _, edge_pin, level = heapq.heappop(self._edges)
+            self._levels[edge_pin] = level
+            self.edges_applied += 1
+        return self._levels.get(pin, 1)
+
+    def free(self, pin: int) -> None:
+        pass
+
+    def close(self) -> None:
+        self._edges.clear()
+
+    def _level(self, pin: int) -> int:
+        return self._planned.get(pin, self._levels.get(pin, 1))
+
+    def queue_edge(self, at: float, pin: int, level: int) -> None:
+        self._planned[pin] = level
+        heapq.heappush(self._edges, (at, next(self._seq), pin, level))
+
+    def queue_edges(self, edges: Iterable[Tuple[float, int, int]], start: float = None) -> None:
+        """Rejoue une trace brute [(décalage_s, pin, niveau), ...]"""
+        start = monotonic() if start is None else start
+        for offset, pin, level in edges:
+            self.queue_edge(start + offset, pin, level)
+
+    def queue_rotation(self, steps: int, interval: float = 0.06, bounce: int = 0, start: float = None) -> float:
+        """
+        Planifie |steps| crans (signe = sens, positif = horaire) espacés de interval.
+        Chaque cran bascule CLK ; DT est positionné un quart de période avant
+        (DT != CLK => horaire). bounce ajoute des rebonds de CLK à 0,5 ms.
+        Retourne l'instant du dernier front.
+        """
+        at = max(monotonic(), self._last_edge_time()) if start is None else start
+        phase = interval / 4
+        for _ in range(abs(steps)):
+            at += interval
+            clk = 1 - self._level(self.clk_pin)
+            dt = 1 - clk if steps > 0 else clk
+            self.queue_edge(at - phase, self.dt_pin, dt)
+            self.queue_edge(at, self.clk_pin, clk)
+            for i in range(bounce):
+                self.queue_edge(at + 0.0005 * (2 * i + 1), self.clk_pin, 1 - clk)
+                self.queue_edge(at + 0.0005 * (2 * i + 2), self.clk_pin, clk)
+        return at
+
+    def queue_press(self, duration: float = 0.1, start: float = None) -> None:
+        """Appui sur le bouton (actif bas)"""
+        at = monotonic() if start is None else start
+        self.queue_edge(at, self.sw_pin, 0)
+        self.queue_edge(at + duration, self.sw_pin, 1)
+
+    def _last_edge_time(self) -> float:
+        return max((edge[0] for edge in self._edges), default=0.0)
+
+    def get_stats(self) -> dict:
+        return {
+            "pins": dict(self._levels),
+            "pending_edges": len(self._edges),
+            "edges_applied": self.edges_applied,
+            "reads": self.reads
+        }
@@ -0,0 +1,142 @@
+# backend/hardware/mixer.py
+# Mixer de volume : ALSA (HiFiBerry) ou simulé
+import logging
+import time
+from collections import deque
+from time import monotonic
+from typing import Optional, Tuple
+
+try:
+    import alsaaudio
+except ImportError:  # absent hors du Pi : seul le mixer simulé est disponible
+    alsaaudio = None
+
+logger = logging.getLogger(__name__)
+
+
+class Mixer:
+    """
+    Interface commune : volume en pourcentage ou en pas bruts du contrôle, moyenne des canaux.
+    get_db_range() donne la plage en dB correspondant aux pas bruts (None si inconnue).
+    """
+
+    def get_volume(self) -> int:
+        raise NotImplementedError
+
+    def set_volume(self, volume: int) -> None:
+        raise NotImplementedError
+
+    def get_raw_range(self) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def get_db_range(self) -> Optional[Tuple[float, float]]:
+        return None
+
+    def get_raw(self) -> int:
+        raise NotImplementedError
+
+    def set_raw(self, value: int) -> None:
+        raise NotImplementedError
+
+
+class AlsaMixer(Mixer):
+    def __init__(self, control: str = "Digital"):
+        if alsaaudio is None:
+            raise RuntimeError("pyalsaaudio n'est pas installé (SONOAK_HARDWARE=sim pour simuler)")
+        self.control = control
+        self._mixer = alsaaudio.Mixer(control)
+
+    def get_volume(self) -> int:
+        volumes = self._mixer.getvolume()
+        return int(sum(volumes) / len(volumes))
+
+    def set_volume(self, volume: int) -> None:
+        self._mixer.setvolume(volume)
+
+    # Unités brutes / dB : pyalsaaudio >= 0.10
+    def get_raw_range(self) -> Tuple[int, int]:
+        low, high = self._mixer.getrange(units=alsaaudio.VOLUME_UNITS_RAW)
+        return int(low), int(high)
+
+    def get_db_range(self) -> Optional[Tuple[float, float]]:
+        try:
+            low, high = self._mixer.getrange(units=alsaaudio.VOLUME_UNITS_DB)
+        except alsaaudio.ALSAAudioError:
+            return None
+        # ALSA exprime les dB en centièmes
+        return low / 100, high / 100
+
+    def get_raw(self) -> int:
+        volumes = self._mixer.getvolume(units=alsaaudio.VOLUME_UNITS_RAW)
+        return round(sum(volumes) / len(volumes))
+
+    def set_raw(self, value: int) -> None:
+        self._mixer.setvolume(value, units=alsaaudio.VOLUME_UNITS_RAW)
+
+
+class SimulatedMixer(Mixer):
+    """
+    Mixer en mémoire ; les écritures bloquent comme l'ioctl ALSA.
+    Plage par défaut du contrôle Digital du HiFiBerry AMP2 : 0-207, -103.5 à 0 dB (pas de 0.5 dB).
+    """
+
+    def __init__(self, control: str = "Digital", initial: int = 60,
+                 write_latency: float = 0.002, read_latency: float = 0.0002, history_size: int = 1000,
+                 raw_range: Tuple[int, int] = (0, 207), db_range: Optional[Tuple[float, float]] = (-103.5, 0.0)):
+        self.control = control
+        self.write_latency = write_latency
+        self.read_latency = read_latency
+        self.raw_range = raw_range
+        self.db_range = db_range
+        self._raw = self._raw_from_percent(initial)
+        self.reads = 0
+        self.writes = 0
+        self.history = deque(maxlen=history_size)  # (monotonic, volume brut)
+
+    def _raw_from_percent(self, percent: int) -> int:
+        low, high = self.raw_range
+        return low + round(max(0, min(100, percent)) * (high - low) / 100)
+
+    def _read(self) -> int:
+        self.reads += 1
+        if self.read_latency:
+            time.sleep(self.read_latency)
+        return self._raw
+
+    def _write(self, raw: int):
+        self.writes += 1
+        if self.write_latency:
+            time.sleep(self.write_latency)
+        self._raw = max(self.raw_range[0], min(self.raw_range[1], int(raw)))
+        self.history.append((monotonic(), self._raw))
+
+    def get_volume(self) -> int:
+        low, high = self.raw_range
+        return round((self._read() - low) * 100 / (high - low))
+
+    def set_volume(self, volume: int) -> None:
+        self._write(self._raw_from_percent(volume))
+
+    def get_raw_range(self) -> Tuple[int, int]:
+        return self.raw_range
+
+    def get_db_range(self) -> Optional[Tuple[float, float]]:
+        return self.db_range
+
+    def get_raw(self) -> int:
+        return self._read()
+
+    def set_raw(self, value: int) -> None:
+        self._write(value)
+
+    def get_stats(self) -> dict:
+        return {
+            "control": self.control,
+            "volume": round((self._raw - self.raw_range[0]) * 100 / (self.raw_range[1] - self.raw_range[0])),
+            "raw": self._raw,
+            "raw_range": self.raw_range,
+            "db_range": self.db_range,
+            "reads": self.reads,
+            "writes": self.writes,
+            "write_latency": self.write_latency
+        }
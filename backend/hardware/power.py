@@ -0,0 +1,80 @@
+# backend/hardware/power.py
+# Arrêt / relance des services système (systemd) et de l'ampli : réel ou simulé
+import asyncio
+import logging
+import shlex
+from collections import deque
+from time import monotonic
+from typing import Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceControl:
+    async def start_units(self, units: Sequence[str]) -> bool:
+        raise NotImplementedError
+
+    async def stop_units(self, units: Sequence[str]) -> bool:
+        raise NotImplementedError
+
+    async def run(self, command: str) -> bool:
+        raise NotImplementedError
+
+
+class SystemdControl(ServiceControl):
+    """sudo systemctl, comme les scripts de changement de source"""
+
+    async def _exec(self, *args: str) -> bool:
+        process = await asyncio.create_subprocess_exec(
+            *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            logger.error(f"{' '.join(args)} a échoué ({process.returncode}): {stderr.decode(errors='replace').strip()}")
+            return False
+        return True
+
+    async def start_units(self, units: Sequence[str]) -> bool:
+        return await self._exec("sudo", "systemctl", "start", *units)
+
+    async def stop_units(self, units: Sequence[str]) -> bool:
+        return await self._exec("sudo", "systemctl", "stop", *units)
+
+    async def run(self, command: str) -> bool:
+        return await self._exec(*shlex.split(command))
+
+
+class SimulatedServiceControl(ServiceControl):
+    """Enregistre les actions ; `latency` imite le temps de démarrage d'une unité"""
+
+    def __init__(self, latency: float = 0.05, history_size: int = 200):
+        self.latency = latency
+        self.running = set()
+        self.history = deque(maxlen=history_size)  # (monotonic, action, cible)
+
+    async def _act(self, action: str, target: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.history.append((monotonic(), action, target))
+
+    async def start_units(self, units: Sequence[str]) -> bool:
+        for unit in units:
+            await self._act("start", unit)
+            self.running.add(unit)
+        return True
+
+    async def stop_units(self, units: Sequence[str]) -> bool:
+        for unit in units:
+            await self._act("stop", unit)
+            self.running.discard(unit)
+        return True
+
+    async def run(self, command: str) -> bool:
+        await self._act("run", command)
+        return True
+
+    def get_stats(self) -> dict:
+        return {
+            "running": sorted(self.running),
+            "history": [{"t": round(t, 3), "action": action, "target": target} for t, action, target in self.history]
+        }
@@ -0,0 +1,75 @@
+# backend/hardware/routes.py
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any, Optional
+
+import config
+import hardware
+
+router = APIRouter()
+
+def _simulated(name: str):
+    device = hardware.SIMULATED.get(name)
+    if not device:
+        raise HTTPException(status_code=409, detail=f"No simulated {name} (SONOAK_HARDWARE={config.HARDWARE_BACKEND})")
+    return device
+
+@router.get("")
+async def get_hardware() -> Dict[str, Any]:
+    """Backend matériel actif et état des périphériques simulés"""
+    return {
+        "backend": config.HARDWARE_BACKEND,
+        "simulated": {name: device.get_stats() for name, device in hardware.SIMULATED.items()}
+    }
+
+@router.post("/sim/rotate")
+async def simulate_rotation(steps: int, interval: float = 0.06, bounce: int = 0) -> Dict[str, Any]:
+    """Planifie un train d'impulsions de l'encodeur (steps > 0 = horaire)"""
+    gpio = _simulated("gpio")
+    last_edge = gpio.queue_rotation(steps, interval=interval, bounce=bounce)
+    return {"status": "queued", "steps": steps, "last_edge": last_edge}
+
+@router.post("/sim/press")
+async def simulate_press(duration: float = 0.1) -> Dict[str, Any]:
+    """Appui sur le bouton de l'encodeur"""
+    _simulated("gpio").queue_press(duration)
+    return {"status": "queued"}
+
+@router.post("/sim/bluetooth/connect")
+async def simulate_bluetooth_connect(address: str, name: Optional[str] = None) -> Dict[str, Any]:
+    """Simule la connexion d'un appareil Bluetooth"""
+    path = _simulated("bluetooth").simulate_connection(address, name)
+    return {"status": "connecting", "path": path}
+
+@router.post("/sim/bluetooth/pair")
+async def simulate_bluetooth_pair(address: str, name: Optional[str] = None, trusted: bool = True) -> Dict[str, Any]:
+    """Ajoute un appareil appairé non connecté (reconnexion au démarrage)"""
+    path = _simulated("bluetooth").simulate_pairing(address, name, trusted)
+    return {"status": "paired", "path": path}
+
+@router.post("/sim/bluetooth/unreachable")
+async def simulate_bluetooth_unreachable(address: str, unreachable: bool = True) -> Dict[str, Any]:
+    """Met un appareil hors de portée : les tentatives de connexion échouent"""
+    devices = _simulated("bluetooth").unreachable
+    if unreachable:
+        devices.add(address)
+    else:
+        devices.discard(address)
+    return {"status": "ok", "unreachable": sorted(devices)}
+
+@router.post("/sim/bluetooth/disconnect")
+async def simulate_bluetooth_disconnect(address: str) -> Dict[str, Any]:
+    """Simule la déconnexion d'un appareil Bluetooth"""
+    _simulated("bluetooth").simulate_disconnection(address)
+    return {"status": "disconnecting"}
+
+@router.post("/sim/signal")
+async def simulate_signal(level_db: Optional[float] = None) -> Dict[str, Any]:
+    """Niveau du signal capté par la mesure (dBFS) ; sans paramètre = silence"""
+    _simulated("capture").set_level(level_db)
+    return {"status": "ok", "level_db": level_db}
+
+@router.post("/sim/touch")
+async def simulate_touch() -> Dict[str, Any]:
+    """Appui sur l'écran tactile"""
+    _simulated("touch").touch()
+    return {"status": "ok"}
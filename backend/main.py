@@ -1,14 +1,14 @@
-from fastapi import FastAPI, WebSocket
+from fastapi import Depends, FastAPI, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.websockets import WebSocketDisconnect
 from contextlib import asynccontextmanager
 from typing import Dict, Any
 import asyncio
 import logging
-import logging.handlers
 import os
 from datetime import datetime
 
+import config
 from services.audio.manager import AudioManager, AudioSource
 from services.volume.manager import VolumeManager
 from services.bluetooth.manager import BluetoothManager
@@ -20,64 +20,49 @@ from services.spotify.manager import SpotifyManager
 from services.spotify.player_manager import SpotifyPlayerManager
 from services.spotify.routes import router as spotify_router, init_routes as init_spotify_routes
 from services.volume.rotary_controller import RotaryVolumeController
+from services.volume.gestures import ACTIONS as GESTURE_ACTIONS, parse_action_table
+from services.volume.acceleration import RotaryAcceleration
+from services.mqtt.bridge import MqttBridge
+from services.metering.meter import LevelMeter
+from services.power.policy import IdlePolicy, configured_targets
+from services.display.manager import DisplayManager
 from websocket.manager import WebSocketManager
+from websocket.dispatcher import ConnectionDispatcher, policy_for
+from websocket.protocol import build_registry
+from websocket.registry import MessageValidationError
+from websocket.local_channel import LocalStateChannel
+from websocket.persistence import PersistentState
+from websocket.http_cache import cached_json
+from websocket.routes import router as state_router, init_routes as init_state_routes
+from monitoring import metrics
+from monitoring.loop_monitor import LoopLagMonitor
+from monitoring.log_pipeline import log_pipeline
+from monitoring.journal import journal, read_journal
+import hardware
+from hardware.routes import router as hardware_router
+from monitoring.routes import router as monitoring_router, init_routes as init_monitoring_routes
 
 import uvicorn
 
-# Configuration du logging
+# Configuration du logging : tous les services passent par une file (QueueHandler),
+# le RotatingFileHandler et la console tournent sur le thread du QueueListener
 log_directory = os.path.join(os.path.dirname(__file__), 'logs')
-os.makedirs(log_directory, exist_ok=True)
 
-logging.basicConfig(
+log_pipeline.setup(
+    log_directory,
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    # Configurer pour les erreurs uniquement (modifiable à chaud via /debug/logging)
+    subsystem_levels={"main": "ERROR"}
 )
 
 logger = logging.getLogger(__name__)
 
-# Handlers de logging "INFO" + "ERROR" + "CRITICAL" (TEMPORAIREMENT DESACTIVE)
-'''
-file_handler = logging.handlers.RotatingFileHandler(
-    os.path.join(log_directory, 'backend.log'),
-    maxBytes=1024 * 1024,
-    backupCount=5
+WS_MESSAGES_RECEIVED = metrics.counter(
+    "sonoak_websocket_messages_received_total", "Messages reçus des clients WebSocket", ["service"]
 )
-file_handler.setFormatter(logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-))
-logger.addHandler(file_handler)
-
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-))
-logger.addHandler(console_handler)
-'''
-
-# Configuration commune pour tous les handlers
-log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
-# Configurer pour les erreurs uniquement
-logger.setLevel(logging.ERROR)
-
-# Handlers de logging
-file_handler = logging.handlers.RotatingFileHandler(
-    os.path.join(log_directory, 'backend.log'),
-    maxBytes=1024 * 1024,
-    backupCount=5
+WS_HANDLER_SECONDS = metrics.histogram(
+    "sonoak_websocket_handler_seconds", "Durée de traitement d'un message WebSocket", ["service"]
 )
-file_handler.setFormatter(log_formatter)
-logger.addHandler(file_handler)
-
-console_handler = logging.StreamHandler()
-console_handler.setFormatter(log_formatter)
-logger.addHandler(console_handler)
-
-# Pour réactiver tous les logs (y compris INFO), décommenter le bloc ci-dessous:
-"""
-# Configuration pour tous les logs (INFO et plus)
-logger.setLevel(logging.INFO)
-"""
 
 # Gestionnaires globaux
 class ServiceManager:
@@ -91,31 +76,93 @@ class ServiceManager:
         self.spotify_player = None
         self.rotary_controller = None
         self.bluetooth_events = None
+        self.loop_monitor = None
+        self.replay_task = None
+        self.local_channel = None
+        self.mqtt_bridge = None
+        self.registry = None
+        self.persistent_state = None
+        self.level_meter = None
+        self.idle_policy = None
+        self.display_manager = None
         self.services_status = {}
 
     async def initialize_services(self):
         try:
+            # 0. Surveillance de la boucle asyncio (avant tout service potentiellement bloquant)
+            self.loop_monitor = LoopLagMonitor()
+            self.loop_monitor.start()
+            init_monitoring_routes(self.loop_monitor)
+
+            # Journal des événements entrants (optionnel)
+            if config.JOURNAL_PATH:
+                journal.open(config.JOURNAL_PATH, config.JOURNAL_SIZE_MB * 1024 * 1024)
+
             # 1. WebSocket Manager (dépendance fondamentale)
             self.websocket_manager = WebSocketManager()
             logger.info("WebSocket Manager initialized")
 
+            # État du précédent démarrage, servi comme périmé jusqu'aux premières valeurs fraîches
+            restored_source = AudioSource.NONE
+            restored_device = None
+            if config.STATE_FILE:
+                self.persistent_state = PersistentState(
+                    config.STATE_FILE, self.websocket_manager.state, config.STATE_SAVE_INTERVAL
+                )
+                self.persistent_state.load()
+                self.persistent_state.seed()
+                try:
+                    restored_source = AudioSource(self.persistent_state.last_source() or "none")
+                except ValueError:
+                    pass
+                restored_device = self.persistent_state.last_device()
+
+            # Canal d'état local pour le kiosque (optionnel, avant le premier broadcast)
+            if config.LOCAL_STATE_SOCKET:
+                self.local_channel = LocalStateChannel(config.LOCAL_STATE_SOCKET, self.websocket_manager.state)
+                await self.local_channel.start()
+
             # 2. Volume Manager
             self.volume_manager = VolumeManager(self.websocket_manager)
             await self.volume_manager.initialize()
             logger.info("Volume Manager initialized")
 
             # 3. Rotary Controller
-            self.rotary_controller = RotaryVolumeController(self.volume_manager)
+            acceleration = RotaryAcceleration(
+                config.ROTARY_CURVE, config.ROTARY_DEAD_BAND, config.ROTARY_FAST,
+                config.ROTARY_MAX_GAIN, config.ROTARY_BASE_STEP
+            )
+            self.rotary_controller = RotaryVolumeController(
+                self.volume_manager, acceleration=acceleration, debounce=config.ROTARY_DEBOUNCE
+            )
             await self.rotary_controller.initialize()
             logger.info("Rotary Controller initialized")
 
             # 4. Audio Manager (dépend de WebSocket)
-            self.audio_manager = AudioManager(self.websocket_manager)
+            self.audio_manager = AudioManager(self.websocket_manager, restored_source, self.volume_manager)
             await self.audio_manager.initialize()
             logger.info("Audio Manager initialized")
 
+            # Mesure de niveau de la sortie (optionnelle) : activité réelle et veille sur silence
+            if config.METER_DEVICE:
+                try:
+                    capture = hardware.create_capture(config.METER_DEVICE)
+                    self.level_meter = LevelMeter(
+                        self.websocket_manager, capture, config.METER_RATE, config.METER_SILENCE_DB
+                    )
+                    if self.level_meter.start():
+                        self.audio_manager.attach_meter(self.level_meter, config.METER_STANDBY_MINUTES * 60)
+                        logger.info(f"Level meter started on {config.METER_DEVICE}")
+                    else:
+                        self.level_meter = None
+                except Exception as e:
+                    logger.error(f"Level meter unavailable: {e}")
+                    self.level_meter = None
+
             # 5. Services de lecture (dépendent de Audio Manager)
-            self.bluetooth_manager = BluetoothManager(self.websocket_manager, self.audio_manager)
+            self.bluetooth_manager = BluetoothManager(
+                self.websocket_manager, self.audio_manager, active_device=restored_device
+            )
             logger.info("Bluetooth Manager initialized")
 
             self.snapcast_manager = SnapcastManager(self.websocket_manager, self.audio_manager)
@@ -127,6 +174,56 @@ class ServiceManager:
             self.spotify_player = SpotifyPlayerManager(self.websocket_manager, self.spotify_manager)
             logger.info("Spotify Player Manager initialized")
 
+            # Mise en veille de l'écran (avant le registre, qui route /ws/display)
+            if config.DISPLAY_TIMEOUT > 0:
+                touch = None
+                if config.DISPLAY_TOUCH_DEVICE:
+                    try:
+                        touch = hardware.create_touch(config.DISPLAY_TOUCH_DEVICE)
+                    except Exception as e:
+                        logger.error(f"Touch input unavailable: {e}")
+                self.display_manager = DisplayManager(
+                    self.websocket_manager, hardware.create_backlight(config.DISPLAY_BACKLIGHT_COMMAND), touch,
+                    config.DISPLAY_TIMEOUT, config.DISPLAY_ON_LEVEL, config.DISPLAY_OFF_LEVEL
+                )
+                await self.display_manager.start()
+                self.rotary_controller.on_activity = self.display_manager.activity
+
+            # Table de routage des messages WebSocket
+            self.registry = build_registry(self)
+
+            # Gestes du bouton de l'encodeur, routés comme des messages du frontend
+            self.rotary_controller.configure_gestures(
+                parse_action_table(config.ROTARY_GESTURES), self.run_gesture_action,
+                config.ROTARY_LONG_PRESS, config.ROTARY_DOUBLE_PRESS
+            )
+
+            # Routes REST
+            init_routes(self.bluetooth_manager)
+            init_snapcast_routes(self.snapcast_manager)
+            init_spotify_routes(self.spotify_manager)
+            init_state_routes(self.websocket_manager)
+
+            # Pont MQTT pour la domotique (optionnel)
+            if config.MQTT_HOST:
+                self.mqtt_bridge = MqttBridge(
+                    self.websocket_manager, self.dispatch_message,
+                    config.MQTT_HOST, config.MQTT_PORT, config.MQTT_PREFIX,
+                    config.MQTT_USERNAME, config.MQTT_PASSWORD
+                )
+                if self.mqtt_bridge.start():
+                    logger.info("MQTT bridge started")
+
+            # Politique de veille (optionnelle) : après les managers, dont elle lit l'état
+            if config.POWER_POLICY:
+                self.idle_policy = IdlePolicy(
+                    self.websocket_manager, hardware.create_service_control(),
+                    configured_targets(), config.POWER_CHECK_INTERVAL
+                )
+                self.idle_policy.start()
+                # Point d'entrée unique des commandes : les lectures d'état ne réveillent rien
+                self.registry.before_command = self.idle_policy.wake
+
             # 6. Event handlers
             self.bluetooth_events = BluetoothEventHandler(self.bluetooth_manager)
             self.bluetooth_events.setup_signal_handlers()
@@ -144,8 +241,8 @@ class ServiceManager:
     async def start_services(self):
         """Démarre les services dans l'ordre approprié"""
         try:
-            # Démarrage de Snapcast
-            await self.snapcast_manager.get_clients_status()
+            # Démarrage de Snapcast (superviseur de connexion en arrière-plan)
+            await self.snapcast_manager.start()
             logger.info("Snapcast service started")
 
             # Démarrage de Spotify
@@ -156,6 +253,10 @@ class ServiceManager:
             # Démarrage du Bluetooth
             # Le service Bluetooth est déjà actif via les event handlers
 
+            # Rejeu d'un journal enregistré (reproduction d'un incident, corpus de performance)
+            if config.JOURNAL_REPLAY:
+                self.replay_task = asyncio.create_task(self.replay_journal(config.JOURNAL_REPLAY))
+
             self.update_services_status()
             logger.info("All services started successfully")
 
@@ -163,12 +264,41 @@ class ServiceManager:
             logger.error(f"Error starting services: {e}", exc_info=True)
             raise
 
+    async def dispatch_message(self, service: str, data: dict):
+        """Valide puis route un message (WebSocket, geste, MQTT, rejeu) vers le manager du service"""
+        await self.registry.dispatch(service, data)
+
+    async def run_gesture_action(self, action: str):
+        service, message = GESTURE_ACTIONS[action](self)
+        await self.dispatch_message(service, message)
+
+    async def replay_journal(self, path: str):
+        """Rejoue un journal d'événements dans les managers"""
+        async def replay_dbus(event):
+            self.bluetooth_manager._properties_changed(event["interface"], event["changed"], [], path=event["path"])
+
+        handlers = {
+            "websocket": lambda event: self.dispatch_message(event["service"], event["message"]),
+            # Connexion, morceau et état de lecture, comme après un /status réel
+            "librespot": self.spotify_player.apply_status,
+            "snapserver": lambda event: self.snapcast_manager._on_notification(event["method"], event["params"]),
+            "dbus": replay_dbus,
+            "gpio": self.rotary_controller.replay_event
+        }
+        try:
+            logger.info(f"Replaying event journal {path} (speed={config.JOURNAL_REPLAY_SPEED})")
+            result = await journal.replay(read_journal(path), handlers, speed=config.JOURNAL_REPLAY_SPEED)
+            logger.info(f"Journal replay complete: {result}")
+        except Exception as e:
+            logger.error(f"Journal replay failed: {e}", exc_info=True)
+
     def update_services_status(self):
         """Met à jour le statut de tous les services"""
         self.services_status = {
             "bluetooth": {
                 "active": self.bluetooth_manager is not None,
-                "initialized": getattr(self.bluetooth_manager, 'initialized', False)
+                "initialized": getattr(self.bluetooth_manager, 'initialized', False),
+                **(self.bluetooth_manager.get_stats() if self.bluetooth_manager else {})
             },
             "snapcast": {
                 "active": self.snapcast_manager is not None,
@@ -180,14 +310,48 @@ class ServiceManager:
             },
             "volume": {
                 "active": self.volume_manager is not None,
-                "initialized": getattr(self.volume_manager, 'mixer', None) is not None
+                "initialized": getattr(self.volume_manager, 'mixer', None) is not None,
+                "curve": self.volume_manager.table.describe() if getattr(self.volume_manager, 'table', None) else None
+            },
+            "mqtt": {
+                "active": self.mqtt_bridge is not None,
+                "connected": getattr(self.mqtt_bridge, 'connected', False)
+            },
+            "meter": self.level_meter.get_stats() if self.level_meter else {"running": False},
+            "power": self.idle_policy.get_stats() if self.idle_policy else {"active": False},
+            "display": self.display_manager.get_stats() if self.display_manager else {"active": False},
+            "persistent_state": {
+                "active": self.persistent_state is not None,
+                **(self.persistent_state.get_stats() if self.persistent_state else {})
             }
         }
 
+    async def stop_services(self):
+        """Arrête les tâches de fond des services"""
+        if self.replay_task:
+            self.replay_task.cancel()
+        if self.local_channel:
+            await self.local_channel.stop()
+        if self.level_meter:
+            await self.level_meter.stop()
+        for manager in (self.display_manager, self.idle_policy, self.mqtt_bridge, self.snapcast_manager, self.spotify_manager,
+                        self.volume_manager, self.bluetooth_manager):
+            if manager:
+                try:
+                    await manager.cleanup()
+                except Exception as e:
+                    logger.error(f"Error stopping {type(manager).__name__}: {e}")
+        if self.persistent_state:
+            await self.persistent_state.close()
+
     def cleanup(self):
         """Nettoie les ressources des services"""
         if self.rotary_controller:
             self.rotary_controller.cleanup()
+
+        if self.loop_monitor:
+            # La tâche asyncio meurt avec la boucle, seul le thread doit être arrêté
+            self.loop_monitor.stop_sampler()
         
         # Autres nettoyages si nécessaire
         logger.info("Services cleanup completed")
@@ -212,7 +376,11 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         logger.info("Shutting down application...")
+        await service_manager.stop_services()
         service_manager.cleanup()
+        journal.close()
+        # Vide la file de logs avant l'arrêt du processus
+        log_pipeline.stop()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -226,9 +394,20 @@ app.add_middleware(
 )
 
 # Routes API
-app.include_router(bluetooth_router, prefix="/api/bluetooth", tags=["bluetooth"])
-app.include_router(snapcast_router, prefix="/api/snapcast", tags=["snapcast"])
-app.include_router(spotify_router, prefix="/api/spotify", tags=["spotify"])
+def wake_for(service: str):
+    """Commandes REST (hors GET) : même réveil des services en veille que les messages du registre"""
+    async def dependency(request: Request):
+        if request.method != "GET" and service_manager.registry:
+            await service_manager.registry.wake(service)
+    return [Depends(dependency)]
+
+
+app.include_router(bluetooth_router, prefix="/api/bluetooth", tags=["bluetooth"], dependencies=wake_for("bluetooth"))
+app.include_router(snapcast_router, prefix="/api/snapcast", tags=["snapcast"], dependencies=wake_for("snapcast"))
+app.include_router(spotify_router, prefix="/api/spotify", tags=["spotify"], dependencies=wake_for("spotify"))
+app.include_router(state_router, prefix="/api/state", tags=["state"])
+app.include_router(hardware_router, prefix="/api/hardware", tags=["hardware"])
+app.include_router(monitoring_router, tags=["monitoring"])
 
 @app.websocket("/ws/{service}")
 async def websocket_endpoint(websocket: WebSocket, service: str):
@@ -241,40 +420,47 @@ async def websocket_endpoint(websocket: WebSocket, service: str):
 
     logger.info(f"WebSocket connected for service: {service} (client_id: {client_id})")
 
+    async def handle(service: str, data: dict):
+        with WS_HANDLER_SECONDS.labels(service).time():
+            # Déjà validé à la réception
+            await service_manager.registry.invoke(service, data)
+
+    async def report_error(data: dict, error: str):
+        try:
+            await service_manager.websocket_manager.send(websocket, {
+                "type": "error",
+                "error": error,
+                "service": service,
+                "request_type": data.get("type")
+            }, service)
+        except Exception:
+            pass
+
+    # La boucle de réception ne fait que mettre en file : un traitement lent
+    # (get_status, changement de source) ne bloque plus les messages suivants
+    dispatcher = ConnectionDispatcher(
+        service, handle, report_error,
+        max_workers=config.WS_MAX_WORKERS,
+        max_queue=config.WS_MAX_QUEUE,
+        default_deadline=config.WS_HANDLER_DEADLINE
+    )
+
     try:
         while True:
             try:
-                data = await websocket.receive_json()
+                data = await service_manager.websocket_manager.receive(websocket)
                 
                 if data.get("type") == "pong":
                     continue
 
+                WS_MESSAGES_RECEIVED.labels(service).inc()
+                journal.record("websocket", {"service": service, "message": data})
                 try:
-                    async with asyncio.timeout(5.0):
-                        if service == "audio":
-                            await service_manager.audio_manager.handle_message(data)
-                        elif service == "volume":
-                            await service_manager.volume_manager.handle_message(data)
-                        elif service == "bluetooth":
-                            await service_manager.bluetooth_manager.handle_message(data)
-                        elif service == "snapcast":
-                            await service_manager.snapcast_manager.handle_message(data)
-                        elif service == "spotify":
-                            message_type = data.get("type")
-                            if message_type in ["play_pause", "next_track", "previous_track", "get_status"]:
-                                await service_manager.spotify_player.handle_message(data)
-                            else:
-                                await service_manager.spotify_manager.handle_message(data)
-                        else:
-                            logger.warning(f"Unknown service: {service}")
-                            
-                except asyncio.TimeoutError:
-                    logger.error(f"Timeout processing message for {service}")
-                    await websocket.send_json({
-                        "type": "error",
-                        "error": "Request timeout",
-                        "service": service
-                    })
+                    service_manager.registry.validate(service, data)
+                except MessageValidationError as e:
+                    await report_error(data, str(e))
+                    continue
+                dispatcher.submit(data)
 
             except WebSocketDisconnect:
                 logger.info(f"WebSocket disconnected normally for {service} (client_id: {client_id})")
@@ -282,11 +468,11 @@ async def websocket_endpoint(websocket: WebSocket, service: str):
             except Exception as e:
                 logger.error(f"Error handling {service} message: {e}", exc_info=True)
                 try:
-                    await websocket.send_json({
+                    await service_manager.websocket_manager.send(websocket, {
                         "type": "error",
                         "error": str(e),
                         "service": service
-                    })
+                    }, service)
                 except:
                     break
 
@@ -297,21 +483,30 @@ async def websocket_endpoint(websocket: WebSocket, service: str):
     finally:
         try:
             logger.info(f"Cleaning up WebSocket for service: {service} (client_id: {client_id})")
+            await dispatcher.close()
             service_manager.websocket_manager.disconnect(websocket, service)
         except Exception as cleanup_error:
             logger.error(f"Error during WebSocket cleanup: {cleanup_error}")
 
 @app.get("/health")
-async def health_check() -> Dict[str, Any]:
-    """Endpoint de vérification de santé détaillé"""
+async def health_check(request: Request):
+    """Endpoint de vérification de santé détaillé (ETag sur le contenu, 304 si inchangé)"""
     service_manager.update_services_status()
-    return {
+    return cached_json(request, {
         "status": "healthy",
+        "hardware": config.HARDWARE_BACKEND,
         "services": service_manager.services_status,
         "audio": {
             "current_source": service_manager.audio_manager.current_source.value if service_manager.audio_manager else None
         }
-    }
+    })
+
+@app.get("/api/protocol")
+async def protocol_description(request: Request, stats: bool = False):
+    """Description des messages WebSocket (champs, file de traitement) ; ?stats=true pour les compteurs"""
+    if stats:
+        return {"messages": service_manager.registry.get_stats()}
+    return cached_json(request, service_manager.registry.describe(policy_for), max_age=60)
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,250 @@
+# backend/monitoring/journal.py
+"""
+Journal binaire des événements entrants (WebSocket, go-librespot, snapserver, D-Bus, GPIO).
+
+Fichier circulaire de taille fixe projeté en mémoire : un en-tête (positions de tête
+et de queue, nombre d'enregistrements vivants) suivi d'enregistrements encadrés
+[longueur, séquence, horodatage monotonic, source, crc32] + charge utile JSON compacte.
+Quand la zone est pleine, les plus anciens enregistrements sont écrasés.
+
+Le rejeu relit les enregistrements dans l'ordre et les injecte dans les managers
+en respectant les écarts de temps (divisés par `speed` ; 0 = sans attente).
+
+Usage (depuis backend/) :
+    python -m monitoring.journal dump logs/events.journal
+"""
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from time import monotonic
+from typing import Awaitable, Callable, Dict, Iterator, NamedTuple, Optional
+
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SNJ1"
+VERSION = 1
+# magic, version, flags, capacité, tête, queue, vivants, séquence, heure murale d'ouverture
+HEADER = struct.Struct("<4sHHQQQQQd")
+DATA_OFFSET = 64
+# longueur de la charge, séquence, horodatage monotonic, source, crc32 de la charge
+RECORD = struct.Struct("<IQdBI")
+WRAP_MARKER = 0xFFFFFFFF
+LENGTH = struct.Struct("<I")
+
+SOURCES = {"websocket": 1, "librespot": 2, "snapserver": 3, "dbus": 4, "gpio": 5}
+SOURCE_NAMES = {value: name for name, value in SOURCES.items()}
+
+JOURNAL_RECORDS = metrics.counter(
+    "sonoak_journal_records_total", "Événements enregistrés dans le journal", ["source"]
+)
+JOURNAL_DROPPED = metrics.counter(
+    "sonoak_journal_dropped_total", "Événements non journalisés (trop gros ou non sérialisables)"
+)
+
+
+class JournalRecord(NamedTuple):
+    seq: int
+    t: float
+    source: str
+    payload: Dict
+
+
+def _iter_records(buf, capacity: int, tail: int, live: int) -> Iterator[JournalRecord]:
+    """Parcourt les `live` enregistrements à partir de la queue, en suivant les retours au début"""
+    pos = tail
+    for _ in range(live):
+        if pos + LENGTH.size > capacity or LENGTH.unpack_from(buf, DATA_OFFSET + pos)[0] == WRAP_MARKER:
+            pos = 0
+        length, seq, t, source, crc = RECORD.unpack_from(buf, DATA_OFFSET + pos)
+        start = DATA_OFFSET + pos + RECORD.size
+        payload = bytes(buf[start:start + length])
+        if zlib.crc32(payload) != crc:
+            logger.warning(f"Enregistrement {seq} corrompu, arrêt de la lecture")
+            return
+        yield JournalRecord(seq, t, SOURCE_NAMES.get(source, str(source)), json.loads(payload))
+        pos += RECORD.size + length
+
+
+def read_journal(path: str) -> Iterator[JournalRecord]:
+    """Lit un fichier journal (copie hors ligne ou journal en cours d'écriture)"""
+    with open(path, "rb") as f:
+        buf = f.read()
+    magic, version, _, capacity, head, tail, live, _, _ = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} n'est pas un journal Sonoak v{VERSION}")
+    yield from _iter_records(buf, capacity, tail, live)
+
+
+class EventJournal:
+    """Journal circulaire en append-only ; record() est un no-op tant qu'il n'est pas ouvert"""
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self.enabled = False
+        self.replaying = False
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self.capacity = 0
+        self.head = 0
+        self.tail = 0
+        self.live = 0
+        self.seq = 0
+        self.opened_at = 0.0
+        self._records = {name: JOURNAL_RECORDS.labels(name) for name in SOURCES}
+
+    def open(self, path: str, size: int = 8 * 1024 * 1024):
+        """Ouvre (ou crée) le journal ; un fichier existant de même taille est repris"""
+        size = max(size, DATA_OFFSET + 4096)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        resume = os.path.exists(path) and os.path.getsize(path) == size
+        self._file = open(path, "r+b" if resume else "w+b")
+        if not resume:
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self.path = path
+        self.capacity = size - DATA_OFFSET
+
+        magic, version, _, capacity, head, tail, live, seq, opened_at = HEADER.unpack_from(self._map, 0)
+        if resume and magic == MAGIC and version == VERSION and capacity == self.capacity:
+            self.head, self.tail, self.live, self.seq, self.opened_at = head, tail, live, seq, opened_at
+        else:
+            self.head = self.tail = self.live = self.seq = 0
+            self.opened_at = time.time()
+            self._write_header()
+        self.enabled = True
+        logger.info(f"Journal d'événements ouvert: {path} ({size // 1024} Kio, {self.live} enregistrements)")
+
+    def _write_header(self):
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, 0, self.capacity,
+                         self.head, self.tail, self.live, self.seq, self.opened_at)
+
+    def _next_position(self, pos: int) -> int:
+        if pos + LENGTH.size > self.capacity or LENGTH.unpack_from(self._map, DATA_OFFSET + pos)[0] == WRAP_MARKER:
+            pos = 0
+        length = LENGTH.unpack_from(self._map, DATA_OFFSET + pos)[0]
+        return pos + RECORD.size + length
+
+    def _evict_until(self, end: int):
+        """Libère les enregistrements les plus anciens qui commencent dans [tête, end)"""
+        while self.live and self.head <= self.tail < end:
+            self.tail = self._next_position(self.tail)
+            self.live -= 1
+            if self.tail + LENGTH.size > self.capacity or \
+                    LENGTH.unpack_from(self._map, DATA_OFFSET + self.tail)[0] == WRAP_MARKER:
+                self.tail = 0
+        if not self.live:
+            self.tail = self.head
+
+    def record(self, source: str, payload: Dict):
+        """Ajoute un événement entrant (à appeler depuis la boucle asyncio)"""
+        if not self.enabled or self.replaying:
+            return
+        try:
+            data = json.dumps(payload, separators=(",", ":"), default=str).encode()
+        except (TypeError, ValueError):
+            JOURNAL_DROPPED.inc()
+            return
+        size = RECORD.size + len(data)
+        if size > self.capacity:
+            JOURNAL_DROPPED.inc()
+            return
+
+        if self.head + size > self.capacity:
+            self._evict_until(self.capacity)
+            if self.capacity - self.head >= LENGTH.size:
+                LENGTH.pack_into(self._map, DATA_OFFSET + self.head, WRAP_MARKER)
+            self.head = 0
+            if not self.live:
+                self.tail = 0
+        self._evict_until(self.head + size)
+
+        self.seq += 1
+        offset = DATA_OFFSET + self.head
+        RECORD.pack_into(self._map, offset, len(data), self.seq, monotonic(), SOURCES[source], zlib.crc32(data))
+        self._map[offset + RECORD.size:offset + size] = data
+        self.head += size
+        self.live += 1
+        self._write_header()
+        self._records[source].inc()
+
+    def records(self) -> Iterator[JournalRecord]:
+        if not self._map:
+            return iter(())
+        return _iter_records(self._map, self.capacity, self.tail, self.live)
+
+    async def replay(self, records, handlers: Dict[str, Callable[[Dict], Awaitable]],
+                     speed: float = 1.0, max_gap: float = 5.0) -> Dict:
+        """
+        Injecte les enregistrements dans les handlers (un par source), un par un et dans
+        l'ordre. Les silences sont plafonnés à max_gap (journal repris après un redémarrage,
+        horloge monotonic différente). Les événements rejoués ne sont pas journalisés à nouveau.
+        """
+        replayed = {name: 0 for name in SOURCES}
+        skipped = 0
+        previous_t = None
+        elapsed = 0.0
+        start = monotonic()
+        self.replaying = True
+        try:
+            for record in records:
+                if previous_t is not None:
+                    elapsed += min(max(0.0, record.t - previous_t), max_gap)
+                previous_t = record.t
+                if speed > 0:
+                    delay = start + elapsed / speed - monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                handler = handlers.get(record.source)
+                if handler is None:
+                    skipped += 1
+                    continue
+                try:
+                    await handler(record.payload)
+                    replayed[record.source] += 1
+                except Exception as e:
+                    logger.error(f"Rejeu de l'enregistrement {record.seq} ({record.source}) en échec: {e}")
+        finally:
+            self.replaying = False
+        return {"replayed": replayed, "skipped": skipped, "duration": round(monotonic() - start, 3)}
+
+    def get_stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "capacity": self.capacity,
+            "used": ((self.head - self.tail) % self.capacity or self.capacity) if self.live else 0,
+            "records": self.live,
+            "last_seq": self.seq,
+            "replaying": self.replaying
+        }
+
+    def close(self):
+        if self._map:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+            self._map = None
+        self.enabled = False
+
+
+journal = EventJournal()
+
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[1] != "dump":
+        print("Usage: python -m monitoring.journal dump <fichier>")
+        sys.exit(2)
+    for record in read_journal(sys.argv[2]):
+        print(json.dumps(record._asdict(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
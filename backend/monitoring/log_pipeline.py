@@ -0,0 +1,182 @@
+# backend/monitoring/log_pipeline.py
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import traceback
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Dict, Optional, Tuple
+
+# Sous-systèmes réglables à chaud -> nom du logger racine correspondant
+SUBSYSTEMS: Dict[str, str] = {
+    "main": "main",
+    "audio": "services.audio",
+    "volume": "services.volume",
+    "bluetooth": "services.bluetooth",
+    "snapcast": "services.snapcast",
+    "spotify": "services.spotify",
+    "mqtt": "services.mqtt",
+    "power": "services.power",
+    "display": "services.display",
+    "metering": "services.metering",
+    "navigation": "services.navigation",
+    "hardware": "hardware",
+    "websocket": "websocket",
+    "monitoring": "monitoring",
+}
+
+# Attributs standards d'un LogRecord : tout le reste vient de `extra=`
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "suppressed"}
+
+CONSOLE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """Un enregistrement JSON par ligne, avec les champs passés via `extra=`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS:
+                entry[key] = value
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limite les messages identiques répétés.
+
+    Dans une fenêtre de `window` secondes, les `burst` premières occurrences d'un même
+    message passent, puis une sur `sample_every`. Le nombre de messages supprimés est
+    ajouté (`suppressed`) au prochain message émis pour cette clé.
+    """
+
+    def __init__(self, window: float = 10.0, burst: int = 5, sample_every: int = 50,
+                 max_keys: int = 1024):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.sample_every = sample_every
+        self.max_keys = max_keys
+        # clé -> [début de fenêtre, occurrences, supprimés]
+        self._seen: Dict[Tuple, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR and record.exc_info:
+            return True  # Les exceptions sont toujours conservées
+        key = (record.name, record.levelno, record.msg, record.args if isinstance(record.args, tuple) else None)
+        try:
+            hash(key)
+        except TypeError:
+            key = (record.name, record.levelno, str(record.msg))
+
+        now = monotonic()
+        state = self._seen.get(key)
+        if state is None or now - state[0] > self.window:
+            suppressed = state[2] if state else 0
+            if len(self._seen) >= self.max_keys:
+                self._seen.clear()
+            self._seen[key] = [now, 1, 0]
+            record.suppressed = suppressed
+            return True
+
+        state[1] += 1
+        if state[1] <= self.burst or (state[1] - self.burst) % self.sample_every == 0:
+            record.suppressed, state[2] = state[2], 0
+            return True
+        state[2] += 1
+        return False
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Met l'enregistrement en file sans le formater dans le thread appelant.
+
+    Seuls le message et la trace d'exception sont figés (les args peuvent être
+    modifiés ensuite) ; le formatage JSON se fait dans le thread du listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+
+class LogPipeline:
+    """Handlers QueueHandler -> QueueListener : les écritures disque ne bloquent jamais la boucle"""
+
+    def __init__(self):
+        self.queue: Optional[queue.Queue] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.rate_limiter: Optional[RateLimitFilter] = None
+
+    def setup(self, log_directory: str, level: int = logging.INFO,
+              subsystem_levels: Optional[Dict[str, str]] = None):
+        os.makedirs(log_directory, exist_ok=True)
+        self.queue = queue.Queue(-1)
+
+        file_handler = logging.handlers.RotatingFileHandler(
+            os.path.join(log_directory, 'backend.log'),
+            maxBytes=1024 * 1024,
+            backupCount=5
+        )
+        file_handler.setFormatter(JsonFormatter())
+
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+        self.rate_limiter = RateLimitFilter()
+        queue_handler = StructuredQueueHandler(self.queue)
+        queue_handler.addFilter(self.rate_limiter)
+
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        for subsystem, subsystem_level in (subsystem_levels or {}).items():
+            self.set_level(subsystem, subsystem_level)
+
+        self.listener = logging.handlers.QueueListener(
+            self.queue, file_handler, console_handler, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def set_level(self, subsystem: str, level: str) -> str:
+        """Change la verbosité d'un sous-système ; retourne le niveau appliqué"""
+        if subsystem not in SUBSYSTEMS:
+            raise KeyError(subsystem)
+        level_name = str(level).upper()
+        if not isinstance(logging.getLevelName(level_name), int):
+            raise ValueError(f"Unknown log level: {level}")
+        logging.getLogger(SUBSYSTEMS[subsystem]).setLevel(level_name)
+        return level_name
+
+    def get_levels(self) -> Dict[str, str]:
+        return {
+            subsystem: logging.getLevelName(logging.getLogger(name).getEffectiveLevel())
+            for subsystem, name in SUBSYSTEMS.items()
+        }
+
+    def stop(self):
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+
+
+log_pipeline = LogPipeline()
@@ -0,0 +1,183 @@
+# backend/monitoring/loop_monitor.py
+import asyncio
+import logging
+import os
+import sys
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from time import monotonic
+from typing import Dict, List, Optional
+
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = metrics.histogram(
+    "sonoak_event_loop_lag_seconds",
+    "Retard de réveil de la boucle asyncio par rapport à l'intervalle prévu",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+LOOP_LAG_LAST = metrics.gauge(
+    "sonoak_event_loop_lag_last_seconds",
+    "Dernier retard mesuré de la boucle asyncio"
+)
+LOOP_STALLS = metrics.counter(
+    "sonoak_event_loop_stalls_total",
+    "Blocages de la boucle asyncio au-delà du seuil"
+)
+
+# Les frames de ce dossier désignent le code du backend (le coupable probable)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopLagMonitor:
+    """
+    Mesure en continu le retard de la boucle asyncio (sleep programmé vs réveil réel).
+
+    Un thread d'échantillonnage surveille le battement de la boucle : quand celle-ci
+    ne bat plus depuis plus de `threshold`, il capture la pile du thread de la boucle,
+    c'est-à-dire du callback bloquant. Les blocages sont conservés dans un tampon
+    circulaire (les plus récents) et dans le classement des pires, lisibles sur /debug/loop.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1,
+                 sample_interval: float = 0.02, history_size: int = 50, worst_size: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.worst_size = worst_size
+        self.task: Optional[asyncio.Task] = None
+
+        self.recent: deque = deque(maxlen=history_size)
+        self.worst: List[Dict] = []
+        self.stall_count = 0
+        self.max_lag = 0.0
+
+        self._last_beat = monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._captured_stack: Optional[List[str]] = None
+        self._captured_culprit: Optional[str] = None
+
+    def start(self):
+        if self.task is None:
+            self._loop_thread_id = threading.get_ident()
+            self._last_beat = monotonic()
+            self.task = asyncio.create_task(self._run())
+            self._stop_event.clear()
+            self._sampler = threading.Thread(
+                target=self._sample_loop, name="loop-lag-sampler", daemon=True
+            )
+            self._sampler.start()
+            logger.info(f"Event loop lag monitor started (interval={self.interval}s, threshold={self.threshold}s)")
+
+    async def _run(self):
+        while True:
+            expected = monotonic() + self.interval
+            self._last_beat = monotonic()
+            await asyncio.sleep(self.interval)
+            now = monotonic()
+            self._last_beat = now
+            lag = max(0.0, now - expected)
+            LOOP_LAG.observe(lag)
+            LOOP_LAG_LAST.set(lag)
+            if lag >= self.threshold:
+                self._record_stall(lag)
+            elif self._captured_stack is not None:
+                with self._lock:
+                    self._captured_stack = self._captured_culprit = None
+
+    def _sample_loop(self):
+        """Thread : capture la pile de la boucle pendant qu'elle est bloquée"""
+        while not self._stop_event.wait(self.sample_interval):
+            stalled_for = monotonic() - self._last_beat - self.interval
+            if stalled_for < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            with self._lock:
+                # On garde l'échantillon le plus tardif : il montre l'appel encore bloquant
+                self._captured_stack = traceback.format_list(stack)
+                self._captured_culprit = self._find_culprit(stack)
+
+    @staticmethod
+    def _find_culprit(stack: traceback.StackSummary) -> Optional[str]:
+        """Frame la plus profonde appartenant au backend (hors bibliothèques)"""
+        for frame in reversed(stack):
+            if frame.filename.startswith(BACKEND_DIR) and "site-packages" not in frame.filename \
+                    and frame.filename != __file__:
+                return f"{os.path.relpath(frame.filename, BACKEND_DIR)}:{frame.lineno} in {frame.name}"
+        return None
+
+    def _record_stall(self, lag: float):
+        with self._lock:
+            stack, culprit = self._captured_stack, self._captured_culprit
+            self._captured_stack = self._captured_culprit = None
+
+        self.stall_count += 1
+        self.max_lag = max(self.max_lag, lag)
+        LOOP_STALLS.inc()
+
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "lag": round(lag, 4),
+            "culprit": culprit,
+            "stack": stack
+        }
+        self.recent.append(record)
+        if len(self.worst) < self.worst_size or lag > self.worst[-1]["lag"]:
+            self.worst.append(record)
+            self.worst.sort(key=lambda r: r["lag"], reverse=True)
+            del self.worst[self.worst_size:]
+
+        logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms (culprit: {culprit or 'unknown'})")
+
+    def get_report(self, include_stacks: bool = True) -> Dict:
+        """Résumé exposé sur l'endpoint de debug"""
+        def strip(records):
+            if include_stacks:
+                return list(records)
+            return [{k: v for k, v in r.items() if k != "stack"} for r in records]
+
+        offenders: Dict[str, Dict] = {}
+        for record in self.recent:
+            key = record["culprit"] or "unknown"
+            entry = offenders.setdefault(key, {"culprit": key, "count": 0, "max_lag": 0.0})
+            entry["count"] += 1
+            entry["max_lag"] = max(entry["max_lag"], record["lag"])
+
+        return {
+            "threshold": self.threshold,
+            "interval": self.interval,
+            "stall_count": self.stall_count,
+            "max_lag": round(self.max_lag, 4),
+            "offenders": sorted(offenders.values(), key=lambda e: e["max_lag"], reverse=True),
+            "worst": strip(self.worst),
+            "recent": strip(reversed(self.recent))
+        }
+
+    def reset(self):
+        self.recent.clear()
+        self.worst.clear()
+        self.stall_count = 0
+        self.max_lag = 0.0
+
+    def stop_sampler(self):
+        """Arrête le thread d'échantillonnage (utilisable hors de la boucle)"""
+        self._stop_event.set()
+
+    async def stop(self):
+        self.stop_sampler()
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
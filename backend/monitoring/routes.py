@@ -0,0 +1,68 @@
+# backend/monitoring/routes.py
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Dict, Any
+
+from monitoring.metrics import REGISTRY
+from monitoring.log_pipeline import log_pipeline
+from monitoring.journal import journal
+
+router = APIRouter()
+
+# Référence au moniteur de boucle (sera initialisé dans main.py)
+loop_monitor = None
+
+def init_routes(monitor):
+    global loop_monitor
+    loop_monitor = monitor
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose toutes les métriques au format texte Prometheus"""
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@router.get("/debug/loop")
+async def get_loop_report(stacks: bool = True) -> Dict[str, Any]:
+    """Blocages de la boucle asyncio : pires cas, plus récents et coupables agrégés"""
+    if not loop_monitor:
+        raise HTTPException(status_code=500, detail="Loop monitor not initialized")
+
+    return loop_monitor.get_report(include_stacks=stacks)
+
+@router.delete("/debug/loop")
+async def reset_loop_report():
+    """Réinitialise l'historique des blocages"""
+    if not loop_monitor:
+        raise HTTPException(status_code=500, detail="Loop monitor not initialized")
+
+    loop_monitor.reset()
+    return {"success": True}
+
+@router.get("/debug/logging")
+async def get_log_levels() -> Dict[str, Any]:
+    """Niveaux de log effectifs par sous-système"""
+    return {"levels": log_pipeline.get_levels()}
+
+@router.put("/debug/logging/{subsystem}")
+async def set_log_level(subsystem: str, level: str):
+    """Change la verbosité d'un sous-système sans redémarrer le backend"""
+    try:
+        applied = log_pipeline.set_level(subsystem, level)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown subsystem: {subsystem}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"subsystem": subsystem, "level": applied}
+
+@router.get("/debug/journal")
+async def get_journal(limit: int = 50) -> Dict[str, Any]:
+    """État du journal d'événements et derniers enregistrements"""
+    events = list(journal.records())[-limit:] if limit > 0 else []
+    return {
+        **journal.get_stats(),
+        "events": [record._asdict() for record in events]
+    }
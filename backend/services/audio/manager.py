@@ -3,10 +3,21 @@ import asyncio
 import logging
 from enum import Enum
 from pathlib import Path
+from time import perf_counter
 from typing import Optional
 
+from monitoring import metrics
+
 logger = logging.getLogger(__name__)
 
+SOURCE_SWITCH_SECONDS = metrics.histogram(
+    "sonoak_source_switch_seconds", "Durée d'un changement de source audio", ["source", "result"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+)
+CURRENT_SOURCE = metrics.gauge(
+    "sonoak_audio_source_active", "Source audio active (1) ou non (0)", ["source"]
+)
+
 class AudioSource(Enum):
     NONE = "none"
     SPOTIFY = "spotify"
@@ -14,11 +25,23 @@ class AudioSource(Enum):
     MACOS = "macos"
 
 class AudioManager:
-    def __init__(self, websocket_manager):
+    def __init__(self, websocket_manager, initial_source: AudioSource = AudioSource.NONE, volume_manager=None):
         self.websocket_manager = websocket_manager
-        self.current_source: AudioSource = AudioSource.NONE
+        # Fondus autour des scripts de changement de source (optionnel)
+        self.volume_manager = volume_manager
+        # Source restaurée de l'état persistant : affichée tout de suite, mais son script n'a
+        # pas tourné depuis le redémarrage (systemctl start/stop ne survit pas au reboot).
+        # Elle est réappliquée en arrière-plan et reste sélectionnable tant que ce n'est pas fait
+        self.current_source: AudioSource = initial_source
+        self.restored_pending = initial_source != AudioSource.NONE
+        self._restore_task: Optional[asyncio.Task] = None
+        CURRENT_SOURCE.labels(initial_source.value).set(1)
         self.scripts_dir = Path("~/sonoak/scripts").expanduser()
         self.is_switching = False
+        # Veille après un long silence de la sortie (alimentée par la mesure de niveau)
+        self.standby = False
+        self.standby_after = 0.0
+        self._standby_timer: Optional[asyncio.TimerHandle] = None
         
         # Mapping des sources vers leurs scripts
         self.source_scripts = {
@@ -31,8 +54,44 @@ class AudioManager:
         """Initialise l'état initial de l'AudioManager"""
         logger.info("Initializing AudioManager")
         await self._notify_state_change()
+        if self.restored_pending:
+            self._restore_task = asyncio.create_task(self._reapply_restored())
         logger.info("AudioManager initialized successfully")
 
+    async def _reapply_restored(self):
+        source = self.current_source
+        logger.info(f"Réapplication de la source restaurée {source.value}")
+        try:
+            if not await self.switch_source(source):
+                logger.warning(f"Source restaurée {source.value} non réappliquée : à resélectionner")
+        except Exception as e:
+            logger.error(f"Error reapplying restored source {source.value}: {e}")
+        finally:
+            self._restore_task = None
+
+    def attach_meter(self, meter, standby_after: float):
+        """Passe en veille après `standby_after` secondes de silence continu (0 = jamais)"""
+        self.standby_after = standby_after
+        meter.add_silence_listener(self._on_silence_changed)
+        self._on_silence_changed(meter.silent)
+
+    def _on_silence_changed(self, silent: bool):
+        if self._standby_timer:
+            self._standby_timer.cancel()
+            self._standby_timer = None
+        if silent and self.standby_after > 0:
+            self._standby_timer = asyncio.get_running_loop().call_later(self.standby_after, self._enter_standby)
+        elif not silent and self.standby:
+            logger.info("Signal audio : sortie de veille")
+            self.standby = False
+            asyncio.create_task(self._notify_state_change())
+
+    def _enter_standby(self):
+        self._standby_timer = None
+        logger.info(f"Silence depuis {self.standby_after:.0f}s : veille")
+        self.standby = True
+        asyncio.create_task(self._notify_state_change())
+
     async def handle_message(self, message: dict):
         """Gère les messages WebSocket entrants"""
         try:
@@ -61,30 +120,56 @@ class AudioManager:
             logger.warning("Changement de source déjà en cours")
             return False
             
-        if source == self.current_source:
+        if source == self.current_source and not self.restored_pending:
             logger.info(f"Déjà sur la source {source.value}")
             return True
             
+        start = perf_counter()
+        result = "error"
         try:
             self.is_switching = True
             logger.info(f"Changement vers la source {source.value}")
             
             if script_name := self.source_scripts.get(source):
-                success = await self._execute_script(script_name)
+                success = await self._run_script_with_fade(script_name)
                 if success:
+                    result = "success"
+                    CURRENT_SOURCE.labels(self.current_source.value).set(0)
+                    CURRENT_SOURCE.labels(source.value).set(1)
                     self.current_source = source
+                    self.restored_pending = False
                     await self._notify_state_change()
                     return True
                 else:
+                    result = "failure"
                     logger.error(f"Échec du script pour {source.value}")
                     return False
             else:
+                result = "no_script"
                 logger.error(f"Pas de script défini pour {source.value}")
                 return False
                 
         finally:
             self.is_switching = False
+            SOURCE_SWITCH_SECONDS.labels(source.value, result).observe(perf_counter() - start)
             
+    async def _run_script_with_fade(self, script_name: str) -> bool:
+        """
+        Le fondu de sortie démarre en même temps que le script : il est terminé avant que
+        l'ancienne source soit coupée (sudo + systemctl prennent plus longtemps), sans
+        retarder le changement. Le fondu d'entrée n'est pas attendu.
+        """
+        if not self.volume_manager:
+            return await self._execute_script(script_name)
+        fade = asyncio.create_task(self.volume_manager.fade_out())
+        try:
+            return await self._execute_script(script_name)
+        finally:
+            try:
+                await fade
+            finally:
+                await self.volume_manager.fade_in()
+
     async def _execute_script(self, script_name: str) -> bool:
         """Exécute un script de changement de source"""
         script_path = self.scripts_dir / script_name
@@ -122,7 +207,8 @@ class AudioManager:
             "type": "audio_state_change",
             "data": {
                 "current_source": self.current_source.value,
-                "is_switching": self.is_switching
+                "is_switching": self.is_switching,
+                "standby": self.standby
             }
         }
         await self.websocket_manager.broadcast_to_service(message, "audio")
\ No newline at end of file
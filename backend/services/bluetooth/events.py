@@ -1,35 +1,24 @@
 # backend/services/bluetooth/events.py
-import dbus
+import logging
 from typing import Dict
 
+logger = logging.getLogger(__name__)
+
 class BluetoothEventHandler:
     def __init__(self, manager):
         self.manager = manager
-        self.bus = dbus.SystemBus()
+        self.backend = manager.backend
         
     def setup_signal_handlers(self):
         """Configure les gestionnaires de signaux DBus"""
-        print("Configuration des gestionnaires d'événements Bluetooth...")
+        logger.info("Configuration des gestionnaires d'événements Bluetooth...")
         
         # Observer les changements de propriétés
-        self.bus.add_signal_receiver(
-            self._properties_changed,
-            dbus_interface="org.freedesktop.DBus.Properties",
-            signal_name="PropertiesChanged",
-            arg0="org.bluez.Device1",
-            path_keyword="path"
-        )
-        print("Gestionnaires d'événements configurés.")
+        self.backend.add_properties_listener(self._properties_changed, device_only=True)
+        logger.info("Gestionnaires d'événements configurés.")
 
     def _properties_changed(self, interface: str, changed: Dict, invalidated, path: str):
-        """Gère les changements de propriétés"""
+        """Journalise les changements de connexion (traités par l'abonnement du manager)"""
         if "Connected" in changed:
             is_connected = bool(changed["Connected"])
-            print(f"État de connexion changé pour {path}: {is_connected}")
-            
-            if is_connected:
-                print("Appareil connecté - notification au manager")
-                self.manager.handle_new_connection(path)
-            else:
-                print("Appareil déconnecté - notification au manager")
-                self.manager.handle_disconnection(path)
\ No newline at end of file
+            logger.info(f"État de connexion changé pour {path}: {is_connected}")
@@ -1,128 +1,130 @@
 # backend/services/bluetooth/manager.py
-import dbus
-import dbus.mainloop.glib
 import asyncio
-import subprocess
-import time
-from typing import Dict, List, Optional
-from datetime import datetime
+import logging
+from typing import Optional
+
+import config
+import hardware
+from hardware.bluetooth import BluetoothBackend, DEVICE_INTERFACE, device_path as path_for_address
+from monitoring import metrics
+from monitoring.journal import journal
 from services.audio.manager import AudioSource
+from services.bluetooth.registry import DeviceRegistry
 
+logger = logging.getLogger(__name__)
+
+BLUETOOTH_RECONNECTS = metrics.counter(
+    "sonoak_bluetooth_reconnects_total", "Reconnexions automatiques de l'appareil préféré au démarrage", ["result"]
+)
+BLUETOOTH_DEVICES = metrics.gauge(
+    "sonoak_bluetooth_known_devices", "Appareils présents dans le registre Bluetooth"
+)
 
-def set_a2dp_sink(device_address: str):
-    """Configure l'audio A2DP pour le périphérique Bluetooth."""
-    try:
-        subprocess.run(["bluetoothctl", "trust", device_address], capture_output=True)
-        subprocess.run(["bluetoothctl", "connect", device_address], capture_output=True)
-        
-        # Attendre la stabilisation
-        time.sleep(1)
-        print(f"[A2DP] Audio configuré pour {device_address}")
-            
-    except subprocess.CalledProcessError as e:
-        print(f"[A2DP] Erreur lors de la configuration: {e}")
 
 class BluetoothManager:
-    def __init__(self, websocket_manager, audio_manager=None):
-        print("Initialisation du BluetoothManager...")
-        dbus.mainloop.glib.DBusGMainLoop(set_as_default=True)
-        self.bus = dbus.SystemBus()
+    def __init__(self, websocket_manager, audio_manager=None, backend: Optional[BluetoothBackend] = None,
+                 active_device: Optional[dict] = None):
+        logger.info("Initialisation du BluetoothManager...")
+        self.backend = backend or hardware.create_bluetooth()
         self.websocket_manager = websocket_manager
         self.audio_manager = audio_manager
-        self.active_device: Optional[dict] = None
+        # Appareil restauré : prioritaire s'il est encore connecté, oublié sinon
+        self.active_device: Optional[dict] = active_device
+        # Appareil à reconnecter au démarrage s'il ne l'est plus
+        self._preferred_address: Optional[str] = active_device.get("address") if active_device else None
+        self.registry = DeviceRegistry()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        # Récepteurs D-Bus enregistrés une seule fois, même si initialize() est relancé
+        self._signals_registered = False
         self.initialized = False
         self.initialization_retries = 0
         self.max_retries = 5
-        self.obj_manager = None
-        self.adapter = None
-        self.adapter_obj = None
         
         self.initialize()
 
     def initialize(self):
         """Initialise le manager Bluetooth"""
         try:
-            print("Tentative d'initialisation du BluetoothManager...")
-            self.obj_manager = dbus.Interface(
-                self.bus.get_object("org.bluez", "/"),
-                "org.freedesktop.DBus.ObjectManager"
-            )
-            
-            self.adapter_obj = self.bus.get_object('org.bluez', '/org/bluez/hci0')
-            self.adapter = dbus.Interface(self.adapter_obj, 'org.bluez.Adapter1')
-            
+            logger.info("Tentative d'initialisation du BluetoothManager...")
             # Configuration de l'adaptateur
-            adapter_props = dbus.Interface(self.adapter_obj, 'org.freedesktop.DBus.Properties')
-            adapter_props.Set('org.bluez.Adapter1', 'Powered', dbus.Boolean(True))
-            adapter_props.Set('org.bluez.Adapter1', 'Discoverable', dbus.Boolean(True))
-            adapter_props.Set('org.bluez.Adapter1', 'Pairable', dbus.Boolean(True))
+            self.backend.setup_adapter()
             
-            print("Adaptateur Bluetooth initialisé")
+            logger.info("Adaptateur Bluetooth initialisé")
             self.initialized = True
             self.initialization_retries = 0
             
             self._setup_signal_handlers()
-            self._check_existing_connections()
+            # Registre rempli une fois, puis tenu à jour par les signaux
+            self.registry.load(self.backend.get_managed_objects())
+            BLUETOOTH_DEVICES.set(len(self.registry))
+            # bluetoothctl et D-Bus hors de la boucle : restauration en tâche de fond
+            asyncio.create_task(self._restore_connections())
             
         except Exception as e:
-            print(f"Erreur d'initialisation: {e}")
+            logger.error(f"Erreur d'initialisation: {e}")
             self.initialized = False
             self.active_device = None
             
             self.initialization_retries += 1
             if self.initialization_retries < self.max_retries:
-                print(f"Nouvelle tentative dans 2 secondes ({self.initialization_retries}/{self.max_retries})")
+                logger.info(f"Nouvelle tentative dans 2 secondes ({self.initialization_retries}/{self.max_retries})")
                 asyncio.get_event_loop().call_later(2, self.initialize)
 
+    async def _restore_connections(self):
+        """Reprend les appareils déjà connectés, sinon relance la reconnexion du préféré"""
+        await self._check_existing_connections()
+        if self.active_device is None and self._should_reconnect():
+            self._reconnect_task = asyncio.create_task(self._reconnect_preferred())
+
     def _setup_signal_handlers(self):
         """Configure les gestionnaires de signaux DBus"""
+        if self._signals_registered:
+            return
         try:
-            self.bus.add_signal_receiver(
-                self._properties_changed,
-                dbus_interface="org.freedesktop.DBus.Properties",
-                signal_name="PropertiesChanged",
-                path_keyword="path"
-            )
+            self.backend.add_properties_listener(self._properties_changed)
+            self.backend.add_interfaces_listener(self._interfaces_added, self._interfaces_removed)
+            self._signals_registered = True
         except Exception as e:
-            print(f"Erreur configuration signaux: {e}")
+            logger.error(f"Erreur configuration signaux: {e}")
 
     def _properties_changed(self, interface, changed, invalidated, path=None):
         """Gère les changements de propriétés des appareils"""
-        if interface != "org.bluez.Device1":
+        journal.record("dbus", {"interface": interface, "changed": changed, "path": path})
+        if interface != DEVICE_INTERFACE:
             return
 
         try:
+            if self.registry.properties_changed(path, changed) is None:
+                # Signal reçu avant InterfacesAdded : lecture complète, une seule fois
+                self.registry.add(path, {**self.backend.get_device_properties(path), **changed})
+                BLUETOOTH_DEVICES.set(len(self.registry))
             if "Connected" in changed:
                 is_connected = changed["Connected"]
                 if is_connected:
-                    self.handle_new_connection(path)
+                    asyncio.create_task(self.handle_new_connection(path))
                 else:
                     asyncio.create_task(self.handle_disconnection(path))
         except Exception as e:
-            print(f"Erreur changement propriétés: {e}")
+            logger.error(f"Erreur changement propriétés: {e}")
+
+    def _interfaces_added(self, path, interfaces):
+        if self.registry.interfaces_added(path, interfaces) is not None:
+            BLUETOOTH_DEVICES.set(len(self.registry))
+
+    def _interfaces_removed(self, path, interfaces):
+        device = self.registry.interfaces_removed(path, interfaces)
+        if device is not None:
+            logger.info(f"Appareil oublié: {device.name} ({device.address})")
+            BLUETOOTH_DEVICES.set(len(self.registry))
 
     def _get_device_info(self, path: str) -> Optional[dict]:
-        """Récupère les informations d'un appareil"""
+        """Informations d'un appareil connecté, depuis le registre"""
         if not self.initialized:
             return None
-            
-        try:
-            device = self.bus.get_object('org.bluez', path)
-            props_iface = dbus.Interface(device, 'org.freedesktop.DBus.Properties')
-            props = props_iface.GetAll('org.bluez.Device1')
-            
-            if not props.get("Connected", False):
-                return None
-                
-            return {
-                "address": str(props.get("Address", "")),
-                "name": str(props.get("Name", "Unknown")),
-                "path": path,
-                "timestamp": datetime.now().timestamp()
-            }
-        except Exception as e:
-            print(f"Erreur récupération infos appareil: {e}")
+        device = self.registry.get(path)
+        if device is None or not device.connected:
             return None
+        return device.info()
 
     async def handle_new_connection(self, device_path: str):
         """Gère une nouvelle connexion"""
@@ -132,13 +134,13 @@ class BluetoothManager:
 
         if self.active_device:
             if device_info['address'] != self.active_device['address']:
-                print(f"Refus connexion (appareil déjà connecté): {device_info['name']}")
-                self.disconnect_device(device_path)
-                set_a2dp_sink(self.active_device['address'])
+                logger.info(f"Refus connexion (appareil déjà connecté): {device_info['name']}")
+                await self.disconnect_device(device_path)
+                await self._set_a2dp_sink(self.active_device['address'])
         else:
-            print(f"Premier appareil connecté: {device_info['name']}")
+            logger.info(f"Premier appareil connecté: {device_info['name']}")
             self.active_device = device_info
-            set_a2dp_sink(device_info['address'])
+            await self._set_a2dp_sink(device_info['address'])
             # Notifier AudioManager
             if self.audio_manager:
                 await self.audio_manager.switch_source(AudioSource.BLUETOOTH)
@@ -149,7 +151,7 @@ class BluetoothManager:
         """Gère la déconnexion d'un appareil"""
         try:
             if self.active_device and self.active_device["path"] == device_path:
-                print(f"Appareil actif déconnecté: {self.active_device['name']}")
+                logger.info(f"Appareil actif déconnecté: {self.active_device['name']}")
                 # Réinitialiser l'état actif
                 self.active_device = None
                 
@@ -160,17 +162,38 @@ class BluetoothManager:
                 # Notifier immédiatement le frontend
                 await self.notify_devices_status()
                 
-                print("État de déconnexion envoyé au frontend")
+                logger.debug("État de déconnexion envoyé au frontend")
         except Exception as e:
-            print(f"Erreur lors de la gestion de la déconnexion: {e}")
+            logger.error(f"Erreur lors de la gestion de la déconnexion: {e}")
 
-    def _check_existing_connections(self):
+    async def refresh(self):
+        """
+        Relit l'état BlueZ (GetManagedObjects, hors de la boucle) : rattrape une
+        connexion ou une déconnexion dont le signal n'a pas été reçu
+        """
+        if not self.initialized:
+            return
+        try:
+            objects = await asyncio.to_thread(self.backend.get_managed_objects)
+        except Exception as e:
+            logger.error(f"Erreur lecture des appareils BlueZ: {e}")
+            return
+        connected, disconnected = self.registry.sync(objects)
+        BLUETOOTH_DEVICES.set(len(self.registry))
+        for device in disconnected:
+            logger.info(f"Déconnexion rattrapée: {device.name}")
+            await self.handle_disconnection(device.path)
+        for device in connected:
+            logger.info(f"Connexion rattrapée: {device.name}")
+            await self.handle_new_connection(device.path)
+
+    async def _check_existing_connections(self):
         """Vérifie les appareils déjà connectés"""
         try:
             if not self.initialized:
                 return
 
-            connected_devices = self._check_bluetoothctl_connections()
+            connected_devices = [device.info() for device in self.registry.connected()]
             if not connected_devices:
                 self.active_device = None
             else:
@@ -186,10 +209,10 @@ class BluetoothManager:
                         # Déconnecter tous les autres appareils
                         for device in connected_devices:
                             if device['address'] != self.active_device['address']:
-                                print(f"Déconnexion appareil non autorisé: {device['name']}")
-                                self.disconnect_device(device['path'])
+                                logger.info(f"Déconnexion appareil non autorisé: {device['name']}")
+                                await self.disconnect_device(device['path'])
                         # Restaurer l'audio de l'appareil actif
-                        set_a2dp_sink(self.active_device['address'])
+                        await self._set_a2dp_sink(self.active_device['address'])
                     else:
                         # L'appareil actif n'est plus connecté
                         self.active_device = None
@@ -198,42 +221,51 @@ class BluetoothManager:
                     self.active_device = connected_devices[0]
                     # Déconnecter les autres
                     for device in connected_devices[1:]:
-                        self.disconnect_device(device['path'])
+                        await self.disconnect_device(device['path'])
 
-            asyncio.create_task(self.notify_devices_status())
+            await self.notify_devices_status()
                 
         except Exception as e:
-            print(f"Erreur vérification connexions: {e}")
+            logger.error(f"Erreur vérification connexions: {e}")
 
-    def _check_bluetoothctl_connections(self) -> List[dict]:
-        """Vérifie les connexions via bluetoothctl"""
-        try:
-            result = subprocess.run(['bluetoothctl', 'devices', 'Connected'], 
-                                 capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                return []
+    def _should_reconnect(self) -> bool:
+        """Reconnexion seulement si le Bluetooth était la source en cours (sinon elle volerait la source)"""
+        return (config.BLUETOOTH_AUTO_RECONNECT and self.audio_manager is not None
+                and self.audio_manager.current_source == AudioSource.BLUETOOTH)
 
-            connected_devices = []
-            for line in result.stdout.splitlines():
-                if "Device" in line:
-                    parts = line.split(" ", 2)
-                    if len(parts) >= 3:
-                        address = parts[1]
-                        name = parts[2]
-                        path = f"/org/bluez/hci0/dev_{'_'.join(address.split(':'))}"
-                        device_info = {
-                            "address": address,
-                            "name": name,
-                            "path": path,
-                            "timestamp": datetime.now().timestamp()
-                        }
-                        connected_devices.append(device_info)
-            
-            return connected_devices
+    async def _reconnect_preferred(self):
+        """Reconnecte l'appareil appairé et approuvé préféré ; la suite passe par le signal Connected"""
+        device = self.registry.preferred(self._preferred_address)
+        if device is None:
+            return
+        attempts = config.BLUETOOTH_RECONNECT_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            if self.active_device is not None:
+                return
+            logger.info(f"Reconnexion de {device.name} ({attempt}/{attempts})")
+            call = asyncio.ensure_future(asyncio.to_thread(self.backend.connect, device.path))
+            try:
+                try:
+                    await asyncio.wait_for(asyncio.shield(call), config.BLUETOOTH_RECONNECT_TIMEOUT)
+                except asyncio.TimeoutError:
+                    # Le thread ne s'annule pas : pas de second Device1.Connect tant que
+                    # le premier n'a pas répondu
+                    logger.info(f"Reconnexion de {device.name} lente, attente de la réponse de BlueZ")
+                    await call
+                BLUETOOTH_RECONNECTS.labels("ok").inc()
+                return
+            except Exception as e:
+                logger.info(f"Reconnexion de {device.name} impossible: {e}")
+            await asyncio.sleep(2 * attempt)
+        BLUETOOTH_RECONNECTS.labels("failed").inc()
+
+    async def _set_a2dp_sink(self, device_address: str):
+        """Configure l'audio A2DP pour le périphérique Bluetooth (bluetoothctl, hors de la boucle)."""
+        try:
+            await asyncio.to_thread(self.backend.connect_audio, device_address)
+            logger.info(f"[A2DP] Audio configuré pour {device_address}")
         except Exception as e:
-            print(f"Erreur vérification bluetoothctl: {e}")
-            return []
+            logger.error(f"[A2DP] Erreur lors de la configuration: {e}")
 
     async def notify_devices_status(self):
         """Envoie l'état au frontend"""
@@ -247,29 +279,18 @@ class BluetoothManager:
             await self.websocket_manager.broadcast_to_service(message, "bluetooth")
             
         except Exception as e:
-            print(f"Erreur envoi statut: {e}")
+            logger.error(f"Erreur envoi statut: {e}")
 
-    def disconnect_device(self, device_path: str):
-        """Déconnecte un appareil"""
+    async def disconnect_device(self, device_path: str):
+        """Déconnecte un appareil (appel D-Bus bloquant, hors de la boucle)"""
         if not self.initialized:
             return
                 
         try:
-            # Déconnecter rapidement via bluetoothctl
-            device = self.bus.get_object('org.bluez', device_path)
-            device_props = dbus.Interface(device, 'org.freedesktop.DBus.Properties')
-            address = str(device_props.Get('org.bluez.Device1', 'Address'))
-            
-            # Déconnexion brutale via bluetoothctl
-            subprocess.run(["bluetoothctl", "disconnect", address], check=True)
-            
-            # Puis déconnexion via DBus
-            device_iface = dbus.Interface(device, 'org.bluez.Device1')
-            device_iface.Disconnect()
-            
-            print(f"Appareil déconnecté: {device_path}")
+            await asyncio.to_thread(self.backend.disconnect, device_path)
+            logger.info(f"Appareil déconnecté: {device_path}")
         except Exception as e:
-            print(f"Erreur déconnexion: {e}")
+            logger.error(f"Erreur déconnexion: {e}")
 
     async def handle_message(self, message: dict):
         """Gère les messages du frontend"""
@@ -277,10 +298,23 @@ class BluetoothManager:
         data = message.get("data", {})
 
         if message_type == "get_status":
-            self._check_existing_connections()
+            await self.refresh()
+            await self._check_existing_connections()
             await self.notify_devices_status()  # Ajout de cette ligne
         elif message_type == "disconnect_device":
             address = data.get("address")
             if address:
-                device_path = f"/org/bluez/hci0/dev_{'_'.join(address.split(':'))}"
-                self.disconnect_device(device_path)
\ No newline at end of file
+                await self.disconnect_device(path_for_address(address))
+
+    async def cleanup(self):
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+        self.backend.close()
+
+    def get_stats(self) -> dict:
+        return {
+            "known_devices": len(self.registry),
+            "connected": [device.address for device in self.registry.connected()],
+            "preferred": self._preferred_address,
+            "reconnecting": self._reconnect_task is not None and not self._reconnect_task.done()
+        }
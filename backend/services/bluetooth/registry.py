@@ -0,0 +1,162 @@
+# backend/services/bluetooth/registry.py
+"""
+Registre en mémoire des appareils BlueZ.
+
+Rempli une fois par ObjectManager.GetManagedObjects, puis tenu à jour par les
+signaux InterfacesAdded / InterfacesRemoved / PropertiesChanged : plus de GetAll
+à chaque signal ni d'analyse de `bluetoothctl devices Connected`.
+Recherche O(1) par chemin D-Bus et par adresse.
+"""
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from hardware.bluetooth import DEVICE_INTERFACE
+
+logger = logging.getLogger(__name__)
+
+
+class BluetoothDevice:
+    __slots__ = ("path", "address", "name", "paired", "trusted", "connected", "last_seen", "last_connected")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.address = ""
+        self.name = "Unknown"
+        self.paired = False
+        self.trusted = False
+        self.connected = False
+        self.last_seen: Optional[float] = None
+        self.last_connected: Optional[float] = None
+
+    def update(self, props: Dict, now: float):
+        """Applique des propriétés Device1 (complètes ou partielles)"""
+        if "Address" in props:
+            self.address = str(props["Address"])
+        if "Name" in props or "Alias" in props:
+            self.name = str(props.get("Name") or props.get("Alias"))
+        if "Paired" in props:
+            self.paired = bool(props["Paired"])
+        if "Trusted" in props:
+            self.trusted = bool(props["Trusted"])
+        if "Connected" in props:
+            connected = bool(props["Connected"])
+            if connected and not self.connected:
+                self.last_connected = now
+            self.connected = connected
+        self.last_seen = now
+
+    def info(self) -> dict:
+        """Format de l'appareil actif diffusé au frontend (devices_status.activeDevice)"""
+        return {
+            "address": self.address,
+            "name": self.name,
+            "path": self.path,
+            "timestamp": self.last_connected or time.time()
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "address": self.address,
+            "name": self.name,
+            "path": self.path,
+            "paired": self.paired,
+            "trusted": self.trusted,
+            "connected": self.connected,
+            "last_seen": self.last_seen,
+            "last_connected": self.last_connected
+        }
+
+
+class DeviceRegistry:
+    def __init__(self):
+        self._by_path: Dict[str, BluetoothDevice] = {}
+        self._by_address: Dict[str, BluetoothDevice] = {}
+
+    def load(self, managed_objects: Dict):
+        """État initial : {chemin: {interface: propriétés}} de GetManagedObjects"""
+        self._by_path.clear()
+        self._by_address.clear()
+        for path, interfaces in managed_objects.items():
+            if DEVICE_INTERFACE in interfaces:
+                self.add(str(path), interfaces[DEVICE_INTERFACE])
+        logger.info(f"Registre Bluetooth : {len(self._by_path)} appareils connus, {len(self.connected())} connectés")
+
+    def sync(self, managed_objects: Dict) -> Tuple[List[BluetoothDevice], List[BluetoothDevice]]:
+        """
+        Rapproche le registre d'un nouveau GetManagedObjects (signal manqué) sans perdre
+        l'historique ; retourne les appareils (connectés, déconnectés) depuis la dernière vue
+        """
+        connected, disconnected = [], []
+        seen = set()
+        for path, interfaces in managed_objects.items():
+            if DEVICE_INTERFACE not in interfaces:
+                continue
+            path = str(path)
+            seen.add(path)
+            known = self._by_path.get(path)
+            was_connected = known is not None and known.connected
+            device = self.add(path, interfaces[DEVICE_INTERFACE])
+            if device.connected and not was_connected:
+                connected.append(device)
+            elif was_connected and not device.connected:
+                disconnected.append(device)
+        for path in [path for path in self._by_path if path not in seen]:
+            device = self.interfaces_removed(path, (DEVICE_INTERFACE,))
+            if device.connected:
+                disconnected.append(device)
+        return connected, disconnected
+
+    def add(self, path: str, props: Dict) -> BluetoothDevice:
+        device = self._by_path.get(path)
+        if device is None:
+            device = self._by_path[path] = BluetoothDevice(path)
+        device.update(props, time.time())
+        if device.address:
+            self._by_address[device.address] = device
+        return device
+
+    def interfaces_added(self, path: str, interfaces: Dict) -> Optional[BluetoothDevice]:
+        if DEVICE_INTERFACE not in interfaces:
+            return None
+        return self.add(str(path), interfaces[DEVICE_INTERFACE])
+
+    def interfaces_removed(self, path: str, interfaces) -> Optional[BluetoothDevice]:
+        """Appareil oublié (supprimé de BlueZ) ; les autres interfaces sont ignorées"""
+        if DEVICE_INTERFACE not in interfaces:
+            return None
+        device = self._by_path.pop(str(path), None)
+        if device is not None and self._by_address.get(device.address) is device:
+            del self._by_address[device.address]
+        return device
+
+    def properties_changed(self, path: str, changed: Dict) -> Optional[BluetoothDevice]:
+        """None si l'appareil est inconnu (signal reçu avant InterfacesAdded)"""
+        device = self._by_path.get(path)
+        if device is not None:
+            device.update(changed, time.time())
+        return device
+
+    def get(self, path: str) -> Optional[BluetoothDevice]:
+        return self._by_path.get(path)
+
+    def by_address(self, address: str) -> Optional[BluetoothDevice]:
+        return self._by_address.get(address)
+
+    def connected(self) -> List[BluetoothDevice]:
+        return [device for device in self._by_path.values() if device.connected]
+
+    def preferred(self, address: Optional[str] = None) -> Optional[BluetoothDevice]:
+        """Appareil appairé et approuvé à reconnecter : celui indiqué, sinon le dernier connecté"""
+        candidate = self._by_address.get(address) if address else None
+        if candidate is not None and candidate.paired and candidate.trusted:
+            return candidate
+        known = [device for device in self._by_path.values()
+                 if device.paired and device.trusted and device.last_connected]
+        return max(known, key=lambda device: device.last_connected) if known else None
+
+    def to_list(self) -> List[dict]:
+        return [device.to_dict() for device in self._by_path.values()]
+
+    def __len__(self) -> int:
+        return len(self._by_path)
@@ -18,18 +18,26 @@ async def get_status():
         raise HTTPException(status_code=500, detail="Bluetooth manager not initialized")
 
     return {
-        "connected_device": bluetooth_manager.connected_device,
-        "has_active_connection": bluetooth_manager.connected_device is not None
+        "connected_device": bluetooth_manager.active_device,
+        "has_active_connection": bluetooth_manager.active_device is not None
     }
 
+@router.get("/devices")
+async def get_devices() -> List[Dict]:
+    """Appareils connus de BlueZ (registre en mémoire)"""
+    if not bluetooth_manager:
+        raise HTTPException(status_code=500, detail="Bluetooth manager not initialized")
+
+    return bluetooth_manager.registry.to_list()
+
 @router.post("/disconnect")
 async def disconnect_current():
     """Déconnecte l'appareil actuellement connecté"""
     if not bluetooth_manager:
         raise HTTPException(status_code=500, detail="Bluetooth manager not initialized")
 
-    if not bluetooth_manager.connected_device:
+    if not bluetooth_manager.active_device:
         raise HTTPException(status_code=404, detail="No device currently connected")
 
-    success = await bluetooth_manager.disconnect_current_device()
-    return {"success": success}
\ No newline at end of file
+    await bluetooth_manager.disconnect_device(bluetooth_manager.active_device["path"])
+    return {"success": True}
\ No newline at end of file
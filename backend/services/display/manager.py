@@ -0,0 +1,207 @@
+# backend/services/display/manager.py
+"""
+Mise en veille de l'écran (remplace scripts/screensaver.sh).
+
+Une seule échéance : chaque activité ne fait que repousser `deadline` ; le timer
+de la boucle asyncio, armé une fois, se réarme à l'échéance courante s'il se
+déclenche trop tôt. L'outil de rétroéclairage n'est appelé qu'aux changements
+d'état (allumé <-> éteint).
+
+Activité :
+    touch     appui sur l'écran (evdev, lecture asynchrone)
+    rotary    cran ou bouton de l'encodeur
+    playback  changement de lecture, de morceau, de source ou d'appareil Bluetooth
+              (les mises à jour de position ne comptent pas)
+    request   message wake de /ws/display
+"""
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+DISPLAY_TRANSITIONS = metrics.counter(
+    "sonoak_display_transitions_total", "Allumages et extinctions de l'écran", ["state"]
+)
+DISPLAY_ACTIVITY = metrics.counter(
+    "sonoak_display_activity_total", "Activités repoussant la mise en veille de l'écran", ["origin"]
+)
+
+
+def _playback_signature(service: str, message: dict):
+    """Partie de l'état qui compte comme activité (None : message ignoré)"""
+    message_type = message.get("type")
+    if service == "spotify" and message_type == "playback_status":
+        status = message.get("status") or {}
+        return status.get("is_playing"), status.get("track_name")
+    if service == "audio" and message_type == "audio_state_change":
+        return (message.get("data") or {}).get("current_source")
+    if service == "bluetooth" and message_type == "devices_status":
+        device = message.get("activeDevice")
+        return device.get("address") if isinstance(device, dict) else device
+    return None
+
+
+class DisplayManager:
+    def __init__(self, websocket_manager, backlight, touch=None, timeout: float = 2400.0,
+                 on_level: int = 5, off_level: int = 0):
+        self.websocket_manager = websocket_manager
+        self.backlight = backlight
+        self.touch = touch
+        self.timeout = timeout
+        self.on_level = on_level
+        self.off_level = off_level
+
+        self.is_on: Optional[bool] = None
+        self.deadline = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock = asyncio.Lock()
+        self._touch_task: Optional[asyncio.Task] = None
+        self._signatures: Dict[str, object] = {}
+        self._activity = {origin: DISPLAY_ACTIVITY.labels(origin) for origin in ("touch", "rotary", "playback", "request")}
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        store = self.websocket_manager.state
+        for service in ("audio", "spotify", "bluetooth"):
+            for _, message in store.snapshot(service):
+                signature = _playback_signature(service, message)
+                if signature is not None:
+                    self._signatures[service] = signature
+        store.add_listener(self._on_state)
+        if self.touch is not None:
+            self._touch_task = asyncio.create_task(self._read_touches())
+
+        # Écran allumé au démarrage, comme le faisait le script
+        self.deadline = self._loop.time() + self.timeout
+        await self._set_on(True)
+        self._arm()
+        logger.info(f"Display manager started (timeout {self.timeout:.0f}s, touch={'on' if self.touch else 'off'})")
+
+    def activity(self, origin: str):
+        """Repousse la mise en veille ; rallume l'écran s'il est éteint"""
+        if self._loop is None:
+            return
+        self._activity[origin].inc()
+        self.deadline = self._loop.time() + self.timeout
+        if self._timer is None:
+            self._arm()
+        if not self.is_on:
+            asyncio.create_task(self._set_on(True))
+
+    def _arm(self):
+        self._timer = self._loop.call_at(self.deadline, self._on_deadline)
+
+    def _on_deadline(self):
+        self._timer = None
+        if self._loop.time() < self.deadline:
+            # Activité depuis l'armement : on attend la nouvelle échéance
+            self._arm()
+        elif self.is_on:
+            asyncio.create_task(self._set_on(False))
+
+    def _on_state(self, service: str, version: int, message: dict):
+        if message.get("stale"):
+            return
+        signature = _playback_signature(service, message)
+        if signature is None or self._signatures.get(service) == signature:
+            return
+        self._signatures[service] = signature
+        self.activity("playback")
+
+    async def _read_touches(self):
+        try:
+            async for _ in self.touch.touches():
+                self.activity("touch")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Écran USB débranché : la veille continue sur les autres activités
+            logger.error(f"Touch input stopped: {e}")
+
+    async def _set_on(self, on: bool):
+        async with self._lock:
+            if self.is_on == on:
+                return
+            # Une activité a pu survenir pendant l'attente du verrou
+            if not on and self._loop.time() < self.deadline:
+                return
+            level = self.on_level if on else self.off_level
+            if not await self.backlight.set_level(level):
+                return
+            self.is_on = on
+            DISPLAY_TRANSITIONS.labels("on" if on else "off").inc()
+            logger.info("Écran allumé" if on else "Écran éteint")
+        await self.broadcast_status()
+
+    def _status(self) -> dict:
+        remaining = max(0.0, self.deadline - self._loop.time()) if self._loop and self.is_on else 0.0
+        return {
+            "type": "display_status",
+            "on": bool(self.is_on),
+            "timeout": self.timeout,
+            "remaining": round(remaining, 1)
+        }
+
+    async def broadcast_status(self):
+        await self.websocket_manager.broadcast_to_service(self._status(), "display")
+
+    async def sleep(self):
+        """Extinction immédiate"""
+        self.deadline = self._loop.time()
+        await self._set_on(False)
+
+    async def set_timeout(self, timeout: float):
+        self.timeout = timeout
+        self.deadline = self._loop.time() + timeout
+        if self._timer is not None:
+            # Échéance raccourcie : le timer armé se déclencherait trop tard
+            self._timer.cancel()
+        self._arm()
+        await self.broadcast_status()
+
+    async def handle_message(self, message: dict) -> None:
+        """Handle incoming WebSocket messages"""
+        try:
+            message_type = message.get("type")
+
+            if message_type == "get_status":
+                await self.broadcast_status()
+
+            elif message_type == "wake":
+                self.activity("request")
+                if self.is_on:
+                    await self.broadcast_status()
+
+            elif message_type == "sleep":
+                await self.sleep()
+
+            elif message_type == "set_timeout":
+                await self.set_timeout(message["timeout"])
+
+        except Exception as e:
+            logger.error(f"Error handling display message: {e}")
+            raise
+
+    def get_stats(self) -> dict:
+        return {**self._status(), "touch": self.touch is not None}
+
+    async def cleanup(self):
+        self.websocket_manager.state.remove_listener(self._on_state)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._touch_task:
+            self._touch_task.cancel()
+            try:
+                await self._touch_task
+            except asyncio.CancelledError:
+                pass
+        if self.touch is not None:
+            try:
+                self.touch.close()
+            except Exception as e:
+                logger.error(f"Error closing touch input: {e}")
@@ -0,0 +1,174 @@
+# backend/services/metering/meter.py
+"""
+Mesure de niveau de la sortie audio.
+
+Un thread lit la capture ALSA (loopback ou dsnoop de la sortie) bloc par bloc et
+cumule, en numpy, la somme des carrés et le crête par canal. Au rythme `rate`
+(décimation), il poste une trame RMS/crête en dBFS à la boucle asyncio, qui :
+    - la diffuse aux clients de /ws/meter (sans la conserver dans le store d'état),
+    - détecte le silence (crête sous `silence_db` pendant `silence_hold` secondes)
+      et prévient les listeners (AudioManager : mise en veille après N minutes).
+Une trame est abandonnée si la précédente est encore en cours d'envoi.
+"""
+import asyncio
+import logging
+import math
+import threading
+from time import monotonic
+from typing import Callable, List, Optional
+
+from monitoring import metrics
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel : sans lui, la mesure reste désactivée
+    np = None
+
+logger = logging.getLogger(__name__)
+
+METER_FRAMES = metrics.counter(
+    "sonoak_meter_frames_total", "Trames de niveau produites, par sort", ["result"]
+)
+METER_BLOCK_SECONDS = metrics.histogram(
+    "sonoak_meter_block_seconds", "Calcul RMS/crête d'un bloc capturé",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005)
+)
+
+FLOOR_DB = -96.0
+
+
+def _to_db(value: float) -> float:
+    return round(max(FLOOR_DB, 20 * math.log10(value)) if value > 0 else FLOOR_DB, 1)
+
+
+class LevelMeter:
+    def __init__(self, websocket_manager, capture, rate: float = 15.0,
+                 silence_db: float = -60.0, silence_hold: float = 2.0):
+        self.websocket_manager = websocket_manager
+        self.capture = capture
+        self.rate = rate
+        self.silence_db = silence_db
+        self.silence_hold = silence_hold
+
+        self.silent = True
+        self.silent_since = monotonic()
+        self.last_frame: Optional[dict] = None
+        self._quiet_since: Optional[float] = self.silent_since
+        self._listeners: List[Callable[[bool], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._sending: Optional[asyncio.Task] = None
+        self._counts = {"published": 0, "dropped": 0, "blocks": 0}
+
+    def add_silence_listener(self, callback: Callable[[bool], None]):
+        """callback(silent) à chaque passage silence <-> signal"""
+        self._listeners.append(callback)
+
+    def start(self) -> bool:
+        if np is None:
+            logger.warning("numpy non installé : mesure de niveau désactivée")
+            return False
+        self._loop = asyncio.get_running_loop()
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="level-meter", daemon=True)
+        self._thread.start()
+        return True
+
+    def _capture_loop(self):
+        channels = self.capture.channels
+        interval = 1.0 / self.rate
+        sum_squares = np.zeros(channels)
+        peak = np.zeros(channels)
+        count = 0
+        next_publish = monotonic() + interval
+        while self._running:
+            try:
+                data = self.capture.read()
+            except Exception as e:
+                logger.error(f"Capture audio en échec: {e}")
+                self._running = False
+                break
+            if data:
+                with METER_BLOCK_SECONDS.time():
+                    block = np.frombuffer(data, dtype="<i2").reshape(-1, channels).astype(np.float32)
+                    sum_squares += np.einsum("ij,ij->j", block, block)
+                    peak = np.maximum(peak, np.abs(block).max(axis=0))
+                    count += block.shape[0]
+                self._counts["blocks"] += 1
+            now = monotonic()
+            if now >= next_publish and count:
+                rms = np.sqrt(sum_squares / count) / 32768.0
+                frame = {
+                    "type": "meter",
+                    "rms": [_to_db(value) for value in rms],
+                    "peak": [_to_db(value) for value in peak / 32768.0],
+                }
+                try:
+                    self._loop.call_soon_threadsafe(self._publish, frame, now)
+                except RuntimeError:
+                    # Boucle fermée pendant l'arrêt
+                    break
+                sum_squares[:] = 0
+                peak[:] = 0
+                count = 0
+                next_publish = max(next_publish + interval, now)
+
+    def _publish(self, frame: dict, now: float):
+        """Sur la boucle asyncio : silence, puis diffusion décimée"""
+        if max(frame["peak"]) < self.silence_db:
+            if self._quiet_since is None:
+                self._quiet_since = now
+            if not self.silent and now - self._quiet_since >= self.silence_hold:
+                self._set_silent(True, self._quiet_since)
+        else:
+            self._quiet_since = None
+            if self.silent:
+                self._set_silent(False, now)
+        frame["silent"] = self.silent
+        self.last_frame = frame
+
+        if not self.websocket_manager.active_connections.get("meter"):
+            return
+        if self._sending and not self._sending.done():
+            self._counts["dropped"] += 1
+            METER_FRAMES.labels("dropped").inc()
+            return
+        self._counts["published"] += 1
+        METER_FRAMES.labels("published").inc()
+        self._sending = asyncio.create_task(
+            self.websocket_manager.broadcast_to_service(frame, "meter", retain=False)
+        )
+
+    def _set_silent(self, silent: bool, since: float):
+        self.silent = silent
+        self.silent_since = since
+        logger.info("Sortie audio silencieuse" if silent else "Signal audio détecté")
+        for callback in list(self._listeners):
+            try:
+                callback(silent)
+            except Exception as e:
+                logger.error(f"Silence listener failed: {e}")
+
+    def silence_duration(self) -> float:
+        return monotonic() - self.silent_since if self.silent else 0.0
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self._running,
+            "rate": self.rate,
+            "silent": self.silent,
+            "silence_duration": round(self.silence_duration(), 1),
+            "last_frame": self.last_frame,
+            **self._counts
+        }
+
+    async def stop(self):
+        self._running = False
+        if self._thread:
+            # La lecture en cours se termine au bloc suivant (quelques dizaines de ms)
+            await asyncio.to_thread(self._thread.join, 1.0)
+        try:
+            self.capture.close()
+        except Exception as e:
+            logger.error(f"Error closing capture: {e}")
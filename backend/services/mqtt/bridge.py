@@ -0,0 +1,228 @@
+# backend/services/mqtt/bridge.py
+"""
+Pont MQTT pour la domotique.
+
+Publie en retained, uniquement sur changement :
+    <prefix>/status              online | offline (testament)
+    <prefix>/source              source audio active
+    <prefix>/volume              volume affiché (0-100)
+    <prefix>/playback            piste en cours (JSON, sans la position)
+    <prefix>/playback/state      playing | paused
+    <prefix>/bluetooth/device    appareil actif (JSON, null si aucun)
+Commandes acceptées :
+    <prefix>/source/set          spotify | bluetooth | macos | none
+    <prefix>/volume/set          42 (absolu) ou +1 / -1 (crans)
+    <prefix>/playback/set        play | pause | play_pause | next | previous
+
+Test local : mosquitto -v, puis
+    mosquitto_sub -t 'sonoak/#' -v
+    mosquitto_pub -t sonoak/volume/set -m 40
+"""
+import asyncio
+import json
+import logging
+import random
+from typing import Awaitable, Callable, Dict, Optional
+
+from monitoring import metrics
+
+try:
+    import aiomqtt
+except ImportError:  # aiomqtt est optionnel : sans lui, le pont reste désactivé
+    aiomqtt = None
+
+logger = logging.getLogger(__name__)
+
+MQTT_PUBLISHES = metrics.counter(
+    "sonoak_mqtt_publishes_total", "Messages publiés sur le broker MQTT"
+)
+MQTT_DEDUPLICATED = metrics.counter(
+    "sonoak_mqtt_deduplicated_total", "Publications évitées (valeur inchangée ou remplacée dans le lot)"
+)
+MQTT_COMMANDS = metrics.counter(
+    "sonoak_mqtt_commands_total", "Commandes reçues sur les topics set", ["topic", "result"]
+)
+
+PLAYBACK_COMMANDS = {
+    "play_pause": "play_pause",
+    # play / pause ne basculent pas : sans effet si la lecture est déjà dans cet état
+    "play": "play",
+    "pause": "pause",
+    "next": "next_track",
+    "next_track": "next_track",
+    "previous": "previous_track",
+    "previous_track": "previous_track",
+}
+
+
+def topics_for(service: str, message: dict) -> Dict[str, str]:
+    """Traduit un message diffusé en valeurs de topics (relatifs au préfixe)"""
+    message_type = message.get("type")
+    if service == "audio" and message_type == "audio_state_change":
+        source = message.get("data", {}).get("current_source")
+        return {"source": source} if source else {}
+    if service == "volume" and message_type == "volume_status":
+        return {"volume": str(message.get("volume"))}
+    if service == "spotify" and message_type == "playback_status":
+        status = dict(message.get("status") or {})
+        # La position change chaque seconde : seule la piste est publiée
+        status.pop("position", None)
+        return {
+            "playback": json.dumps(status, ensure_ascii=False, sort_keys=True),
+            "playback/state": "playing" if status.get("is_playing") else "paused"
+        }
+    if service == "bluetooth" and message_type == "devices_status":
+        device = message.get("activeDevice")
+        return {"bluetooth/device": json.dumps(
+            {"name": device.get("name"), "address": device.get("address")} if device else None
+        )}
+    return {}
+
+
+class MqttBridge:
+    def __init__(self, websocket_manager, dispatch: Callable[[str, dict], Awaitable],
+                 host: str, port: int = 1883, prefix: str = "sonoak",
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 flush_interval: float = 0.1, backoff_max: float = 30.0):
+        self.websocket_manager = websocket_manager
+        # Commandes validées et routées par le registre, comme les messages WebSocket
+        self.dispatch = dispatch
+        self.host = host
+        self.port = port
+        self.prefix = prefix.rstrip("/")
+        self.username = username
+        self.password = password
+        self.flush_interval = flush_interval
+        self.backoff_max = backoff_max
+
+        self.connected = False
+        self._pending: Dict[str, str] = {}
+        self._published: Dict[str, str] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> bool:
+        if aiomqtt is None:
+            logger.warning("aiomqtt non installé : pont MQTT désactivé")
+            return False
+        store = self.websocket_manager.state
+        store.add_listener(self._on_state)
+        # État courant : publié dès la première connexion
+        for service in ("audio", "volume", "spotify", "bluetooth"):
+            for _, message in store.snapshot(service):
+                self._on_state(service, 0, message)
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    def _on_state(self, service: str, version: int, message: dict):
+        topics = topics_for(service, message)
+        if not topics:
+            return
+        for topic, payload in topics.items():
+            if topic in self._pending:
+                MQTT_DEDUPLICATED.inc()
+            self._pending[topic] = payload
+        self._wakeup.set()
+
+    async def _run(self):
+        attempt = 0
+        will = aiomqtt.Will(f"{self.prefix}/status", "offline", qos=1, retain=True)
+        while True:
+            try:
+                async with aiomqtt.Client(self.host, self.port, username=self.username,
+                                          password=self.password, will=will) as client:
+                    attempt = 0
+                    self.connected = True
+                    logger.info(f"MQTT bridge connected to {self.host}:{self.port}")
+                    await client.publish(f"{self.prefix}/status", "online", qos=1, retain=True)
+                    await client.subscribe(f"{self.prefix}/+/set", qos=1)
+                    # Le broker a pu perdre les retained : tout republier
+                    for topic, payload in self._published.items():
+                        self._pending.setdefault(topic, payload)
+                    self._published.clear()
+                    self._wakeup.set()
+                    try:
+                        async with asyncio.TaskGroup() as group:
+                            group.create_task(self._publish_loop(client))
+                            group.create_task(self._command_loop(client))
+                    except asyncio.CancelledError:
+                        # Arrêt propre : le testament n'est envoyé qu'en cas de coupure
+                        await asyncio.wait_for(
+                            client.publish(f"{self.prefix}/status", "offline", qos=1, retain=True), 1.0
+                        )
+                        raise
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.connected = False
+                attempt += 1
+                delay = random.uniform(0, min(self.backoff_max, 2 ** attempt))
+                logger.warning(f"MQTT bridge disconnected ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _publish_loop(self, client):
+        while True:
+            await self._wakeup.wait()
+            # Fenêtre de regroupement : un glissement de volume ne publie que la dernière valeur
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            batch, self._pending = self._pending, {}
+            try:
+                while batch:
+                    topic, payload = next(iter(batch.items()))
+                    if self._published.get(topic) != payload:
+                        await client.publish(f"{self.prefix}/{topic}", payload, qos=1, retain=True)
+                        self._published[topic] = payload
+                        MQTT_PUBLISHES.inc()
+                    else:
+                        MQTT_DEDUPLICATED.inc()
+                    del batch[topic]
+            finally:
+                # Connexion perdue en cours de lot : le reste repartira à la reconnexion
+                for topic, payload in batch.items():
+                    self._pending.setdefault(topic, payload)
+
+    async def _command_loop(self, client):
+        async for message in client.messages:
+            topic = str(message.topic)[len(self.prefix) + 1:]
+            payload = message.payload.decode(errors="replace").strip() if message.payload else ""
+            try:
+                await self._handle_command(topic, payload)
+                MQTT_COMMANDS.labels(topic, "ok").inc()
+            except Exception as e:
+                MQTT_COMMANDS.labels(topic, "error").inc()
+                logger.error(f"MQTT command {topic}={payload!r} failed: {e}")
+
+    async def _handle_command(self, topic: str, payload: str):
+        if topic == "source/set":
+            await self.dispatch("audio", {"type": "switch_source", "data": {"source": payload.lower()}})
+        elif topic == "volume/set":
+            if payload.startswith(("+", "-")):
+                await self.dispatch("volume", {"type": "adjust_volume", "delta": int(payload)})
+            else:
+                await self.dispatch("volume", {"type": "set_volume", "volume": max(0, min(100, int(payload)))})
+        elif topic == "playback/set":
+            command = PLAYBACK_COMMANDS.get(payload.lower())
+            if command is None:
+                raise ValueError(f"Unknown playback command: {payload}")
+            await self.dispatch("spotify", {"type": command})
+        else:
+            raise ValueError(f"Unknown topic: {topic}")
+
+    def get_stats(self) -> dict:
+        return {
+            "broker": f"{self.host}:{self.port}",
+            "connected": self.connected,
+            "pending": len(self._pending),
+            "topics": dict(self._published)
+        }
+
+    async def cleanup(self):
+        self.websocket_manager.state.remove_listener(self._on_state)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.connected = False
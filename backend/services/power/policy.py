@@ -0,0 +1,227 @@
+# backend/services/power/policy.py
+"""
+Politique de veille : arrête les services inutilisés après une période d'inactivité
+et les relance à la demande.
+
+L'activité est lue dans le ServiceStateStore (aucune requête supplémentaire) :
+    librespot   lecture Spotify en cours
+    snapclient  au moins un client snapcast connecté
+    bluealsa    un appareil Bluetooth actif
+    amp         l'une des trois, sauf si la mesure de niveau a mis la sortie en veille
+Une cible liée à une source n'est arrêtée que si cette source est la source courante
+(les scripts de changement de source gèrent déjà les autres).
+
+Réveil :
+    - sur événement : une cible redevient active (appareil connecté, clients snapcast...)
+    - à la demande : wake(service) avant de traiter une commande du service (les
+      lectures d'état, envoyées en boucle par le kiosque, ne réveillent rien) ;
+      ne coûte qu'une recherche dans un dict quand rien n'est arrêté.
+"""
+import asyncio
+import logging
+from time import monotonic, perf_counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import config
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+POWER_TRANSITIONS = metrics.counter(
+    "sonoak_power_transitions_total", "Arrêts et relances de services par la politique de veille",
+    ["target", "action"]
+)
+POWER_WAKE_SECONDS = metrics.histogram(
+    "sonoak_power_wake_seconds", "Durée de relance d'une cible arrêtée", ["target"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+
+class PowerTarget(NamedTuple):
+    name: str
+    idle_after: float
+    units: Tuple[str, ...] = ()
+    # Source audio dont dépend la cible (None : toutes)
+    source: Optional[str] = None
+    stop_command: str = ""
+    start_command: str = ""
+
+
+# Activité de chaque cible à partir des indicateurs du store
+ACTIVITY: Dict[str, Callable[[dict], bool]] = {
+    "librespot": lambda flags: flags["spotify_playing"],
+    "snapclient": lambda flags: flags["snapcast_clients"] > 0,
+    "bluealsa": lambda flags: flags["bluetooth_device"],
+    "amp": lambda flags: (flags["spotify_playing"] or flags["snapcast_clients"] > 0
+                          or flags["bluetooth_device"]) and not flags["standby"],
+}
+
+# Cibles à relancer avant de traiter une commande du service
+SERVICE_TARGETS: Dict[str, Tuple[str, ...]] = {
+    "spotify": ("librespot", "amp"),
+    "snapcast": ("snapclient", "amp"),
+    "bluetooth": ("bluealsa", "amp"),
+    "volume": ("amp",),
+    "audio": ("amp",),
+}
+
+
+def configured_targets() -> List[PowerTarget]:
+    """Cibles d'après la configuration (unités systemd des scripts de changement de source)"""
+    targets = [
+        PowerTarget("librespot", config.POWER_LIBRESPOT_IDLE_MINUTES * 60,
+                    ("sonoak-go-librespot.service",), source="spotify"),
+        PowerTarget("snapclient", config.POWER_SNAPCLIENT_IDLE_MINUTES * 60,
+                    ("sonoak-snapclient.service",), source="macos"),
+        PowerTarget("bluealsa", config.POWER_BLUEALSA_IDLE_MINUTES * 60,
+                    ("sonoak-bluealsa.service",), source="bluetooth"),
+    ]
+    if config.POWER_AMP_OFF_COMMAND and config.POWER_AMP_ON_COMMAND:
+        targets.append(PowerTarget("amp", config.POWER_AMP_IDLE_MINUTES * 60,
+                                   stop_command=config.POWER_AMP_OFF_COMMAND,
+                                   start_command=config.POWER_AMP_ON_COMMAND))
+    return targets
+
+
+class IdlePolicy:
+    def __init__(self, websocket_manager, control, targets: List[PowerTarget], check_interval: float = 5.0):
+        self.websocket_manager = websocket_manager
+        self.control = control
+        self.targets = {target.name: target for target in targets if target.idle_after > 0}
+        self.check_interval = check_interval
+
+        self.flags = {
+            "source": "none",
+            "spotify_playing": False,
+            "snapcast_clients": 0,
+            "bluetooth_device": False,
+            "standby": False,
+        }
+        now = monotonic()
+        self.last_active: Dict[str, float] = {name: now for name in self.targets}
+        self.suspended: Dict[str, bool] = {name: False for name in self.targets}
+        self._locks: Dict[str, asyncio.Lock] = {name: asyncio.Lock() for name in self.targets}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        store = self.websocket_manager.state
+        store.add_listener(self._on_state)
+        for service in ("audio", "spotify", "snapcast", "bluetooth"):
+            for version, message in store.snapshot(service):
+                self._on_state(service, version, message)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Idle policy started: {', '.join(f'{t.name}={t.idle_after:.0f}s' for t in self.targets.values())}")
+
+    def _on_state(self, service: str, version: int, message: dict):
+        if message.get("stale"):
+            return
+        message_type = message.get("type")
+        if service == "audio" and message_type == "audio_state_change":
+            data = message.get("data", {})
+            self.flags["standby"] = bool(data.get("standby"))
+            source = data.get("current_source", "none")
+            if source != self.flags["source"]:
+                self.flags["source"] = source
+                self._on_source_changed()
+        elif service == "spotify" and message_type == "playback_status":
+            self.flags["spotify_playing"] = bool((message.get("status") or {}).get("is_playing"))
+        elif service == "snapcast" and message_type == "clients_status":
+            self.flags["snapcast_clients"] = len(message.get("clients") or [])
+        elif service == "bluetooth" and message_type == "devices_status":
+            self.flags["bluetooth_device"] = message.get("activeDevice") is not None
+        else:
+            return
+
+        now = monotonic()
+        for name in self.targets:
+            if ACTIVITY[name](self.flags):
+                self.last_active[name] = now
+                if self.suspended[name]:
+                    asyncio.create_task(self.resume(name, "activity"))
+
+    def _on_source_changed(self):
+        """Les scripts de changement de source viennent (re)lancer ou arrêter les unités"""
+        now = monotonic()
+        for name, target in self.targets.items():
+            if target.source is not None:
+                self.suspended[name] = False
+                self.last_active[name] = now
+
+    def _eligible(self, target: PowerTarget) -> bool:
+        return target.source is None or target.source == self.flags["source"]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            now = monotonic()
+            for name, target in self.targets.items():
+                if ACTIVITY[name](self.flags):
+                    self.last_active[name] = now
+                elif (not self.suspended[name] and self._eligible(target)
+                      and now - self.last_active[name] >= target.idle_after):
+                    await self.suspend(name)
+
+    async def suspend(self, name: str):
+        target = self.targets[name]
+        async with self._locks[name]:
+            if self.suspended[name]:
+                return
+            logger.info(f"Idle for {target.idle_after:.0f}s: stopping {name}")
+            if target.units:
+                ok = await self.control.stop_units(target.units)
+            else:
+                ok = await self.control.run(target.stop_command)
+            if ok:
+                self.suspended[name] = True
+                POWER_TRANSITIONS.labels(name, "suspend").inc()
+
+    async def resume(self, name: str, reason: str):
+        async with self._locks[name]:
+            if not self.suspended[name]:
+                return
+            target = self.targets[name]
+            start = perf_counter()
+            if target.units:
+                ok = await self.control.start_units(target.units)
+            else:
+                ok = await self.control.run(target.start_command)
+            # Même en cas d'échec : ne pas bloquer les demandes suivantes sur une cible « arrêtée »
+            self.suspended[name] = False
+            self.last_active[name] = monotonic()
+            elapsed = perf_counter() - start
+            POWER_WAKE_SECONDS.labels(name).observe(elapsed)
+            POWER_TRANSITIONS.labels(name, "resume" if ok else "resume_failed").inc()
+            logger.info(f"Resumed {name} ({reason}) in {elapsed * 1000:.0f}ms")
+
+    async def wake(self, service: str):
+        """Relance les cibles nécessaires au service avant de traiter sa demande"""
+        pending = [
+            name for name in SERVICE_TARGETS.get(service, ())
+            if self.suspended.get(name)
+        ]
+        if pending:
+            await asyncio.gather(*(self.resume(name, f"request:{service}") for name in pending))
+
+    def get_stats(self) -> dict:
+        now = monotonic()
+        return {
+            "flags": dict(self.flags),
+            "targets": {
+                name: {
+                    "suspended": self.suspended[name],
+                    "idle_for": round(now - self.last_active[name], 1),
+                    "idle_after": target.idle_after,
+                    "eligible": self._eligible(target)
+                }
+                for name, target in self.targets.items()
+            }
+        }
+
+    async def cleanup(self):
+        self.websocket_manager.state.remove_listener(self._on_state)
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
@@ -0,0 +1,280 @@
+# backend/services/snapcast/connection.py
+import asyncio
+import itertools
+import json
+import logging
+import random
+from time import monotonic, perf_counter
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import websockets
+
+from monitoring import metrics
+from monitoring.metrics import UPSTREAM_ERRORS, UPSTREAM_SECONDS
+from services.snapcast.discovery import MDNS_AVAILABLE, discover_snapserver
+
+logger = logging.getLogger(__name__)
+
+SNAPSERVER_AVAILABLE = metrics.gauge(
+    "sonoak_snapserver_available", "Connexion au snapserver établie (1) ou non (0)"
+)
+SNAPSERVER_RECONNECTS = metrics.counter(
+    "sonoak_snapserver_connect_attempts_total", "Tentatives de connexion au snapserver", ["result"]
+)
+
+
+class SnapcastUnavailable(Exception):
+    """Le snapserver n'est pas joignable : l'appelant échoue tout de suite au lieu d'attendre"""
+
+
+class SnapcastConnection:
+    """
+    Connexion JSON-RPC supervisée vers snapserver.
+
+    Une tâche de fond établit la connexion, la surveille par des pings applicatifs
+    (Server.GetRPCVersion) et la rétablit avec un backoff exponentiel à gigue.
+    Les réponses sont associées aux requêtes par leur id ; les notifications du
+    serveur (Client.OnVolumeChanged, ...) sont transmises à `on_notification`.
+    """
+
+    PING_METHOD = "Server.GetRPCVersion"
+
+    def __init__(self, host: Optional[str] = None, port: int = 1780,
+                 on_availability: Optional[Callable[[bool], Awaitable]] = None,
+                 on_notification: Optional[Callable[[str, dict], Awaitable]] = None,
+                 on_rtt: Optional[Callable[[float], None]] = None,
+                 ping_interval: float = 5.0, request_timeout: float = 3.0,
+                 connect_timeout: float = 3.0, backoff_initial: float = 0.5,
+                 backoff_max: float = 30.0):
+        self.configured_host = host or None
+        self.port = port
+        self.host: Optional[str] = self.configured_host
+        self.on_availability = on_availability
+        self.on_notification = on_notification
+        self.on_rtt = on_rtt
+        self.ping_interval = ping_interval
+        self.request_timeout = request_timeout
+        self.connect_timeout = connect_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+
+        self.ws = None
+        self.available = False
+        self.last_error: Optional[str] = None
+        self.connected_since: Optional[float] = None
+        self.connect_attempts = 0
+        self.last_rtt: Optional[float] = None
+
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._available_event = asyncio.Event()
+        self._supervisor_task: Optional[asyncio.Task] = None
+        self._callback_tasks = set()
+
+    @property
+    def url(self) -> str:
+        return f'ws://{self.host}:{self.port}/jsonrpc'
+
+    def start(self):
+        if self.configured_host is None and not MDNS_AVAILABLE:
+            # Erreur de configuration : inutile de réessayer en boucle
+            self.last_error = "SONOAK_SNAPSERVER_HOST vide mais zeroconf non installé"
+            logger.error(f"Snapcast désactivé : {self.last_error} (configurer l'hôte ou installer zeroconf)")
+            return
+        if self._supervisor_task is None:
+            self._supervisor_task = asyncio.create_task(self._supervise())
+
+    async def wait_available(self, timeout: float) -> bool:
+        """Attend la première connexion (au démarrage), sans lever d'exception"""
+        try:
+            await asyncio.wait_for(self._available_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.available
+
+    async def _supervise(self):
+        attempt = 0
+        while True:
+            try:
+                if await self._connect():
+                    attempt = 0
+                    await self._run_connection()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"Connexion snapserver perdue: {e}")
+            finally:
+                await self._mark_down()
+
+            # Backoff exponentiel avec gigue complète : évite les reconnexions synchronisées
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_initial * 2 ** attempt))
+            attempt = min(attempt + 1, 16)
+            logger.debug(f"Nouvelle tentative de connexion snapserver dans {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def _connect(self) -> bool:
+        self.connect_attempts += 1
+        if self.configured_host is None:
+            discovered = await discover_snapserver()
+            if discovered is None:
+                self.last_error = "snapserver introuvable (mDNS)"
+                SNAPSERVER_RECONNECTS.labels("not_found").inc()
+                return False
+            self.host, self.port = discovered
+
+        try:
+            self.ws = await asyncio.wait_for(
+                websockets.connect(self.url, ping_interval=None, ping_timeout=None),
+                self.connect_timeout
+            )
+        except Exception as e:
+            self.last_error = str(e) or type(e).__name__
+            SNAPSERVER_RECONNECTS.labels("failure").inc()
+            logger.debug(f"Échec de connexion au snapserver {self.url}: {self.last_error}")
+            return False
+
+        SNAPSERVER_RECONNECTS.labels("success").inc()
+        logger.info(f"Nouvelle connexion WebSocket établie avec snapserver ({self.url})")
+        self.connected_since = monotonic()
+        self.last_error = None
+        self._set_available(True)
+        return True
+
+    async def _run_connection(self):
+        """Lit les messages et pingue jusqu'à la perte de la connexion"""
+        reader = asyncio.create_task(self._read_loop())
+        pinger = asyncio.create_task(self._ping_loop())
+        try:
+            done, _ = await asyncio.wait({reader, pinger}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in (reader, pinger):
+                task.cancel()
+            await asyncio.gather(reader, pinger, return_exceptions=True)
+
+    async def _read_loop(self):
+        async for raw in self.ws:
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                logger.warning("Message snapserver illisible ignoré")
+                continue
+            for item in message if isinstance(message, list) else [message]:
+                self._dispatch(item)
+
+    def _dispatch(self, item: dict):
+        if "id" in item and item["id"] is not None:
+            future = self._pending.pop(item["id"], None)
+            if future is not None and not future.done():
+                future.set_result(item)
+        elif "method" in item and self.on_notification:
+            self._spawn(self.on_notification(item["method"], item.get("params", {})))
+
+    async def _ping_loop(self):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            start = perf_counter()
+            # Un ping sans réponse lève TimeoutError et fait tomber la connexion
+            await self.request(self.PING_METHOD, timeout=self.request_timeout)
+            self.last_rtt = perf_counter() - start
+            if self.on_rtt:
+                self.on_rtt(self.last_rtt)
+
+    async def _mark_down(self):
+        ws, self.ws = self.ws, None
+        self.connected_since = None
+        if ws is not None:
+            try:
+                await ws.close()
+            except Exception:
+                pass
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(SnapcastUnavailable("connexion snapserver perdue"))
+        self._pending.clear()
+        if self.available:
+            self._set_available(False)
+
+    def _set_available(self, available: bool):
+        self.available = available
+        SNAPSERVER_AVAILABLE.set(1 if available else 0)
+        if available:
+            self._available_event.set()
+        else:
+            self._available_event.clear()
+        if self.on_availability:
+            self._spawn(self.on_availability(available))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._callback_tasks.add(task)
+        task.add_done_callback(self._callback_tasks.discard)
+
+    def _ensure_available(self):
+        if not self.available or self.ws is None:
+            raise SnapcastUnavailable(self.last_error or "snapserver non connecté")
+
+    async def request(self, method: str, params: Optional[dict] = None,
+                      timeout: Optional[float] = None) -> dict:
+        """
+        Envoie une requête JSON-RPC et retourne la réponse complète (result ou error).
+
+        Raises:
+            SnapcastUnavailable: immédiatement si la connexion est coupée.
+            asyncio.TimeoutError: si le serveur ne répond pas à temps.
+        """
+        return (await self.batch([(method, params)], timeout=timeout))[0]
+
+    async def batch(self, calls: List[Tuple[str, Optional[dict]]],
+                    timeout: Optional[float] = None) -> List[dict]:
+        """Envoie plusieurs requêtes en un seul message JSON-RPC (un aller-retour)"""
+        self._ensure_available()
+        loop = asyncio.get_running_loop()
+        requests, futures = [], []
+        for method, params in calls:
+            request_id = next(self._ids)
+            request = {"id": request_id, "jsonrpc": "2.0", "method": method}
+            if params is not None:
+                request["params"] = params
+            future = loop.create_future()
+            self._pending[request_id] = future
+            requests.append(request)
+            futures.append(future)
+
+        label = calls[0][0] if len(calls) == 1 else "batch"
+        payload = requests[0] if len(requests) == 1 else requests
+        start = perf_counter()
+        try:
+            await self.ws.send(json.dumps(payload))
+            responses = await asyncio.wait_for(
+                asyncio.gather(*futures), timeout or self.request_timeout
+            )
+        except Exception:
+            UPSTREAM_ERRORS.labels("snapserver", label).inc()
+            raise
+        finally:
+            for request in requests:
+                self._pending.pop(request["id"], None)
+        UPSTREAM_SECONDS.labels("snapserver", label).observe(perf_counter() - start)
+        return list(responses)
+
+    def get_health(self) -> Dict:
+        return {
+            "available": self.available,
+            "url": self.url if self.host else None,
+            "connected_for": round(monotonic() - self.connected_since, 1) if self.connected_since else None,
+            "connect_attempts": self.connect_attempts,
+            "last_error": self.last_error,
+            "last_rtt": round(self.last_rtt, 4) if self.last_rtt is not None else None
+        }
+
+    async def close(self):
+        if self._supervisor_task:
+            self._supervisor_task.cancel()
+            try:
+                await self._supervisor_task
+            except asyncio.CancelledError:
+                pass
+            self._supervisor_task = None
@@ -0,0 +1,49 @@
+# backend/services/snapcast/discovery.py
+import asyncio
+import logging
+from typing import Optional, Tuple
+
+try:
+    from zeroconf import ServiceStateChange
+    from zeroconf.asyncio import AsyncServiceBrowser, AsyncServiceInfo, AsyncZeroconf
+except ImportError:  # zeroconf est optionnel : sans lui, l'hôte doit être configuré
+    AsyncZeroconf = None
+
+MDNS_AVAILABLE = AsyncZeroconf is not None
+
+logger = logging.getLogger(__name__)
+
+# Snapserver annonce son serveur HTTP/WebSocket (JSON-RPC sur /jsonrpc) sous ce type
+SERVICE_TYPE = "_snapcast-http._tcp.local."
+
+
+async def discover_snapserver(timeout: float = 3.0) -> Optional[Tuple[str, int]]:
+    """Cherche un snapserver sur le réseau local via mDNS ; retourne (hôte, port) ou None"""
+    if AsyncZeroconf is None:
+        logger.warning("zeroconf non installé : découverte mDNS du snapserver impossible")
+        return None
+
+    loop = asyncio.get_running_loop()
+    found: asyncio.Future = loop.create_future()
+
+    def on_service_state_change(zeroconf, service_type, name, state_change):
+        if state_change is ServiceStateChange.Added:
+            loop.call_soon_threadsafe(lambda: found.done() or found.set_result(name))
+
+    aiozc = AsyncZeroconf()
+    browser = AsyncServiceBrowser(aiozc.zeroconf, [SERVICE_TYPE], handlers=[on_service_state_change])
+    try:
+        name = await asyncio.wait_for(found, timeout)
+        info = AsyncServiceInfo(SERVICE_TYPE, name)
+        if not await info.async_request(aiozc.zeroconf, int(timeout * 1000)):
+            return None
+        addresses = info.parsed_addresses()
+        if not addresses:
+            return None
+        logger.info(f"Snapserver découvert via mDNS: {name} ({addresses[0]}:{info.port})")
+        return addresses[0], info.port
+    except asyncio.TimeoutError:
+        return None
+    finally:
+        await browser.async_cancel()
+        await aiozc.async_close()
@@ -0,0 +1,128 @@
+# backend/services/snapcast/latency.py
+from collections import deque
+from time import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from monitoring import metrics
+
+SNAPSERVER_RTT = metrics.histogram(
+    "sonoak_snapserver_rtt_seconds", "Aller-retour du canal de contrôle vers snapserver",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def describe_stream(stream: Dict) -> Dict:
+    """Extrait codec, format et tampon de la définition d'un flux snapserver"""
+    uri = stream.get("uri", {})
+    raw = uri.get("raw", "")
+    query = uri.get("query") or {k: v[0] for k, v in parse_qs(urlparse(raw).query).items()}
+    sampleformat = query.get("sampleformat", "")
+    rate, bits, channels = (sampleformat.split(":") + ["", "", ""])[:3]
+    return {
+        "id": stream.get("id"),
+        "status": stream.get("status"),
+        "scheme": uri.get("scheme") or urlparse(raw).scheme,
+        "codec": query.get("codec"),
+        "sampleformat": sampleformat or None,
+        "sample_rate": int(rate) if rate.isdigit() else None,
+        "bits": int(bits) if bits.isdigit() else None,
+        "channels": int(channels) if channels.isdigit() else None,
+        "chunk_ms": int(query["chunk_ms"]) if str(query.get("chunk_ms", "")).isdigit() else None,
+        "buffer_ms": int(query["buffer"]) if str(query.get("buffer", "")).isdigit() else None,
+        "properties": stream.get("properties", {})
+    }
+
+
+class LatencyTracker:
+    """
+    Historique de l'aller-retour (RTT) du canal de contrôle vers snapserver et
+    suggestions de latence par pièce.
+
+    Les RTT viennent des pings applicatifs de la connexion supervisée. Les retards
+    acoustiques par client (mesurés au micro, en ms) peuvent être fournis : ils
+    priment alors sur les réglages actuels pour proposer les décalages.
+    """
+
+    def __init__(self, history_size: int = 720):
+        # 720 pings à 5s : une heure d'historique
+        self.samples: deque = deque(maxlen=history_size)
+        self.measured_delays: Dict[str, float] = {}
+
+    def record_rtt(self, rtt: float):
+        self.samples.append((time(), rtt))
+        SNAPSERVER_RTT.observe(rtt)
+
+    def rtt_summary(self, window: Optional[float] = None) -> Dict:
+        since = time() - window if window else 0
+        values = sorted(rtt for ts, rtt in self.samples if ts >= since)
+        if not values:
+            return {"samples": 0}
+        p50 = _percentile(values, 0.5)
+        p95 = _percentile(values, 0.95)
+        return {
+            "samples": len(values),
+            "min_ms": round(values[0] * 1000, 2),
+            "p50_ms": round(p50 * 1000, 2),
+            "p95_ms": round(p95 * 1000, 2),
+            "p99_ms": round(_percentile(values, 0.99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+            "jitter_ms": round((p95 - p50) * 1000, 2)
+        }
+
+    def rtt_history(self, limit: int = 120) -> List[Dict]:
+        return [{"ts": round(ts, 3), "rtt_ms": round(rtt * 1000, 2)} for ts, rtt in list(self.samples)[-limit:]]
+
+    def set_measured_delays(self, delays: Dict[str, float]):
+        self.measured_delays.update({client_id: float(d) for client_id, d in delays.items()})
+
+    def clear_measured_delays(self):
+        """Les mesures ne valent que pour les réglages avec lesquels elles ont été faites"""
+        self.measured_delays.clear()
+
+    def suggest(self, clients: List[Dict], streams: List[Dict]) -> Dict:
+        """
+        Propose une latence par client et une marge de tampon.
+
+        Avec des retards mesurés (réglages actuels appliqués) : la latence snapcast fait
+        jouer le client plus tôt, donc chaque pièce est avancée de son retard sur la plus
+        rapide (actuel + retard - min). Sans mesure : les réglages actuels sont ramenés à
+        un minimum de 0, le décalage commun ne faisant que consommer du tampon.
+        """
+        measured = {c["id"]: self.measured_delays[c["id"]] for c in clients if c["id"] in self.measured_delays}
+        suggestions = {}
+        if measured:
+            fastest = min(measured.values())
+            for client in clients:
+                if client["id"] in measured:
+                    suggestions[client["id"]] = {
+                        "current": client["latency"],
+                        "suggested": round(client["latency"] + measured[client["id"]] - fastest),
+                        "basis": "measured"
+                    }
+        else:
+            common = min((c["latency"] for c in clients), default=0)
+            for client in clients:
+                suggestions[client["id"]] = {
+                    "current": client["latency"],
+                    "suggested": client["latency"] - common,
+                    "basis": "normalized"
+                }
+
+        rtt = self.rtt_summary()
+        chunk_ms = max((s["chunk_ms"] or 0 for s in map(describe_stream, streams)), default=0)
+        max_offset = max((s["suggested"] for s in suggestions.values()), default=0)
+        # Tampon conseillé : décalage maximal + 4 chunks + deux fois la gigue réseau observée
+        recommended_buffer = max_offset + 4 * (chunk_ms or 20) + 2 * rtt.get("jitter_ms", 0)
+        return {
+            "clients": suggestions,
+            "rtt": rtt,
+            "recommended_min_buffer_ms": round(recommended_buffer)
+        }
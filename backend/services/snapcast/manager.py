@@ -1,137 +1,136 @@
 import asyncio
-import json
-import websockets
-from typing import List, Dict
-import traceback
+import logging
+from typing import Dict, List, Optional, Tuple
+import config
+from monitoring.journal import journal
 from services.audio.manager import AudioSource
+from services.snapcast.connection import SnapcastConnection, SnapcastUnavailable
+from services.snapcast.state import SnapcastStateMirror, scale_group_volumes
+from services.snapcast.latency import LatencyTracker, describe_stream
+
+logger = logging.getLogger(__name__)
+
+# Notifications snapserver qui modifient la liste des clients connectés
+CLIENT_LIST_NOTIFICATIONS = {"Client.OnConnect", "Client.OnDisconnect", "Server.OnUpdate"}
 
 class SnapcastManager:
     def __init__(self, websocket_manager, audio_manager=None):
-        print("Initialisation du SnapcastManager...")
+        logger.info("Initialisation du SnapcastManager...")
         self.websocket_manager = websocket_manager
         self.audio_manager = audio_manager
         self.clients = []
         self.server_info = None
-        self.snapserver_host = "192.168.1.173"
-        self.snapserver_port = 1780
         self.server_available = False
-        self.ws = None
+        # Copie locale de l'état du serveur, tenue à jour par notifications et réponses
+        self.state = SnapcastStateMirror()
+        # Historique du RTT vers snapserver et suggestions de latence par pièce
+        self.latency = LatencyTracker()
+        # Connexion supervisée : reconnexion en arrière-plan, échec immédiat si coupée
+        self.connection = SnapcastConnection(
+            host=config.SNAPSERVER_HOST,
+            port=config.SNAPSERVER_PORT,
+            on_availability=self._on_availability_changed,
+            on_notification=self._on_notification,
+            on_rtt=self.latency.record_rtt,
+            ping_interval=config.SNAPSERVER_PING_INTERVAL,
+            request_timeout=config.SNAPSERVER_REQUEST_TIMEOUT,
+            backoff_max=config.SNAPSERVER_BACKOFF_MAX
+        )
 
-    async def ensure_connection(self):
-        """S'assure que la connexion WebSocket est établie"""
-        try:
-            if self.ws is None:
-                self.ws = await websockets.connect(
-                    f'ws://{self.snapserver_host}:{self.snapserver_port}/jsonrpc',
-                    ping_interval=None,
-                    ping_timeout=None
-                )
-                print("Nouvelle connexion WebSocket établie avec snapserver")
-                self.server_available = True
-                return True
-            return True
-        except Exception as e:
-            print(f"Erreur de connexion WebSocket: {e}")
-            self.server_available = False
-            self.ws = None
-            return False
+    async def start(self, wait: float = 2.0):
+        """Démarre le superviseur de connexion et récupère l'état initial"""
+        self.connection.start()
+        if await self.connection.wait_available(wait):
+            await self.get_clients_status()
+        else:
+            # L'état sera récupéré à la connexion (voir _on_availability_changed)
+            await self.notify_clients_status()
+
+    async def _on_availability_changed(self, available: bool):
+        """Publie les transitions de disponibilité du snapserver"""
+        self.server_available = available
+        logger.info(f"Snapserver {'disponible' if available else 'indisponible'}")
+        if available:
+            await self.get_clients_status()
+        else:
+            await self.notify_clients_status()
+
+    async def _on_notification(self, method: str, params: dict):
+        """Notifications poussées par snapserver"""
+        logger.debug("Notification snapserver", extra={"method": method, "params": params})
+        journal.record("snapserver", {"method": method, "params": params})
+        if not self.state.apply_notification(method, params):
+            # Élément inconnu du miroir (nouveau client, ...) : rechargement complet
+            await self.get_clients_status()
+        elif method in CLIENT_LIST_NOTIFICATIONS:
+            await self._sync_clients()
+        else:
+            await self.notify_clients_status()
 
     async def send_command(self, command: dict) -> dict:
         """Envoie une commande via WebSocket et retourne la réponse"""
         try:
-            if not await self.ensure_connection():
-                return None
-
-            print(f"Envoi de la commande: {command}")
-            await self.ws.send(json.dumps(command))
-            response = await self.ws.recv()
-            print(f"Réponse reçue: {response}")
-            return json.loads(response)
+            logger.debug("Envoi de la commande", extra={"command": command})
+            response = await self.connection.request(command["method"], command.get("params"))
+            logger.debug("Réponse reçue", extra={"response": response})
+            return response
+        except SnapcastUnavailable as e:
+            logger.debug(f"Snapserver indisponible, commande ignorée: {e}")
+            return None
         except Exception as e:
-            print(f"Erreur lors de l'envoi de la commande: {e}")
-            self.ws = None
-            self.server_available = False
+            logger.error(f"Erreur lors de l'envoi de la commande: {e}")
             return None
 
-    async def get_server_info(self):
-        """Récupère les informations détaillées du serveur"""
+    async def refresh_state(self) -> bool:
+        """Recharge le miroir d'état avec un seul Server.GetStatus"""
+        response = await self.send_command({"method": "Server.GetStatus"})
+        if not response or "result" not in response:
+            return False
         try:
-            status_command = {
-                "id": 2,
-                "jsonrpc": "2.0",
-                "method": "Server.GetStatus"
-            }
-            status_response = await self.send_command(status_command)
-            
-            if status_response and "result" in status_response:
-                server_status = status_response["result"]["server"]
-                host_info = server_status.get("server", {}).get("host", {})
-                
-                # Récupérer le nom et appliquer les transformations
-                server_name = host_info.get("name", "Unknown")
-                server_name = server_name.replace(".local", "")  # Retirer .local
-                server_name = server_name.replace("-", " ")      # Remplacer les tirets par des espaces
-                
-                self.server_info = {
-                    "name": server_name,
-                    "os": host_info.get("os", "Unknown"),
-                    "arch": host_info.get("arch", "Unknown")
-                }
-                print(f"Server info updated: {self.server_info}")
-                return True
-                
+            self.state.load(response["result"]["server"])
+            self._update_server_info()
+            return True
         except Exception as e:
-            print(f"Erreur lors de la récupération des informations serveur: {e}")
-            traceback.print_exc()
+            logger.error(f"Erreur lors du traitement de la réponse: {e}", exc_info=True)
             return False
 
+    def _update_server_info(self):
+        """Dérive les informations serveur affichées du miroir d'état"""
+        host_info = self.state.server.get("host", {})
+
+        # Récupérer le nom et appliquer les transformations
+        server_name = host_info.get("name", "Unknown")
+        server_name = server_name.replace(".local", "")  # Retirer .local
+        server_name = server_name.replace("-", " ")      # Remplacer les tirets par des espaces
+
+        self.server_info = {
+            "name": server_name,
+            "os": host_info.get("os", "Unknown"),
+            "arch": host_info.get("arch", "Unknown")
+        }
+        logger.debug("Server info updated", extra={"server_info": self.server_info})
+
     async def get_clients_status(self):
-            """Récupère le statut des clients et du serveur Snapcast"""
-            # D'abord obtenir les infos serveur
-            await self.get_server_info()
-            
-            command = {
-                "id": 3,
-                "jsonrpc": "2.0",
-                "method": "Server.GetStatus"
-            }
-            
-            response = await self.send_command(command)
-            if response and "result" in response:
-                try:
-                    server_status = response["result"]["server"]
-                    old_clients_count = len(self.clients)
-                    
-                    # Mise à jour des clients
-                    self.clients = []
-                    if "groups" in server_status:
-                        for group in server_status["groups"]:
-                            for client in group["clients"]:
-                                if client["connected"]:
-                                    client_info = {
-                                        "id": client["id"],
-                                        "host": client["host"]["name"],
-                                        "connected": client["connected"]
-                                    }
-                                    self.clients.append(client_info)
-                    
-                    # Si on passe de 0 à des clients connectés
-                    if old_clients_count == 0 and len(self.clients) > 0:
-                        if self.audio_manager:
-                            await self.audio_manager.switch_source(AudioSource.MACOS)
-                    # Si on passe de clients connectés à 0
-                    elif old_clients_count > 0 and len(self.clients) == 0:
-                        if self.audio_manager:
-                            await self.audio_manager.switch_source(AudioSource.NONE)
-                    
-                    await self.notify_clients_status()
-                    return True
-                except Exception as e:
-                    print(f"Erreur lors du traitement de la réponse: {e}")
-                    traceback.print_exc()
-            
-            await self.notify_clients_status()
-            return False
+        """Récupère le statut des clients et du serveur Snapcast"""
+        success = await self.refresh_state()
+        await self._sync_clients()
+        return success
+
+    async def _sync_clients(self):
+        """Met à jour la liste des clients connectés depuis le miroir et change de source si besoin"""
+        old_clients_count = len(self.clients)
+        self.clients = self.state.connected_clients()
+
+        # Si on passe de 0 à des clients connectés
+        if old_clients_count == 0 and len(self.clients) > 0:
+            if self.audio_manager:
+                await self.audio_manager.switch_source(AudioSource.MACOS)
+        # Si on passe de clients connectés à 0
+        elif old_clients_count > 0 and len(self.clients) == 0:
+            if self.audio_manager:
+                await self.audio_manager.switch_source(AudioSource.NONE)
+
+        await self.notify_clients_status()
 
     async def notify_clients_status(self):
         """Envoie la liste des clients et les infos serveur au frontend"""
@@ -139,14 +138,15 @@ class SnapcastManager:
             "type": "clients_status",
             "clients": self.clients,
             "server_available": self.server_available,
-            "server_info": self.server_info
+            "server_info": self.server_info,
+            "groups": self.state.groups_summary()
         }
-        print(f"Envoi du statut Snapcast: {message}")
+        logger.debug("Envoi du statut Snapcast", extra={"payload": message})
         await self.websocket_manager.broadcast_to_service(message, "snapcast")
 
     async def handle_message(self, message: dict):
         """Gère les messages du frontend"""
-        print(f"Message Snapcast reçu: {message}")
+        logger.debug("Message Snapcast reçu", extra={"payload": message})
         message_type = message.get("type")
         
         if message_type == "get_status":
@@ -154,20 +154,143 @@ class SnapcastManager:
             
             # Vérifier si la source audio actuelle est déjà sur MACOS
             if self.audio_manager and self.audio_manager.current_source == AudioSource.MACOS:
-                print("La source audio est déjà sur MacOS, reconfirmation...")
+                logger.info("La source audio est déjà sur MacOS, reconfirmation...")
                 await self.audio_manager.switch_source(AudioSource.MACOS)
 
+        elif message_type == "set_client_volume":
+            await self.set_client_volume(message["client_id"], message["volume"])
+
+        elif message_type == "set_clients_volume":
+            await self.set_clients_volume(message["volumes"])
+
+        elif message_type == "set_client_mute":
+            await self.set_client_mute(message["client_id"], bool(message["muted"]))
+
+        elif message_type == "set_group_volume":
+            await self.set_group_volume(message["group_id"], message["volume"])
+
+        elif message_type == "set_group_mute":
+            await self.set_group_mute(message["group_id"], bool(message["muted"]))
+
+        elif message_type == "set_all_volume":
+            await self.set_all_volume(message["volume"])
+
+        elif message_type == "set_client_latency":
+            await self.set_client_latency(message["client_id"], message["latency"])
+
+    async def send_batch(self, calls: List[Tuple[str, Dict]]) -> bool:
+        """Envoie plusieurs commandes en un aller-retour et fusionne les réponses dans le miroir"""
+        if not calls:
+            return True
+        try:
+            logger.debug("Envoi d'un batch", extra={"calls": calls})
+            responses = await self.connection.batch(calls)
+        except SnapcastUnavailable as e:
+            logger.debug(f"Snapserver indisponible, batch ignoré: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Erreur lors de l'envoi du batch: {e}")
+            return False
+
+        success = True
+        for (method, params), response in zip(calls, responses):
+            if "result" in response:
+                self.state.apply_response(method, params, response["result"])
+            else:
+                success = False
+                logger.error(f"Erreur snapserver pour {method}: {response.get('error')}")
+
+        await self.notify_clients_status()
+        return success
+
+    def _volume_call(self, client_id: str, percent: int, muted: Optional[bool] = None) -> Tuple[str, Dict]:
+        current = self.state.client_volume(client_id) or {"muted": False}
+        return ("Client.SetVolume", {
+            "id": client_id,
+            "volume": {
+                "muted": current["muted"] if muted is None else muted,
+                "percent": max(0, min(100, int(percent)))
+            }
+        })
+
     async def set_client_volume(self, client_id: str, volume: int) -> bool:
         """Modifie le volume d'un client"""
-        command = {
-            "id": 2,
-            "jsonrpc": "2.0",
-            "method": "Client.SetVolume",
-            "params": {
-                "id": client_id,
-                "volume": {"muted": False, "percent": volume}
-            }
+        return await self.send_batch([self._volume_call(client_id, volume, muted=False)])
+
+    async def set_clients_volume(self, volumes: Dict[str, int]) -> bool:
+        """Modifie le volume de plusieurs clients en un seul aller-retour"""
+        return await self.send_batch([
+            self._volume_call(client_id, volume) for client_id, volume in volumes.items()
+        ])
+
+    async def set_client_mute(self, client_id: str, muted: bool) -> bool:
+        """Coupe ou rétablit le son d'un client sans changer son volume"""
+        current = self.state.client_volume(client_id)
+        if current is None:
+            return False
+        return await self.send_batch([self._volume_call(client_id, current["percent"], muted=muted)])
+
+    async def set_group_volume(self, group_id: str, volume: int) -> bool:
+        """Règle le volume d'un groupe en conservant les écarts entre ses clients"""
+        group = self.state.groups.get(group_id)
+        if group is None:
+            return False
+        current = {c["id"]: c["config"]["volume"]["percent"] for c in group.get("clients", [])}
+        scaled = scale_group_volumes(current, volume)
+        return await self.set_clients_volume(
+            {client_id: v for client_id, v in scaled.items() if v != current[client_id]}
+        )
+
+    async def set_group_mute(self, group_id: str, muted: bool) -> bool:
+        """Coupe ou rétablit le son d'un groupe"""
+        if group_id not in self.state.groups:
+            return False
+        return await self.send_batch([("Group.SetMute", {"id": group_id, "mute": muted})])
+
+    async def set_all_volume(self, volume: int) -> bool:
+        """Règle toutes les pièces connectées au même volume, en un seul aller-retour"""
+        return await self.set_clients_volume({client["id"]: volume for client in self.clients})
+
+    async def set_client_latency(self, client_id: str, latency: int) -> bool:
+        """Règle le décalage de lecture d'un client (ms)"""
+        return await self.set_clients_latency({client_id: latency})
+
+    async def set_clients_latency(self, latencies: Dict[str, int]) -> bool:
+        """Règle le décalage de plusieurs clients en un seul aller-retour"""
+        return await self.send_batch([
+            ("Client.SetLatency", {"id": client_id, "latency": int(latency)})
+            for client_id, latency in latencies.items()
+        ])
+
+    def get_streams(self) -> List[Dict]:
+        """Codec, format et tampon de chaque flux, depuis le miroir d'état"""
+        return [describe_stream(stream) for stream in self.state.streams.values()]
+
+    def get_latency_report(self) -> Dict:
+        """Latences actuelles, RTT mesuré et décalages suggérés par pièce"""
+        clients = [
+            {**client, "group_id": group["id"]}
+            for group in self.state.groups_summary()
+            for client in group["clients"]
+        ]
+        return {
+            "clients": clients,
+            "streams": self.get_streams(),
+            "suggestions": self.latency.suggest(clients, list(self.state.streams.values()))
         }
 
-        response = await self.send_command(command)
-        return response is not None
\ No newline at end of file
+    async def apply_latency_suggestions(self) -> bool:
+        """Applique les décalages suggérés qui diffèrent du réglage actuel"""
+        suggestions = self.get_latency_report()["suggestions"]["clients"]
+        success = await self.set_clients_latency({
+            client_id: s["suggested"] for client_id, s in suggestions.items()
+            if s["suggested"] != s["current"]
+        })
+        if success:
+            # Mesures faites avec les anciens réglages : les réappliquer doublerait la correction
+            self.latency.clear_measured_delays()
+        return success
+
+    async def cleanup(self):
+        """Ferme la connexion supervisée"""
+        await self.connection.close()
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict
+from fastapi import APIRouter, HTTPException, Request
+from typing import Dict, Optional
+
+from websocket.http_cache import content_response
 
 router = APIRouter()
 
@@ -11,19 +13,169 @@ def init_routes(manager):
     snapcast_manager = manager
 
 @router.get("/status")
-async def get_status():
-    """Récupère l'état actuel des clients Snapcast"""
+async def get_status(request: Request, since: Optional[str] = None, timeout: float = 25.0):
+    """
+    Récupère l'état actuel des clients Snapcast depuis le miroir (tenu à jour par les
+    notifications) ; ETag/If-None-Match et long-poll via ?since=<X-State-Version>.
+    Versionné par le contenu : les get_status périodiques du kiosque rediffusent
+    un état inchangé, ce qui ne doit ni changer l'ETag ni réveiller le long-poll
+    """
     if not snapcast_manager:
         raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
-    
-    success = await snapcast_manager.get_clients_status()
+
+    store = snapcast_manager.websocket_manager.state
+    if store.version("snapcast") == 0:
+        # Aucun état diffusé encore : premier chargement depuis le serveur
+        success = await snapcast_manager.get_clients_status()
+        if not success:
+            raise HTTPException(status_code=500, detail="Failed to get Snapcast status")
+
+    return await content_response(
+        request, store, "snapcast", lambda: {"clients": snapcast_manager.clients}, since, timeout
+    )
+
+@router.get("/health")
+async def get_health():
+    """État de la connexion supervisée au snapserver"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
+    return snapcast_manager.connection.get_health()
+
+@router.get("/groups")
+async def get_groups():
+    """Groupes, clients et volumes issus du miroir d'état (sans requête au serveur)"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
+    return {"groups": snapcast_manager.state.groups_summary()}
+
+@router.post("/volume")
+async def set_clients_volume(volumes: Dict[str, int]):
+    """Modifie le volume de plusieurs clients en un seul aller-retour ({client_id: volume})"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
+    if any(volume < 0 or volume > 100 for volume in volumes.values()):
+        raise HTTPException(status_code=400, detail="Volume must be between 0 and 100")
+
+    success = await snapcast_manager.set_clients_volume(volumes)
     if not success:
-        raise HTTPException(status_code=500, detail="Failed to get Snapcast status")
-    
+        raise HTTPException(status_code=500, detail="Failed to set clients volume")
+
+    return {"success": True}
+
+@router.post("/volume/all")
+async def set_all_volume(volume: int):
+    """Règle toutes les pièces connectées au même volume"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
+    if volume < 0 or volume > 100:
+        raise HTTPException(status_code=400, detail="Volume must be between 0 and 100")
+
+    success = await snapcast_manager.set_all_volume(volume)
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to set volume")
+
+    return {"success": True}
+
+@router.post("/groups/{group_id}/volume")
+async def set_group_volume(group_id: str, volume: int):
+    """Règle le volume d'un groupe (répartition proportionnelle entre ses clients)"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
+    if volume < 0 or volume > 100:
+        raise HTTPException(status_code=400, detail="Volume must be between 0 and 100")
+
+    if group_id not in snapcast_manager.state.groups:
+        raise HTTPException(status_code=404, detail="Unknown group")
+
+    success = await snapcast_manager.set_group_volume(group_id, volume)
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to set group volume")
+
+    return {"success": True}
+
+@router.post("/groups/{group_id}/mute")
+async def set_group_mute(group_id: str, muted: bool):
+    """Coupe ou rétablit le son d'un groupe"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
+    if group_id not in snapcast_manager.state.groups:
+        raise HTTPException(status_code=404, detail="Unknown group")
+
+    success = await snapcast_manager.set_group_mute(group_id, muted)
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to set group mute")
+
+    return {"success": True}
+
+@router.get("/streams")
+async def get_streams():
+    """Flux du snapserver : codec, format d'échantillonnage, chunk et tampon"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
+    return {"streams": snapcast_manager.get_streams()}
+
+@router.get("/latency")
+async def get_latency():
+    """Latences par client, RTT du canal de contrôle et décalages suggérés"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
+    return snapcast_manager.get_latency_report()
+
+@router.get("/latency/rtt")
+async def get_rtt_history(limit: int = 120, window: Optional[float] = None):
+    """Historique des RTT vers snapserver"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
     return {
-        "clients": snapcast_manager.clients
+        "summary": snapcast_manager.latency.rtt_summary(window),
+        "history": snapcast_manager.latency.rtt_history(limit)
     }
 
+@router.post("/latency/measurements")
+async def set_latency_measurements(delays: Dict[str, float]):
+    """Enregistre les retards acoustiques mesurés par client ({client_id: ms})"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
+    snapcast_manager.latency.set_measured_delays(delays)
+    return snapcast_manager.get_latency_report()["suggestions"]
+
+@router.post("/latency/apply")
+async def apply_latency_suggestions():
+    """Applique les décalages suggérés en un seul aller-retour"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
+    success = await snapcast_manager.apply_latency_suggestions()
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to apply latency suggestions")
+
+    return {"success": True}
+
+@router.post("/clients/{client_id}/latency")
+async def set_client_latency(client_id: str, latency: int):
+    """Règle le décalage de lecture d'un client (Client.SetLatency, en ms)"""
+    if not snapcast_manager:
+        raise HTTPException(status_code=500, detail="Snapcast manager not initialized")
+
+    if latency < 0 or latency > 10000:
+        raise HTTPException(status_code=400, detail="Latency must be between 0 and 10000 ms")
+
+    success = await snapcast_manager.set_client_latency(client_id, latency)
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to set client latency")
+
+    return {"success": True}
+
 @router.post("/volume/{client_id}")
 async def set_client_volume(client_id: str, volume: int):
     """Modifie le volume d'un client Snapcast"""
@@ -0,0 +1,201 @@
+# backend/services/snapcast/state.py
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def scale_group_volumes(volumes: Dict[str, int], target: int) -> Dict[str, int]:
+    """
+    Répartit un volume de groupe sur ses clients, comme les applications Snapcast.
+
+    Le volume d'un groupe est la moyenne de ses clients. En baissant, chaque client
+    perd la même proportion de son volume ; en montant, chacun gagne la même
+    proportion de sa marge jusqu'à 100. Les écarts entre pièces sont ainsi conservés.
+    """
+    if not volumes:
+        return {}
+    target = max(0, min(100, target))
+    current = sum(volumes.values()) / len(volumes)
+    if target == current:
+        return dict(volumes)
+
+    result = {}
+    if target < current:
+        ratio = (current - target) / current
+        for client_id, volume in volumes.items():
+            result[client_id] = round(volume - ratio * volume)
+    else:
+        ratio = (target - current) / (100 - current)
+        for client_id, volume in volumes.items():
+            result[client_id] = round(volume + ratio * (100 - volume))
+    return {client_id: max(0, min(100, v)) for client_id, v in result.items()}
+
+
+class SnapcastStateMirror:
+    """
+    Copie locale de l'état du snapserver (groupes, clients, flux).
+
+    Chargée depuis Server.GetStatus puis tenue à jour par les notifications du
+    serveur et par les réponses des commandes envoyées, sans nouvelle requête.
+    """
+
+    def __init__(self):
+        self.server: Dict = {}
+        self.groups: Dict[str, Dict] = {}
+        self.clients: Dict[str, Dict] = {}
+        self.streams: Dict[str, Dict] = {}
+        self.client_group: Dict[str, str] = {}
+        self.version = 0
+
+    def load(self, server_status: Dict):
+        """Remplace le miroir par le résultat de Server.GetStatus"""
+        self.server = server_status.get("server", {})
+        self.groups = {}
+        self.clients = {}
+        self.client_group = {}
+        for group in server_status.get("groups", []):
+            self._index_group(group)
+        self.streams = {stream["id"]: stream for stream in server_status.get("streams", [])}
+        self.version += 1
+
+    def _index_group(self, group: Dict):
+        self.groups[group["id"]] = group
+        for client in group.get("clients", []):
+            self.clients[client["id"]] = client
+            self.client_group[client["id"]] = group["id"]
+
+    def group_of(self, client_id: str) -> Optional[Dict]:
+        group_id = self.client_group.get(client_id)
+        return self.groups.get(group_id) if group_id else None
+
+    def client_volume(self, client_id: str) -> Optional[Dict]:
+        client = self.clients.get(client_id)
+        return client["config"]["volume"] if client else None
+
+    def group_volume(self, group_id: str) -> Optional[int]:
+        group = self.groups.get(group_id)
+        if not group or not group.get("clients"):
+            return None
+        volumes = [c["config"]["volume"]["percent"] for c in group["clients"]]
+        return round(sum(volumes) / len(volumes))
+
+    # --- Fusion des notifications et des réponses ---
+
+    def apply_notification(self, method: str, params: Dict) -> bool:
+        """Applique une notification snapserver ; retourne False si un rechargement complet est nécessaire"""
+        changed = self._apply(method, params)
+        if changed is None:
+            return False
+        if changed:
+            self.version += 1
+        return True
+
+    def apply_response(self, method: str, params: Dict, result) -> bool:
+        """Fusionne la réponse d'une commande Set* dans le miroir"""
+        if method == "Client.SetVolume" and isinstance(result, dict) and "volume" in result:
+            return self.apply_notification("Client.OnVolumeChanged", {"id": params["id"], "volume": result["volume"]})
+        if method == "Client.SetLatency" and isinstance(result, dict) and "latency" in result:
+            return self.apply_notification("Client.OnLatencyChanged", {"id": params["id"], "latency": result["latency"]})
+        if method == "Client.SetName" and isinstance(result, dict) and "name" in result:
+            return self.apply_notification("Client.OnNameChanged", {"id": params["id"], "name": result["name"]})
+        if method == "Group.SetMute" and isinstance(result, dict) and "mute" in result:
+            return self.apply_notification("Group.OnMute", {"id": params["id"], "mute": result["mute"]})
+        if method == "Group.SetStream" and isinstance(result, dict) and "stream_id" in result:
+            return self.apply_notification("Group.OnStreamChanged", {"id": params["id"], "stream_id": result["stream_id"]})
+        if method in ("Group.SetClients", "Server.DeleteClient") and isinstance(result, dict) and "server" in result:
+            self.load(result["server"])
+            return True
+        return False
+
+    def _apply(self, method: str, params: Dict) -> Optional[bool]:
+        if method == "Server.OnUpdate":
+            self.load(params.get("server", {}))
+            return True
+
+        if method in ("Client.OnConnect", "Client.OnDisconnect"):
+            client = params.get("client")
+            if not client or client["id"] not in self.clients:
+                return None  # Nouveau client : sa place dans les groupes est inconnue
+            self.clients[client["id"]].clear()
+            self.clients[client["id"]].update(client)
+            return True
+
+        if method.startswith("Client."):
+            client = self.clients.get(params.get("id"))
+            if client is None:
+                return None
+            config = client.setdefault("config", {})
+            if method == "Client.OnVolumeChanged":
+                config["volume"] = params["volume"]
+            elif method == "Client.OnLatencyChanged":
+                config["latency"] = params["latency"]
+            elif method == "Client.OnNameChanged":
+                config["name"] = params["name"]
+            else:
+                return False
+            return True
+
+        if method.startswith("Group."):
+            group = self.groups.get(params.get("id"))
+            if group is None:
+                return None
+            if method == "Group.OnMute":
+                group["muted"] = params["mute"]
+            elif method == "Group.OnStreamChanged":
+                group["stream_id"] = params["stream_id"]
+            elif method == "Group.OnNameChanged":
+                group["name"] = params["name"]
+            else:
+                return False
+            return True
+
+        if method == "Stream.OnUpdate":
+            stream = params.get("stream")
+            if stream:
+                self.streams[stream["id"]] = stream
+            return True
+        if method == "Stream.OnProperties":
+            stream = self.streams.get(params.get("id"))
+            if stream is not None:
+                stream["properties"] = params.get("properties", {})
+            return True
+
+        return False
+
+    # --- Vues pour le frontend ---
+
+    def connected_clients(self) -> List[Dict]:
+        return [
+            {
+                "id": client["id"],
+                "host": client["host"]["name"],
+                "connected": client["connected"]
+            }
+            for client in self.clients.values() if client.get("connected")
+        ]
+
+    def groups_summary(self) -> List[Dict]:
+        summary = []
+        for group in self.groups.values():
+            clients = [
+                {
+                    "id": client["id"],
+                    "name": client["config"].get("name") or client["host"]["name"],
+                    "connected": client.get("connected", False),
+                    "volume": client["config"]["volume"]["percent"],
+                    "muted": client["config"]["volume"]["muted"],
+                    "latency": client["config"].get("latency", 0)
+                }
+                for client in group.get("clients", [])
+            ]
+            summary.append({
+                "id": group["id"],
+                "name": group.get("name", ""),
+                "stream_id": group.get("stream_id"),
+                "muted": group.get("muted", False),
+                "volume": self.group_volume(group["id"]),
+                "clients": clients
+            })
+        return summary
+
@@ -1,17 +1,24 @@
 import asyncio
 import json
+import logging
+import config
 import aiohttp
 from typing import List, Dict
-import traceback
 from services.audio.manager import AudioSource
+from services.spotify.status_fetcher import LibrespotStatusFetcher
+
+logger = logging.getLogger(__name__)
 
 class SpotifyManager:
     def __init__(self, websocket_manager, audio_manager=None):
-        print("Initialisation du SpotifyManager...")
+        logger.info("Initialisation du SpotifyManager...")
         self.websocket_manager = websocket_manager
         self.audio_manager = audio_manager
-        self.librespot_host = "localhost"
-        self.librespot_port = 3678
+        self.librespot_host = config.LIBRESPOT_HOST
+        self.librespot_port = config.LIBRESPOT_PORT
+        # Source unique du statut go-librespot, partagée avec SpotifyPlayerManager
+        self.status_fetcher = LibrespotStatusFetcher(self.librespot_host, self.librespot_port)
+        self.poll_interval = 2
         self.current_status = {
             "connected": False,
             "username": None,
@@ -22,7 +29,7 @@ class SpotifyManager:
 
     async def connect_to_events(self):
         """Initialise la connexion avec go-librespot et démarre le polling"""
-        print(f"Initialisation de la connexion avec go-librespot sur {self.librespot_host}:{self.librespot_port}")
+        logger.info(f"Initialisation de la connexion avec go-librespot sur {self.librespot_host}:{self.librespot_port}")
         if not self.initialized:
             await self.get_status()  # Récupérer immédiatement le statut de connexion
             self.start_polling()
@@ -32,50 +39,27 @@ class SpotifyManager:
         """Démarre la vérification périodique du statut"""
         if self.polling_task is None:
             self.polling_task = asyncio.create_task(self.poll_status())
-            print("Démarrage du polling du statut Spotify")
+            logger.info("Démarrage du polling du statut Spotify")
 
     async def poll_status(self):
         """Vérifie périodiquement le statut"""
         while True:
             try:
-                await self.get_status()
-                await asyncio.sleep(2)  # Vérifie toutes les 2 secondes
+                # Réutilise la réponse du polling de lecture si elle est assez récente
+                await self.get_status(max_age=self.poll_interval)
+                await asyncio.sleep(self.poll_interval)
             except Exception as e:
-                print(f"Erreur lors du polling: {e}")
-                await asyncio.sleep(2)
+                logger.error(f"Erreur lors du polling: {e}")
+                await asyncio.sleep(self.poll_interval)
 
-    async def get_status(self):
+    async def get_status(self, max_age: float = None):
         """Récupère le statut via l'API REST"""
         try:
-            url = f'http://{self.librespot_host}:{self.librespot_port}/status'
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        status = await response.json()
-                        old_connected = self.current_status["connected"]
-                        
-                        is_connected = not status.get("stopped", True) and status.get("username") is not None
-                        
-                        new_status = {
-                            "connected": is_connected,
-                            "username": status.get("username"),
-                            "device_name": status.get("device_name")
-                        }
-
-                        if new_status != self.current_status:
-                            self.current_status = new_status
-                            
-                            # Si le statut de connexion a changé
-                            if old_connected != is_connected:
-                                if self.audio_manager:
-                                    if is_connected:
-                                        await self.audio_manager.switch_source(AudioSource.SPOTIFY)
-                                    else:
-                                        await self.audio_manager.switch_source(AudioSource.NONE)
-                            
-                            await self.notify_status()
+            status = await self.status_fetcher.fetch(max_age)
+            if status is not None:
+                await self.apply_status(status)
         except aiohttp.ClientError as e:
-            print(f"Erreur de connexion à go-librespot: {e}")
+            logger.warning(f"Erreur de connexion à go-librespot: {e}")
             if self.current_status["connected"]:
                 self.current_status = {
                     "connected": False,
@@ -84,8 +68,32 @@ class SpotifyManager:
                 }
                 await self.notify_status()
         except Exception as e:
-            print(f"Erreur inattendue: {e}")
-            traceback.print_exc()
+            logger.error(f"Erreur inattendue: {e}", exc_info=True)
+
+    async def apply_status(self, status: dict):
+        """Dérive l'état de connexion d'une réponse /status déjà récupérée"""
+        old_connected = self.current_status["connected"]
+
+        is_connected = not status.get("stopped", True) and status.get("username") is not None
+
+        new_status = {
+            "connected": is_connected,
+            "username": status.get("username"),
+            "device_name": status.get("device_name")
+        }
+
+        if new_status != self.current_status:
+            self.current_status = new_status
+
+            # Si le statut de connexion a changé
+            if old_connected != is_connected:
+                if self.audio_manager:
+                    if is_connected:
+                        await self.audio_manager.switch_source(AudioSource.SPOTIFY)
+                    else:
+                        await self.audio_manager.switch_source(AudioSource.NONE)
+
+            await self.notify_status()
 
     async def notify_status(self):
         """Envoie le statut au frontend"""
@@ -93,17 +101,17 @@ class SpotifyManager:
             "type": "spotify_status",
             "status": self.current_status
         }
-        print(f"Envoi du statut Spotify au frontend: {message}")
+        logger.debug("Envoi du statut Spotify au frontend", extra={"payload": message})
         await self.websocket_manager.broadcast_to_service(message, "spotify")
 
     async def handle_message(self, message: dict):
         """Gère les messages du frontend"""
-        print(f"Message Spotify reçu du frontend: {message}")
+        logger.debug("Message Spotify reçu du frontend", extra={"payload": message})
         message_type = message.get("type")
         
         if message_type == "get_status":
             # Force une récupération du statut et notification
-            await self.get_status()
+            await self.get_status(max_age=0)
             # Force l'envoi du statut même s'il n'a pas changé
             await self.notify_status()
             # Si connecté, notifier l'AudioManager
@@ -119,4 +127,5 @@ class SpotifyManager:
             except asyncio.CancelledError:
                 pass
             self.polling_task = None
-        print("Nettoyage du SpotifyManager terminé")
\ No newline at end of file
+        await self.status_fetcher.close()
+        logger.info("Nettoyage du SpotifyManager terminé")
\ No newline at end of file
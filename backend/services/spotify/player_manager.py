@@ -1,14 +1,23 @@
 import aiohttp
 import asyncio
 import json
+import logging
+import config
+from time import perf_counter
 from typing import Dict, Optional
 
+from monitoring.metrics import UPSTREAM_ERRORS, UPSTREAM_SECONDS
+
+logger = logging.getLogger(__name__)
+
 class SpotifyPlayerManager:
     def __init__(self, websocket_manager, spotify_manager):
         self.websocket_manager = websocket_manager
         self.spotify_manager = spotify_manager
-        self.librespot_host = "localhost"
-        self.librespot_port = 3678
+        self.librespot_host = config.LIBRESPOT_HOST
+        self.librespot_port = config.LIBRESPOT_PORT
+        # Même fetcher que SpotifyManager : une seule requête /status par intervalle
+        self.status_fetcher = spotify_manager.status_fetcher
         self.current_track_metadata = None  # Pour les métadonnées persistantes
         self.playback_state = {            # Pour l'état de lecture
             "is_playing": False,
@@ -24,7 +33,7 @@ class SpotifyPlayerManager:
 
     async def handle_librespot_event(self, event):
         """Gère les événements WebSocket de go-librespot"""
-        print(f"Événement Librespot reçu: {event}")
+        logger.debug("Événement Librespot reçu", extra={"event": event})
         
         event_type = event.get('type')
         event_data = event.get('data')
@@ -40,32 +49,33 @@ class SpotifyPlayerManager:
         """Vérifie périodiquement l'état de lecture"""
         while True:
             try:
-                status = await self.get_playback_status()
-                if status and 'track' in status:
-                    await self.notify_status()
+                # get_playback_status notifie déjà le frontend quand l'état change
+                await self.get_playback_status()
                 await asyncio.sleep(1)
             except Exception as e:
-                print(f"Erreur lors du polling: {e}")
+                logger.error(f"Erreur lors du polling: {e}")
                 await asyncio.sleep(1)
 
     async def get_playback_status(self, force_notify: bool = False) -> Optional[Dict]:
         """Récupère l'état de lecture actuel"""
         try:
-            url = f'http://{self.librespot_host}:{self.librespot_port}/status'
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        status = await response.json()
-                        print(f"Statut Spotify reçu: {status}")
-                        should_notify = self._update_track_state(status)
-                        if should_notify or force_notify:
-                            await self.notify_status()
-                            await self.spotify_manager.get_status()
-                        return status
+            status = await self.status_fetcher.fetch(max_age=0 if force_notify else None)
+            if status is not None:
+                logger.debug("Statut Spotify reçu", extra={"status": status})
+                await self.apply_status(status, force_notify)
+                return status
         except Exception as e:
-            print(f"Erreur lors de la récupération du statut: {e}")
+            logger.warning(f"Erreur lors de la récupération du statut: {e}")
             return None
 
+    async def apply_status(self, status: Dict, force_notify: bool = False):
+        """Applique une réponse /status (récupérée ou rejouée depuis le journal)"""
+        # L'état de connexion est dérivé de la même réponse, sans nouvelle requête
+        await self.spotify_manager.apply_status(status)
+        should_notify = self._update_track_state(status)
+        if should_notify or force_notify:
+            await self.notify_status()
+
     def _update_track_state(self, status: Dict) -> bool:
         """Met à jour l'état interne et retourne True si l'état a changé"""
         try:
@@ -110,7 +120,7 @@ class SpotifyPlayerManager:
             return state_changed
 
         except Exception as e:
-            print(f"Erreur lors de la mise à jour de l'état: {e}")
+            logger.error(f"Erreur lors de la mise à jour de l'état: {e}")
             return False
 
     async def notify_status(self):
@@ -125,16 +135,15 @@ class SpotifyPlayerManager:
                     "position": self.playback_state["position"]
                 }
                 
-                print(f"Envoi du statut au frontend: {formatted_status}")
+                logger.debug("Envoi du statut au frontend", extra={"payload": formatted_status})
                 message = {
                     "type": "playback_status",
                     "status": formatted_status
                 }
                 await self.websocket_manager.broadcast_to_service(message, "spotify")
-                await self.spotify_manager.notify_status()
 
         except Exception as e:
-            print(f"Erreur lors de la notification du statut: {e}")
+            logger.error(f"Erreur lors de la notification du statut: {e}")
 
     async def handle_message(self, message: dict):
         """Gère les messages du frontend"""
@@ -145,9 +154,12 @@ class SpotifyPlayerManager:
             if self.current_track_metadata is not None:
                 await self.notify_status()
         
-        elif message_type in ["play_pause", "next_track", "previous_track", "seek"]:
+        elif message_type in ["play_pause", "play", "pause", "next_track", "previous_track", "seek"]:
             endpoint = {
                 "play_pause": "/player/playpause",
+                # Commandes idempotentes (domotique) : sans effet si déjà dans l'état demandé
+                "play": "/player/resume",
+                "pause": "/player/pause",
                 "next_track": "/player/next",
                 "previous_track": "/player/prev",
                 "seek": "/player/seek"
@@ -155,17 +167,23 @@ class SpotifyPlayerManager:
 
             url = f'http://{self.librespot_host}:{self.librespot_port}{endpoint}'
             try:
-                async with aiohttp.ClientSession() as session:
-                    headers = {'Content-Type': 'application/json'}
-                    data = {}
-                    if message_type == "seek":
-                        data["position"] = message.get("position", 0)
-                    
-                    async with session.post(url, headers=headers, json=data) as response:
-                        if response.status != 200:
-                            print(f"Erreur lors de la commande {message_type}: statut {response.status}")
-                        else:
-                            # Forcer une mise à jour immédiate du statut après chaque action
-                            await self.get_playback_status(force_notify=True)
+                session = self.status_fetcher.get_session()
+                headers = {'Content-Type': 'application/json'}
+                data = {}
+                if message_type == "seek":
+                    data["position"] = message.get("position", 0)
+
+                start = perf_counter()
+                async with session.post(url, headers=headers, json=data) as response:
+                    UPSTREAM_SECONDS.labels("librespot", endpoint).observe(perf_counter() - start)
+                    if response.status != 200:
+                        UPSTREAM_ERRORS.labels("librespot", endpoint).inc()
+                        logger.error(f"Erreur lors de la commande {message_type}: statut {response.status}")
+                    else:
+                        # Le cache reflète l'état d'avant la commande
+                        self.status_fetcher.invalidate()
+                        # Forcer une mise à jour immédiate du statut après chaque action
+                        await self.get_playback_status(force_notify=True)
             except Exception as e:
-                print(f"Erreur lors de la commande {message_type}: {e}")
\ No newline at end of file
+                UPSTREAM_ERRORS.labels("librespot", endpoint).inc()
+                logger.error(f"Erreur lors de la commande {message_type}: {e}")
\ No newline at end of file
@@ -1,7 +1,9 @@
 # sonoak/backend/services/spotify/routes.py
 
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Request
+from typing import Dict, Any, Optional
+
+from websocket.http_cache import content_response
 
 router = APIRouter()
 
@@ -13,15 +15,22 @@ def init_routes(manager):
     spotify_manager = manager
 
 @router.get("/status")
-async def get_status() -> Dict[str, Any]:
-    """Récupère l'état actuel de la connexion Spotify"""
+async def get_status(request: Request, since: Optional[str] = None, timeout: float = 25.0):
+    """
+    Récupère l'état actuel de la connexion Spotify ; ETag et long-poll via ?since=<X-State-Version>.
+    Versionné par le contenu : les playback_status diffusés chaque seconde ne le modifient pas.
+    """
     if not spotify_manager:
         raise HTTPException(status_code=500, detail="Spotify manager not initialized")
-    
-    return {
-        "status": spotify_manager.current_status,
-        "connected": spotify_manager.is_connected() if hasattr(spotify_manager, 'is_connected') else False
-    }
+
+    return await content_response(
+        request, spotify_manager.websocket_manager.state, "spotify",
+        lambda: {
+            "status": spotify_manager.current_status,
+            "connected": spotify_manager.is_connected() if hasattr(spotify_manager, 'is_connected') else False
+        },
+        since, timeout
+    )
 
 @router.get("/playback")
 async def get_playback() -> Dict[str, Any]:
@@ -42,4 +51,12 @@ async def get_playback() -> Dict[str, Any]:
             "volume": playback_status.get("volume", 0) if playback_status else 0
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/fetch-stats")
+async def get_fetch_stats() -> Dict[str, Any]:
+    """Nombre de requêtes /status réellement envoyées à go-librespot par intervalle"""
+    if not spotify_manager:
+        raise HTTPException(status_code=500, detail="Spotify manager not initialized")
+
+    return spotify_manager.status_fetcher.get_stats()
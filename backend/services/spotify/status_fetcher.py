@@ -0,0 +1,145 @@
+# backend/services/spotify/status_fetcher.py
+import asyncio
+import logging
+from time import monotonic, perf_counter
+from typing import Dict, Optional
+
+import aiohttp
+
+from monitoring import metrics
+from monitoring.journal import journal
+from monitoring.metrics import UPSTREAM_ERRORS, UPSTREAM_SECONDS
+
+logger = logging.getLogger(__name__)
+
+STATUS_FETCHES = metrics.counter(
+    "sonoak_librespot_status_requests_total", "Demandes de statut go-librespot par issue", ["result"]
+)
+
+
+class LibrespotStatusFetcher:
+    """
+    Récupère le document /status de go-librespot une seule fois pour tous les managers.
+
+    Les appels concurrents partagent la même requête en cours (single-flight) et la
+    dernière réponse est servie depuis le cache pendant `ttl` secondes.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 3678,
+                 ttl: float = 0.5, stats_interval: float = 10.0):
+        self.url = f'http://{host}:{port}/status'
+        self.ttl = ttl
+        self.stats_interval = stats_interval
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._cached: Optional[Dict] = None
+        self._cached_at = 0.0
+        # Incrémentée par invalidate() : une requête partie avant ne remplit plus le cache
+        self._generation = 0
+
+        # Compteurs par intervalle pour vérifier le nombre réel de requêtes
+        self._interval_start = monotonic()
+        self._counts = self._empty_counts()
+        self.last_interval: Optional[Dict] = None
+
+    @staticmethod
+    def _empty_counts() -> Dict[str, int]:
+        return {"requests": 0, "fetches": 0, "coalesced": 0, "cache_hits": 0, "errors": 0}
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Session HTTP partagée (connexions keep-alive vers go-librespot)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def fetch(self, max_age: Optional[float] = None) -> Optional[Dict]:
+        """
+        Retourne le statut go-librespot.
+
+        Args:
+            max_age: âge maximal accepté pour la réponse en cache (par défaut `ttl`).
+                     0 force une nouvelle requête, tout en rejoignant celle déjà en cours.
+
+        Raises:
+            aiohttp.ClientError: si go-librespot est injoignable.
+        """
+        self._roll_stats()
+        self._counts["requests"] += 1
+
+        limit = self.ttl if max_age is None else max_age
+        if self._cached is not None and monotonic() - self._cached_at <= limit:
+            self._counts["cache_hits"] += 1
+            STATUS_FETCHES.labels("cache_hit").inc()
+            return self._cached
+
+        if self._inflight is not None:
+            self._counts["coalesced"] += 1
+            STATUS_FETCHES.labels("coalesced").inc()
+        else:
+            STATUS_FETCHES.labels("fetched").inc()
+            self._inflight = asyncio.get_running_loop().create_task(self._do_fetch(self._generation))
+            self._inflight.add_done_callback(self._clear_inflight)
+
+        # shield: l'annulation d'un appelant n'annule pas la requête des autres
+        return await asyncio.shield(self._inflight)
+
+    def invalidate(self):
+        """Oublie la réponse en cache, par exemple après une commande de lecture"""
+        self._cached = None
+        # Une requête déjà partie peut refléter l'état d'avant la commande :
+        # les prochains appelants en lanceront une nouvelle, et sa réponse
+        # ne sera pas mise en cache
+        self._generation += 1
+        self._inflight = None
+
+    async def _do_fetch(self, generation: int) -> Optional[Dict]:
+        self._counts["fetches"] += 1
+        start = perf_counter()
+        try:
+            async with self.get_session().get(self.url) as response:
+                if response.status != 200:
+                    return None
+                status = await response.json()
+        except Exception:
+            self._counts["errors"] += 1
+            UPSTREAM_ERRORS.labels("librespot", "status").inc()
+            raise
+        finally:
+            UPSTREAM_SECONDS.labels("librespot", "status").observe(perf_counter() - start)
+
+        journal.record("librespot", status)
+        if generation == self._generation:
+            self._cached = status
+            self._cached_at = monotonic()
+        return status
+
+    def _clear_inflight(self, task: asyncio.Task):
+        if self._inflight is task:
+            self._inflight = None
+        # Évite l'avertissement "exception was never retrieved" quand personne n'attend plus
+        if not task.cancelled():
+            task.exception()
+
+    def _roll_stats(self):
+        now = monotonic()
+        elapsed = now - self._interval_start
+        if elapsed < self.stats_interval:
+            return
+        self.last_interval = {**self._counts, "duration": round(elapsed, 3)}
+        logger.debug(f"Librespot /status sur {elapsed:.1f}s: {self.last_interval}")
+        self._counts = self._empty_counts()
+        self._interval_start = now
+
+    def get_stats(self) -> Dict:
+        """Compteurs de l'intervalle courant et du précédent"""
+        self._roll_stats()
+        return {
+            "interval": self.stats_interval,
+            "current": {**self._counts, "duration": round(monotonic() - self._interval_start, 3)},
+            "previous": self.last_interval
+        }
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
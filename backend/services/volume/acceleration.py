@@ -0,0 +1,77 @@
+# backend/services/volume/acceleration.py
+"""
+Accélération de l'encodeur : le pas de volume d'un cran dépend de la vitesse de rotation.
+
+La vitesse (crans/s) est estimée à partir de l'intervalle entre deux crans, lissée
+par une moyenne exponentielle et remise à zéro au changement de sens ou après une
+pause :
+    vitesse <= dead_band     gain 1 : réglage fin, un cran = base_step (% affiché)
+    dead_band .. fast        gain croissant selon la courbe
+    vitesse >= fast          gain max_gain
+Les fractions de pas sont reportées d'un cran à l'autre (base_step < 1 possible).
+"""
+from typing import Callable, Dict, Optional
+
+# Forme de la montée du gain entre dead_band et fast (x dans [0, 1])
+CURVES: Dict[str, Callable[[float], float]] = {
+    "none": lambda x: 0.0,
+    "linear": lambda x: x,
+    "quadratic": lambda x: x * x,
+    "cubic": lambda x: x * x * x,
+}
+
+
+class RotaryAcceleration:
+    def __init__(self, curve: str = "quadratic", dead_band: float = 5.0, fast: float = 40.0,
+                 max_gain: float = 6.0, base_step: float = 1.0, smoothing: float = 0.5, pause: float = 0.25):
+        if curve not in CURVES:
+            raise ValueError(f"Unknown acceleration curve '{curve}' (expected one of {', '.join(CURVES)})")
+        if fast <= dead_band:
+            raise ValueError(f"Acceleration fast speed ({fast}) must be above the dead band ({dead_band})")
+        self.curve = curve
+        self._curve = CURVES[curve]
+        self.dead_band = dead_band
+        self.fast = fast
+        self.max_gain = max_gain
+        self.base_step = base_step
+        self.smoothing = smoothing
+        self.pause = pause
+
+        self.speed = 0.0
+        self._last_at: Optional[float] = None
+        self._direction = 0
+        self._carry = 0.0
+
+    def gain(self, speed: float) -> float:
+        if speed <= self.dead_band:
+            return 1.0
+        x = min(1.0, (speed - self.dead_band) / (self.fast - self.dead_band))
+        return 1.0 + (self.max_gain - 1.0) * self._curve(x)
+
+    def step(self, direction: int, now: float) -> int:
+        """Pas de volume (signé, en % affiché) d'un cran détecté à l'instant now"""
+        interval = None if self._last_at is None else now - self._last_at
+        self._last_at = now
+        if direction != self._direction:
+            self._direction = direction
+            self._carry = 0.0
+            self.speed = 0.0
+        elif interval is None or interval >= self.pause:
+            self.speed = 0.0
+        else:
+            instant = 1.0 / max(interval, 0.001)
+            self.speed = instant if self.speed == 0.0 else self.speed + self.smoothing * (instant - self.speed)
+
+        amount = self.base_step * self.gain(self.speed) + self._carry
+        whole = int(amount)
+        self._carry = amount - whole
+        return whole * direction
+
+    def describe(self) -> dict:
+        return {
+            "curve": self.curve,
+            "dead_band": self.dead_band,
+            "fast": self.fast,
+            "max_gain": self.max_gain,
+            "base_step": self.base_step
+        }
@@ -0,0 +1,132 @@
+# backend/services/volume/curves.py
+"""
+Courbes de volume : position affichée (0-100) -> pas bruts du mixer.
+
+Une courbe donne un niveau en dB entre le plancher et le plafond du profil de la
+sortie. Elle est précalculée en deux tables :
+    to_raw[d]      pas brut pour la position d
+    to_display[r]  position la plus proche d'un pas brut r (changement externe, alsamixer)
+to_display[to_raw[d]] == d dès que le pas brut de d est unique : un aller-retour ne
+dérive pas. Là où la résolution du mixer est trop grossière pour la courbe, plusieurs
+positions partagent un pas ; le VolumeManager garde alors sa position affichée.
+
+Courbes :
+    linear      linéaire en amplitude (gain)
+    db_linear   linéaire en dB (comportement historique 40-98 % sur le contrôle Digital)
+    perceptual  linéaire en sonie (+10 dB = deux fois plus fort)
+"""
+import logging
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _linear(position: float, floor_db: float, ceiling_db: float) -> float:
+    low, high = 10 ** (floor_db / 20), 10 ** (ceiling_db / 20)
+    return 20 * math.log10(low + position * (high - low))
+
+
+def _db_linear(position: float, floor_db: float, ceiling_db: float) -> float:
+    return floor_db + position * (ceiling_db - floor_db)
+
+
+def _perceptual(position: float, floor_db: float, ceiling_db: float) -> float:
+    low, high = 2 ** (floor_db / 10), 2 ** (ceiling_db / 10)
+    return 10 * math.log2(low + position * (high - low))
+
+
+CURVES: Dict[str, Callable[[float, float, float], float]] = {
+    "linear": _linear,
+    "db_linear": _db_linear,
+    "perceptual": _perceptual,
+}
+
+
+class VolumeProfile(NamedTuple):
+    curve: str = "db_linear"
+    floor_db: float = -62.0
+    ceiling_db: float = -2.0
+
+
+# Profils par contrôle de sortie. Digital (HiFiBerry AMP2, 0-207 = -103.5 à 0 dB) :
+# plancher et plafond équivalents aux anciennes bornes ALSA 40 % et 98 %
+PROFILES: Dict[str, VolumeProfile] = {
+    "Digital": VolumeProfile("db_linear", -62.0, -2.0),
+}
+
+
+def profile_for(control: str, curve: Optional[str] = None,
+                floor_db: Optional[float] = None, ceiling_db: Optional[float] = None) -> VolumeProfile:
+    """Profil du contrôle, avec les surcharges de configuration éventuelles"""
+    profile = PROFILES.get(control, VolumeProfile())
+    if curve and curve not in CURVES:
+        logger.warning(f"Courbe de volume inconnue '{curve}', {profile.curve} conservée")
+        curve = None
+    return VolumeProfile(
+        curve or profile.curve,
+        profile.floor_db if floor_db is None else floor_db,
+        profile.ceiling_db if ceiling_db is None else ceiling_db
+    )
+
+
+class VolumeTable:
+    def __init__(self, profile: VolumeProfile, raw_range: Tuple[int, int],
+                 db_range: Optional[Tuple[float, float]] = None, steps: int = 100):
+        self.profile = profile
+        self.steps = steps
+        self.raw_min, self.raw_max = raw_range
+        if db_range is None:
+            # Plage dB non exposée par le contrôle : 0.5 dB par pas, plafond à 0 dB
+            db_range = (-(self.raw_max - self.raw_min) / 2, 0.0)
+            logger.warning(f"Plage dB inconnue, {db_range[0]} à 0 dB supposé")
+        self.db_min, self.db_max = db_range
+        self.db_per_step = (self.db_max - self.db_min) / (self.raw_max - self.raw_min)
+
+        curve = CURVES[profile.curve]
+        floor_db = max(profile.floor_db, self.db_min)
+        ceiling_db = min(profile.ceiling_db, self.db_max)
+        self.to_raw: List[int] = [
+            self._raw_for_db(curve(d / steps, floor_db, ceiling_db)) for d in range(steps + 1)
+        ]
+        self.to_display: List[int] = [self._nearest_display(raw) for raw in range(self.raw_min, self.raw_max + 1)]
+
+    def _raw_for_db(self, db: float) -> int:
+        raw = self.raw_min + round((db - self.db_min) / self.db_per_step)
+        return max(self.raw_min, min(self.raw_max, raw))
+
+    def _nearest_display(self, raw: int) -> int:
+        index = bisect_left(self.to_raw, raw)
+        if index == 0:
+            return 0
+        if index > self.steps:
+            return self.steps
+        # Égalité : la position basse l'emporte
+        return index if self.to_raw[index] - raw < raw - self.to_raw[index - 1] else index - 1
+
+    def raw(self, display: int) -> int:
+        return self.to_raw[max(0, min(self.steps, display))]
+
+    def display(self, raw: int) -> int:
+        return self.to_display[max(self.raw_min, min(self.raw_max, raw)) - self.raw_min]
+
+    def clamp_raw(self, raw: int) -> int:
+        """Ramène un pas brut dans la plage de la courbe (plancher/plafond)"""
+        return max(self.to_raw[0], min(self.to_raw[-1], raw))
+
+    def db(self, raw: int) -> float:
+        return round(self.db_min + (raw - self.raw_min) * self.db_per_step, 2)
+
+    def percent(self, raw: int) -> int:
+        """Pourcentage ALSA (linéaire en pas bruts), comme amixer/alsamixer"""
+        return round((raw - self.raw_min) * 100 / (self.raw_max - self.raw_min))
+
+    def describe(self) -> dict:
+        return {
+            "curve": self.profile.curve,
+            "floor_db": self.db(self.to_raw[0]),
+            "ceiling_db": self.db(self.to_raw[-1]),
+            "raw_range": [self.raw_min, self.raw_max],
+            "db_range": [self.db_min, self.db_max]
+        }
@@ -0,0 +1,127 @@
+# backend/services/volume/gestures.py
+"""
+Gestes du bouton de l'encodeur et actions associées.
+
+Le recognizer ne dort jamais : il reçoit des événements horodatés (appui,
+relâchement, cran pendant l'appui) et une échéance, vérifiée par `poll(now)`
+à chaque tour de la boucle de surveillance (1 ms). Les crans tournés bouton
+enfoncé sont des gestes à part entière et ne sont jamais perdus.
+
+    single_press     appui court (émis au relâchement si aucun double n'est configuré,
+                     sinon après `double_gap` sans second appui)
+    double_press     deux appuis courts rapprochés
+    long_press       maintien au-delà de `long_after` sans tourner (émis sans attendre le relâchement)
+    press_turn_cw    un cran horaire bouton enfoncé
+    press_turn_ccw   un cran anti-horaire bouton enfoncé
+"""
+import logging
+from typing import Callable, Dict, Optional
+
+from services.audio.manager import AudioSource
+
+logger = logging.getLogger(__name__)
+
+GESTURES = ("single_press", "double_press", "long_press", "press_turn_cw", "press_turn_ccw")
+
+DEFAULT_ACTIONS = {
+    "single_press": "play_pause",
+    "double_press": "mute",
+    "long_press": "cycle_source",
+    "press_turn_cw": "next_track",
+    "press_turn_ccw": "previous_track",
+}
+
+# Ordre du cycle des sources (long_press par défaut)
+SOURCE_CYCLE = (AudioSource.SPOTIFY, AudioSource.BLUETOOTH, AudioSource.MACOS)
+
+
+def _next_source(current: AudioSource) -> str:
+    if current not in SOURCE_CYCLE:
+        return SOURCE_CYCLE[0].value
+    return SOURCE_CYCLE[(SOURCE_CYCLE.index(current) + 1) % len(SOURCE_CYCLE)].value
+
+
+# Action -> (service, message WebSocket), routé par le registre comme une requête du frontend
+ACTIONS: Dict[str, Callable] = {
+    "play_pause": lambda services: ("spotify", {"type": "play_pause"}),
+    "next_track": lambda services: ("spotify", {"type": "next_track"}),
+    "previous_track": lambda services: ("spotify", {"type": "previous_track"}),
+    "mute": lambda services: ("volume", {"type": "set_mute", "muted": not services.volume_manager.muted}),
+    "cycle_source": lambda services: ("audio", {
+        "type": "switch_source", "data": {"source": _next_source(services.audio_manager.current_source)}
+    }),
+}
+
+
+def parse_action_table(spec: str) -> Dict[str, str]:
+    """"geste=action,geste=action" ; vide => table par défaut, action vide => geste désactivé"""
+    if not spec.strip():
+        return dict(DEFAULT_ACTIONS)
+    table = {}
+    for item in spec.split(","):
+        gesture, _, action = item.partition("=")
+        gesture, action = gesture.strip(), action.strip()
+        if gesture not in GESTURES:
+            logger.warning(f"Unknown rotary gesture '{gesture}' ignored")
+        elif action and action not in ACTIONS:
+            logger.warning(f"Unknown rotary action '{action}' for {gesture} ignored")
+        elif action:
+            table[gesture] = action
+    return table
+
+
+class GestureRecognizer:
+    IDLE, PRESSED, HELD, WAIT_SECOND = range(4)
+
+    def __init__(self, on_gesture: Callable[[str, float], None],
+                 long_after: float = 0.6, double_gap: float = 0.3, wait_double: bool = True):
+        self.on_gesture = on_gesture
+        self.long_after = long_after
+        self.double_gap = double_gap
+        # Sans double configuré, l'appui simple part dès le relâchement
+        self.wait_double = wait_double
+
+        self.state = self.IDLE
+        self.deadline: Optional[float] = None
+        self._second = False
+
+    @property
+    def pressed(self) -> bool:
+        return self.state in (self.PRESSED, self.HELD)
+
+    def press(self, now: float):
+        self._second = self.state == self.WAIT_SECOND
+        self.state = self.PRESSED
+        self.deadline = now + self.long_after
+
+    def release(self, now: float):
+        if self.state != self.PRESSED:
+            # Relâchement après un appui long ou une rotation : geste déjà émis
+            self.state, self.deadline = self.IDLE, None
+            return
+        if self._second:
+            self.state, self.deadline = self.IDLE, None
+            self.on_gesture("double_press", now)
+        elif self.wait_double:
+            self.state, self.deadline = self.WAIT_SECOND, now + self.double_gap
+        else:
+            self.state, self.deadline = self.IDLE, None
+            self.on_gesture("single_press", now)
+
+    def turn(self, direction: int, now: float):
+        """Cran tourné bouton enfoncé"""
+        # Tourner annule l'appui long (et l'appui en cours n'est plus un clic)
+        self.state = self.HELD
+        self.deadline = None
+        self.on_gesture("press_turn_cw" if direction > 0 else "press_turn_ccw", now)
+
+    def poll(self, now: float):
+        if self.deadline is None or now < self.deadline:
+            return
+        self.deadline = None
+        if self.state == self.PRESSED:
+            self.state = self.HELD
+            self.on_gesture("long_press", now)
+        elif self.state == self.WAIT_SECOND:
+            self.state = self.IDLE
+            self.on_gesture("single_press", now)
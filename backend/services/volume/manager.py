@@ -1,166 +1,211 @@
 import asyncio
 import logging
-import alsaaudio
-from typing import Tuple
+from time import perf_counter
+from typing import Optional
+
+import config
+import hardware
+from monitoring import metrics
+from monitoring.metrics import VOLUME_CHANGES
+from services.volume.curves import VolumeTable, profile_for
+from services.volume.ramp import VolumeRamp
 
 logger = logging.getLogger(__name__)
 
+ALSA_WRITE_SECONDS = metrics.histogram(
+    "sonoak_alsa_write_seconds", "Durée d'écriture du volume sur le mixer ALSA",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+
 class VolumeManager:
-    # Limites réelles du volume ALSA
-    MIN_VOLUME = 40
-    MAX_VOLUME = 98
     VOLUME_STEP = 5  # Change de 5% le volume affiché à chaque clic
 
     def __init__(self, websocket_manager):
         self.websocket_manager = websocket_manager
         self.mixer = None
-        self._volume = 0
-        self._lock = asyncio.Lock()
-        self._is_adjusting = False
-        
-    def _interpolate_to_display(self, actual_volume: int) -> int:
-        """Convertit le volume réel (20-80) en volume d'affichage (0-100)"""
-        actual_range = self.MAX_VOLUME - self.MIN_VOLUME
-        normalized = actual_volume - self.MIN_VOLUME
-        return round((normalized / actual_range) * 100)
-
-    def _interpolate_from_display(self, display_volume: int) -> int:
-        """Convertit le volume d'affichage (0-100) en volume réel (20-80)"""
-        actual_range = self.MAX_VOLUME - self.MIN_VOLUME
-        return round((display_volume / 100) * actual_range) + self.MIN_VOLUME
+        self.table: Optional[VolumeTable] = None
+        self.ramp: Optional[VolumeRamp] = None
+        # Position affichée (0-100) visée : relue du mixer seulement s'il a changé ailleurs
+        self._display = 0
+        # Sortie atténuée le temps d'un changement de source, ou coupée par l'utilisateur
+        self._faded = False
+        self.muted = False
+        self._ui_task: Optional[asyncio.Task] = None
+        self._ui_pending = False
 
     async def initialize(self):
-        """Initialize the volume manager and set up ALSA mixer for HiFiBerry AMP2"""
+        """Initialize the volume manager: mixer, volume curve tables, clamp to the curve range"""
         try:
-            logger.info("Initializing HiFiBerry AMP2 Digital mixer")
-            logger.info(f"Volume limits: min={self.MIN_VOLUME}%, max={self.MAX_VOLUME}%")
-            self.mixer = alsaaudio.Mixer('Digital')
-            
-            initial_volume = self.get_alsa_volume()
-            self._volume = max(self.MIN_VOLUME, min(self.MAX_VOLUME, initial_volume))
-            
-            if initial_volume != self._volume:
-                self.set_alsa_volume(self._volume)
-            
-            logger.info(f"Volume Manager initialized with volume: {self._volume}")
+            self.mixer = hardware.create_mixer(config.MIXER_CONTROL)
+            profile = profile_for(config.MIXER_CONTROL, config.VOLUME_CURVE,
+                                  config.VOLUME_FLOOR_DB, config.VOLUME_CEILING_DB)
+            self.table = VolumeTable(profile, self.mixer.get_raw_range(), self.mixer.get_db_range())
+            logger.info(f"Volume curve for {config.MIXER_CONTROL}: {self.table.describe()}")
+
+            initial_raw = self.mixer.get_raw()
+            raw = self.table.clamp_raw(initial_raw)
+            if initial_raw != raw:
+                self._write_raw(raw)
+            self._display = self.table.display(raw)
+
+            self.ramp = VolumeRamp(self._write_raw, self._on_ramp_progress,
+                                   tick=config.VOLUME_RAMP_TICK, ui_interval=config.VOLUME_UI_INTERVAL)
+            self.ramp.start(raw)
+
+            logger.info(f"Volume Manager initialized with volume: {self._display} (raw={raw})")
             await self.broadcast_volume_status()
             
         except Exception as e:
             logger.error(f"Failed to initialize ALSA mixer: {e}")
             raise
 
+    def _read_display(self) -> int:
+        """Position affichée courante ; suit les changements faits hors de Sonoak (alsamixer)"""
+        if self.ramp.active or self._silenced:
+            return self._display
+        raw = self.mixer.get_raw()
+        if raw != self.ramp.current:
+            self.ramp.sync(raw)
+            self._display = self.table.display(raw)
+        return self._display
+
+    @property
+    def _silenced(self) -> bool:
+        return self._faded or self.muted
+
+    def _write_raw(self, raw: int) -> None:
+        start = perf_counter()
+        self.mixer.set_raw(raw)
+        ALSA_WRITE_SECONDS.observe(perf_counter() - start)
+        logger.debug(f"ALSA volume set to raw {raw} ({self.table.db(raw)} dB)")
+
+    def _ramp_to_display(self, display_volume: int) -> bool:
+        """Vise une position affichée ; False si rien ne bouge (déjà atteinte ou sortie en fondu)"""
+        self._display = max(0, min(100, display_volume))
+        target = self.table.raw(self._display)
+        if self._silenced or (target == self.ramp.current and not self.ramp.active):
+            return False
+        self.ramp.ramp_to(target, config.VOLUME_RAMP_TIME, config.VOLUME_RAMP_EASING)
+        return True
+
+    def _on_ramp_progress(self, done: bool):
+        # Une diffusion à la fois : les points intermédiaires manqués sont remplacés par le suivant
+        if self._ui_task and not self._ui_task.done():
+            self._ui_pending = True
+            return
+        self._ui_task = asyncio.create_task(self._broadcast_progress())
+
+    async def _broadcast_progress(self):
+        try:
+            while True:
+                self._ui_pending = False
+                await self.broadcast_volume_status()
+                if not self._ui_pending:
+                    break
+        except Exception as e:
+            logger.error(f"Error broadcasting volume progress: {e}")
+
+    def _status(self, initial: bool) -> dict:
+        display_volume = self._read_display()
+        raw = self.ramp.current
+        return {
+            "type": "volume_status",
+            # En cours de rampe : position atteinte ; la cible est dans "target"
+            "volume": self.table.display(raw) if self.ramp.active and not self._silenced else display_volume,
+            "target": display_volume,
+            "muted": self.muted,
+            "alsa_volume": self.table.percent(raw),
+            "db": self.table.db(raw),
+            "show_volume_bar": not initial,
+            "is_initial_status": initial
+        }
+
     async def broadcast_volume_status(self):
         """Broadcast current volume status to all clients"""
-        current_volume = self.get_alsa_volume()
-        display_volume = self._interpolate_to_display(current_volume)
-        
-        await self.websocket_manager.broadcast_to_service({
-            "type": "volume_status",
-            "volume": display_volume,
-            "alsa_volume": current_volume,
-            "show_volume_bar": True,
-            "is_initial_status": False  # Par défaut, ce n'est pas un status initial
-        }, "volume")
+        await self.websocket_manager.broadcast_to_service(self._status(initial=False), "volume")
 
     async def broadcast_initial_status(self):
         """Broadcast initial volume status without triggering volume bar"""
-        current_volume = self.get_alsa_volume()
-        display_volume = self._interpolate_to_display(current_volume)
-        
-        await self.websocket_manager.broadcast_to_service({
-            "type": "volume_status",
-            "volume": display_volume,
-            "alsa_volume": current_volume,
-            "show_volume_bar": False,
-            "is_initial_status": True
-        }, "volume")
-
-    def get_alsa_volume(self) -> int:
-        """Get the current ALSA volume"""
-        volumes = self.mixer.getvolume()
-        return int(sum(volumes) / len(volumes))
-
-    def set_alsa_volume(self, volume: int) -> None:
-        """Set the ALSA volume"""
-        volume = max(self.MIN_VOLUME, min(self.MAX_VOLUME, volume))
-        self.mixer.setvolume(volume)
-        logger.debug(f"ALSA volume set to {volume}")
+        await self.websocket_manager.broadcast_to_service(self._status(initial=True), "volume")
 
     async def set_volume(self, display_volume: int) -> None:
-        """Set the system volume from display value (0-100)"""
-        async with self._lock:
-            try:
-                actual_volume = self._interpolate_from_display(display_volume)
-                logger.debug(f"Setting volume: display={display_volume}% → actual={actual_volume}%")
-                
-                self.set_alsa_volume(actual_volume)
-                self._volume = actual_volume
-                
+        """Set the system volume from display value (0-100), through a short ramp"""
+        try:
+            # Changer le volume rétablit le son (la rampe repart du minimum)
+            self.muted = False
+            if not self._ramp_to_display(round(display_volume)):
                 await self.broadcast_volume_status()
-                
-            except Exception as e:
-                logger.error(f"Error setting volume: {e}")
-                raise
+            logger.debug(f"Setting volume: display={self._display}% → raw={self.table.raw(self._display)}")
+        except Exception as e:
+            logger.error(f"Error setting volume: {e}")
+            raise
 
     async def get_volume(self) -> int:
         """Get the current system volume as display value (0-100)"""
         try:
-            actual_volume = self.get_alsa_volume()
-            return self._interpolate_to_display(actual_volume)
+            return self._read_display()
         except Exception as e:
             logger.error(f"Error getting volume: {e}")
             raise
 
-    async def adjust_volume_gradually(self, display_delta: int, steps: int = 3, interval: float = 0.05) -> None:
-        """Adjust the volume gradually over multiple steps"""
+    async def adjust_volume(self, display_delta: int, step: Optional[int] = None) -> None:
+        """Relative change in clicks of `step` display % (default VOLUME_STEP), added to the current target"""
         try:
-            if self._is_adjusting:
-                logger.debug("Volume adjustment already in progress, skipping")
-                return
-
-            self._is_adjusting = True
-            
-            # Récupérer les volumes actuels
-            current_actual = self.get_alsa_volume()
-            current_display = self._interpolate_to_display(current_actual)
-            
-            # Calculer les volumes cibles
-            target_display = max(0, min(100, current_display + (display_delta * self.VOLUME_STEP)))
-            target_actual = self._interpolate_from_display(target_display)
-            
-            # Calculer les incréments
-            actual_delta = target_actual - current_actual
-            step_delta = actual_delta / steps
-            
-            logger.debug(f"""Starting gradual volume adjustment:
-                Current: display={current_display}% (actual={current_actual})
-                Target: display={target_display}% (actual={target_actual})
-                Steps: {steps}, Interval: {interval}s
-                Step delta: {step_delta}""")
-            
-            # Appliquer les changements graduellement
-            for i in range(steps):
-                next_actual = round(current_actual + (step_delta * (i + 1)))
-                next_actual = max(self.MIN_VOLUME, min(self.MAX_VOLUME, next_actual))
-                
-                self.set_alsa_volume(next_actual)
-                self._volume = next_actual
-                
-                next_display = self._interpolate_to_display(next_actual)
-                logger.debug(f"Step {i + 1}/{steps}: display={next_display}% (actual={next_actual})")
-                
+            self.muted = False
+            step = self.VOLUME_STEP if step is None else step
+            current_display = self._read_display()
+            target_display = max(0, min(100, current_display + (display_delta * step)))
+            logger.debug(f"Volume adjustment: display {current_display}% → {target_display}%")
+            if not self._ramp_to_display(target_display):
                 await self.broadcast_volume_status()
-                
-                if i < steps - 1:  # Ne pas attendre après la dernière étape
-                    await asyncio.sleep(interval)
-            
-            logger.debug("Gradual volume adjustment complete")
-            
         except Exception as e:
-            logger.error(f"Error during gradual volume adjustment: {e}")
+            logger.error(f"Error during volume adjustment: {e}")
             raise
-        finally:
-            self._is_adjusting = False
+
+    async def fade_out(self, duration: Optional[float] = None) -> None:
+        """Atténue la sortie jusqu'au minimum du mixer et attend la fin du fondu"""
+        duration = config.VOLUME_FADE_TIME if duration is None else duration
+        if self._silenced or duration <= 0 or self.ramp is None:
+            return
+        self._faded = True
+        self.ramp.ramp_to(self.table.raw_min, duration, "ease_in_out", notify=False)
+        await self.ramp.wait()
+
+    async def fade_in(self, duration: Optional[float] = None, wait: bool = False) -> None:
+        """Remonte au volume visé (éventuellement modifié pendant le fondu)"""
+        if not self._faded:
+            return
+        self._faded = False
+        if self.muted:
+            return
+        duration = config.VOLUME_FADE_TIME if duration is None else duration
+        self.ramp.ramp_to(self.table.raw(self._display), duration, "ease_in_out", notify=False)
+        if wait:
+            await self.ramp.wait()
+
+    async def set_mute(self, muted: bool) -> None:
+        """Coupe le son (rampe jusqu'au minimum du mixer) ou le rétablit, sans toucher au volume visé"""
+        if muted == self.muted:
+            await self.broadcast_volume_status()
+            return
+        self.muted = muted
+        if not self._faded:
+            target = self.table.raw_min if muted else self.table.raw(self._display)
+            self.ramp.ramp_to(target, config.VOLUME_RAMP_TIME, config.VOLUME_RAMP_EASING, notify=False)
+        await self.broadcast_volume_status()
+
+    def get_stats(self) -> dict:
+        return {
+            "display": self._display,
+            "faded": self._faded,
+            "muted": self.muted,
+            "curve": self.table.describe() if self.table else None,
+            "ramp": self.ramp.get_stats() if self.ramp else None
+        }
+
+    async def cleanup(self):
+        if self.ramp:
+            await self.ramp.cleanup()
 
     async def handle_message(self, message: dict) -> None:
         """Handle incoming WebSocket messages"""
@@ -174,12 +219,17 @@ class VolumeManager:
             elif message_type == "set_volume":
                 volume = message.get("volume")
                 if volume is not None:
+                    VOLUME_CHANGES.labels("set_volume").inc()
                     await self.set_volume(volume)
                     
             elif message_type == "adjust_volume":
                 delta = message.get("delta")
                 if delta is not None:
-                    await self.adjust_volume_gradually(delta, steps=3, interval=0.05)
+                    VOLUME_CHANGES.labels("adjust_volume").inc()
+                    await self.adjust_volume(delta)
+
+            elif message_type == "set_mute":
+                await self.set_mute(message["muted"])
                     
         except Exception as e:
             logger.error(f"Error handling volume message: {e}")
@@ -0,0 +1,122 @@
+# backend/services/volume/ramp.py
+"""
+Rampes de volume à cadence fixe, une tâche par sortie.
+
+Le mixer est écrit à chaque tick (si le pas brut change), l'interface n'est
+notifiée qu'à `ui_interval` et en fin de rampe. Une nouvelle cible en cours de
+rampe repart de la position courante : les crans d'encodeur rapprochés
+s'additionnent au lieu d'être ignorés.
+"""
+import asyncio
+import logging
+from time import monotonic
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+EASINGS: Dict[str, Callable[[float], float]] = {
+    "linear": lambda t: t,
+    "ease_out": lambda t: 1 - (1 - t) ** 2,
+    "ease_in_out": lambda t: t * t * (3 - 2 * t),
+}
+
+
+class VolumeRamp:
+    def __init__(self, write_raw: Callable[[int], None], on_progress: Callable[[bool], None],
+                 tick: float = 0.01, ui_interval: float = 0.05):
+        """
+        write_raw: écriture bloquante d'un pas brut sur le mixer
+        on_progress: appelé (sans attente) à la cadence UI ; True en fin de rampe
+        """
+        self.write_raw = write_raw
+        self.on_progress = on_progress
+        self.tick = tick
+        self.ui_interval = ui_interval
+
+        self.current = 0
+        self.target = 0
+        self._start_raw = 0
+        self._started_at = 0.0
+        self._duration = 0.0
+        self._easing = EASINGS["ease_out"]
+        self._notify = True
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self.ticks = 0
+        self.writes = 0
+
+    @property
+    def active(self) -> bool:
+        return not self._idle.is_set()
+
+    def start(self, current_raw: int):
+        self.current = self.target = current_raw
+        self._task = asyncio.create_task(self._run())
+
+    def sync(self, raw: int):
+        """Le mixer a changé hors de la rampe (alsamixer) : repartir de là"""
+        if not self.active:
+            self.current = self.target = raw
+
+    def ramp_to(self, target_raw: int, duration: float, easing: str = "ease_out", notify: bool = True):
+        self._start_raw = self.current
+        self.target = target_raw
+        self._started_at = monotonic()
+        self._duration = max(0.0, duration)
+        self._easing = EASINGS.get(easing, EASINGS["ease_out"])
+        self._notify = notify
+        if target_raw != self.current:
+            self._idle.clear()
+            self._wakeup.set()
+
+    async def wait(self):
+        await self._idle.wait()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            next_tick = monotonic()
+            last_ui = next_tick
+            while True:
+                # Une nouvelle cible est lue directement par la boucle en cours
+                self._wakeup.clear()
+                now = monotonic()
+                progress = 1.0 if self._duration == 0 else min(1.0, (now - self._started_at) / self._duration)
+                raw = round(self._start_raw + (self.target - self._start_raw) * self._easing(progress))
+                self.ticks += 1
+                if raw != self.current:
+                    try:
+                        self.write_raw(raw)
+                        self.current = raw
+                        self.writes += 1
+                    except Exception as e:
+                        logger.error(f"Écriture du volume en échec pendant la rampe: {e}")
+                done = progress >= 1.0
+                if self._notify and (done or now - last_ui >= self.ui_interval):
+                    last_ui = now
+                    self.on_progress(done)
+                if done:
+                    self._idle.set()
+                    break
+                # Cadence fixe : le tick suivant est calé sur le précédent, pas sur la fin du travail
+                next_tick += self.tick
+                await asyncio.sleep(max(0.0, next_tick - monotonic()))
+
+    def get_stats(self) -> dict:
+        return {
+            "active": self.active,
+            "current": self.current,
+            "target": self.target,
+            "ticks": self.ticks,
+            "writes": self.writes
+        }
+
+    async def cleanup(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
@@ -1,43 +1,87 @@
 # backend/services/volume/rotary_controller.py
-import lgpio
 import asyncio
 import logging
-from typing import Optional
+from typing import Awaitable, Callable, Dict, Optional
 from time import monotonic
 
+import hardware
+from hardware.gpio import GpioChip, SimulatedGpioChip
+from monitoring import metrics
+from monitoring.journal import journal
+from monitoring.metrics import VOLUME_CHANGES
+from services.volume.acceleration import RotaryAcceleration
+from services.volume.gestures import GestureRecognizer
+
 logger = logging.getLogger(__name__)
 
+ROTARY_EVENTS = metrics.counter(
+    "sonoak_rotary_events_total", "Crans de l'encodeur rotatif détectés", ["direction"]
+)
+ROTARY_BUTTON_PRESSES = metrics.counter(
+    "sonoak_rotary_button_presses_total", "Appuis sur le bouton de l'encodeur rotatif"
+)
+ROTARY_SPEED = metrics.histogram(
+    "sonoak_rotary_speed", "Vitesse de rotation estimée à chaque cran (crans/s)",
+    buckets=(2, 5, 10, 20, 40, 80)
+)
+ROTARY_GESTURES = metrics.counter(
+    "sonoak_rotary_gestures_total", "Gestes reconnus sur le bouton de l'encodeur", ["gesture"]
+)
+ROTARY_GESTURE_SECONDS = metrics.histogram(
+    "sonoak_rotary_gesture_seconds", "Délai entre la reconnaissance d'un geste et le lancement de son action",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.05)
+)
+
 class RotaryVolumeController:
-    def __init__(self, volume_manager, clk_pin=22, dt_pin=27, sw_pin=23):
+    def __init__(self, volume_manager, clk_pin=22, dt_pin=27, sw_pin=23,
+                 acceleration: Optional[RotaryAcceleration] = None, debounce: float = 0.005):
         self.volume_manager = volume_manager
         self.CLK = clk_pin
         self.DT = dt_pin
         self.SW = sw_pin
-        self.chip_handle: Optional[int] = None
+        self.chip: Optional[GpioChip] = None
         self.last_clk = 0
         self.running = False
         self._last_adjustment_time = 0
         
-        # Configuration du rotary
-        self.DEBOUNCE_TIME = 0.05  # 50ms debounce
-        self.ROTARY_SENSITIVITY = 3  # Changement de volume par step de rotation
+        # Configuration du rotary : anti-rebond court pour laisser passer les rotations rapides,
+        # pas de volume par cran selon la vitesse (acceleration.py)
+        self.DEBOUNCE_TIME = debounce
+        self.acceleration = acceleration or RotaryAcceleration()
+        # Pas de volume (% affiché) en attente d'application
         self.rotation_accumulator = 0
-        self.is_processing = False
-        self.PROCESS_INTERVAL = 0.05  # 50ms entre les traitements
-        self._last_volume_update = 0
-        self.MIN_UPDATE_INTERVAL = 0.1  # Temps minimum entre deux mises à jour de volume
+        self._rotation_pending = asyncio.Event()
+
+        # Séries de métriques pré-résolues (appelées à chaque cran)
+        self._events_cw = ROTARY_EVENTS.labels("cw")
+        self._events_ccw = ROTARY_EVENTS.labels("ccw")
+        self._rotary_volume_changes = VOLUME_CHANGES.labels("rotary")
+
+        # Prévenu à chaque cran ou appui (mise en veille de l'écran)
+        self.on_activity: Optional[Callable[[str], None]] = None
+
+        # Bouton : anti-rebond par verrouillage (le premier front passe sans délai)
+        self.BUTTON_DEBOUNCE = 0.02
+        self._sw_level = 1
+        self._sw_changed_at = 0.0
+        # Gestes : table geste -> action, exécutée par run_action (configure_gestures)
+        self.gestures = GestureRecognizer(self._on_gesture)
+        self.gesture_actions: Dict[str, str] = {}
+        self._run_action: Optional[Callable[[str], Awaitable]] = None
+        self._turn_gestures = False
 
     async def initialize(self):
         """Initialize the rotary encoder"""
         try:
             logger.info(f"Initializing rotary encoder (CLK={self.CLK}, DT={self.DT}, SW={self.SW})")
-            self.chip_handle = lgpio.gpiochip_open(0)
+            self.chip = hardware.create_gpio_chip(self.CLK, self.DT, self.SW)
             
             # Configure les pins
             for pin in [self.CLK, self.DT, self.SW]:
-                lgpio.gpio_claim_input(self.chip_handle, pin, lgpio.SET_PULL_UP)
+                self.chip.claim_input(pin)
             
-            self.last_clk = lgpio.gpio_read(self.chip_handle, self.CLK)
+            self.last_clk = self.chip.read(self.CLK)
+            self._sw_level = self.chip.read(self.SW)
             self.running = True
             
             # Démarrer les boucles de surveillance
@@ -65,85 +109,125 @@ class RotaryVolumeController:
                 await asyncio.sleep(1)
 
     async def _process_rotations_loop(self):
-        """Boucle de traitement des rotations accumulées"""
-        last_process_time = monotonic()
-        
+        """Applique les pas accumulés à la cible de volume, sans relire le mixer (la rampe lisse)"""
         while self.running:
             try:
-                current_time = monotonic()
-                if (current_time - last_process_time >= self.PROCESS_INTERVAL 
-                    and self.rotation_accumulator != 0 
-                    and not self.is_processing
-                    and current_time - self._last_volume_update >= self.MIN_UPDATE_INTERVAL):
-                    
-                    self.is_processing = True
-                    
-                    # Calculer le changement de volume
-                    volume_change = self.rotation_accumulator * self.ROTARY_SENSITIVITY
-                    self.rotation_accumulator = 0
-                    last_process_time = current_time
-                    
-                    # Appliquer directement le changement de volume
-                    current_volume = await self.volume_manager.get_volume()
-                    new_volume = max(0, min(100, current_volume + volume_change))
-                    
-                    # Mise à jour du volume uniquement si changement
-                    if new_volume != current_volume:
-                        await self.volume_manager.set_volume(new_volume)
-                        self._last_volume_update = current_time
-                    
-                    self.is_processing = False
-                
-                await asyncio.sleep(0.01)
-                
+                await self._rotation_pending.wait()
+                self._rotation_pending.clear()
+                volume_change = self.rotation_accumulator
+                self.rotation_accumulator = 0
+                if volume_change:
+                    self._rotary_volume_changes.inc()
+                    await self.volume_manager.adjust_volume(volume_change, step=1)
+
             except Exception as e:
                 logger.error(f"Error in process rotations loop: {e}")
-                self.is_processing = False
                 await asyncio.sleep(0.1)
 
     async def _check_rotation(self):
         """Vérifie et accumule la rotation de l'encodeur"""
-        clk_state = lgpio.gpio_read(self.chip_handle, self.CLK)
+        clk_state = self.chip.read(self.CLK)
         
         if clk_state != self.last_clk:
             current_time = monotonic()
+            if journal.enabled:
+                journal.record("gpio", {"clk": clk_state, "dt": self.chip.read(self.DT)})
             if current_time - self._last_adjustment_time >= self.DEBOUNCE_TIME:
-                dt_state = lgpio.gpio_read(self.chip_handle, self.DT)
+                dt_state = self.chip.read(self.DT)
                 
                 if dt_state != clk_state:
                     logger.debug("Rotation horaire →")
-                    self.rotation_accumulator += 1
+                    direction = 1
+                    self._events_cw.inc()
                 else:
                     logger.debug("Rotation anti-horaire ←")
-                    self.rotation_accumulator -= 1
+                    direction = -1
+                    self._events_ccw.inc()
+
+                # Bouton enfoncé : le cran est un geste (press_turn), pas un changement de volume
+                if self._turn_gestures and self.gestures.pressed:
+                    self.gestures.turn(direction, current_time)
+                else:
+                    self.rotation_accumulator += self.acceleration.step(direction, current_time)
+                    ROTARY_SPEED.observe(self.acceleration.speed)
+                    self._rotation_pending.set()
                 
                 self._last_adjustment_time = current_time
+                if self.on_activity:
+                    self.on_activity("rotary")
             
             self.last_clk = clk_state
 
     async def _check_button(self):
-        """Vérifie et traite l'appui sur le bouton"""
-        if lgpio.gpio_read(self.chip_handle, self.SW) == 0:
-            current_time = monotonic()
-            if current_time - self._last_adjustment_time >= self.DEBOUNCE_TIME:
+        """Suit les fronts du bouton et fait avancer le recognizer (aucune attente : la rotation reste échantillonnée)"""
+        current_time = monotonic()
+        level = self.chip.read(self.SW)
+        if level != self._sw_level and current_time - self._sw_changed_at >= self.BUTTON_DEBOUNCE:
+            self._sw_level = level
+            self._sw_changed_at = current_time
+            if journal.enabled:
+                journal.record("gpio", {"sw": level})
+            if level == 0:
                 logger.debug("Bouton pressé")
-                # Vous pouvez ajouter une action pour le bouton ici
-                self._last_adjustment_time = current_time
-            await asyncio.sleep(0.2)
+                ROTARY_BUTTON_PRESSES.inc()
+                self.gestures.press(current_time)
+            else:
+                self.gestures.release(current_time)
+            if self.on_activity:
+                self.on_activity("rotary")
+        self.gestures.poll(current_time)
+
+    def configure_gestures(self, actions: Dict[str, str], run_action: Callable[[str], Awaitable],
+                           long_after: float = 0.6, double_gap: float = 0.3):
+        """Active les gestes : table geste -> action et exécuteur des actions"""
+        self.gesture_actions = actions
+        self._run_action = run_action
+        self._turn_gestures = "press_turn_cw" in actions or "press_turn_ccw" in actions
+        self.gestures.long_after = long_after
+        self.gestures.double_gap = double_gap
+        self.gestures.wait_double = "double_press" in actions
+        logger.info(f"Rotary gestures: {actions}")
+
+    def _on_gesture(self, gesture: str, at: float):
+        action = self.gesture_actions.get(gesture)
+        logger.debug(f"Geste {gesture} -> {action}")
+        ROTARY_GESTURES.labels(gesture).inc()
+        if action and self._run_action:
+            # Hors de la boucle de surveillance : un changement de source dure plusieurs secondes
+            asyncio.create_task(self._execute_gesture(action, at))
+
+    async def _execute_gesture(self, action: str, at: float):
+        ROTARY_GESTURE_SECONDS.observe(monotonic() - at)
+        try:
+            await self._run_action(action)
+        except Exception as e:
+            logger.error(f"Rotary action {action} failed: {e}")
+
+    async def replay_event(self, event: dict):
+        """Réinjecte un front journalisé ; seule la puce simulée accepte des fronts"""
+        if not isinstance(self.chip, SimulatedGpioChip):
+            return
+        now = monotonic()
+        if "sw" in event:
+            self.chip.queue_edge(now, self.SW, event["sw"])
+        else:
+            self.chip.queue_edge(now, self.DT, event["dt"])
+            self.chip.queue_edge(now, self.CLK, event["clk"])
 
     def cleanup(self):
         """Nettoie les ressources GPIO"""
         logger.info("Cleaning up rotary encoder resources")
         self.running = False
+        self._rotation_pending.set()
         
-        if self.chip_handle is not None:
+        if self.chip is not None:
             try:
                 for pin in [self.CLK, self.DT, self.SW]:
                     try:
-                        lgpio.gpio_free(self.chip_handle, pin)
+                        self.chip.free(pin)
                     except:
                         pass
-                lgpio.gpiochip_close(self.chip_handle)
+                self.chip.close()
                 logger.info("GPIO cleaned up successfully")
             except Exception as e:
                 logger.error(f"Error during GPIO cleanup: {e}")
\ No newline at end of file
@@ -0,0 +1,104 @@
+# websocket/codec.py
+"""
+Encodages du protocole WebSocket.
+
+JSON (texte) reste l'encodage par défaut. Un client peut demander MessagePack
+(trames binaires) via le sous-protocole `sonoak.msgpack` ou `?encoding=msgpack`.
+
+Trames MessagePack envoyées par le serveur :
+    [0, début, [chaîne, ...]]  extension de la table d'internement
+    [1, message]               message ; une chaîne internée est codée ext(1, index)
+La table est commune à toutes les connexions et ne fait que grandir : le serveur
+envoie à chaque client les entrées qu'il ne connaît pas encore juste avant le
+message qui les utilise. Les messages du client sont du MessagePack simple.
+"""
+import json
+import logging
+from typing import Dict, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # msgpack est optionnel : sans lui, seul JSON est proposé
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+JSON = "json"
+MSGPACK = "msgpack"
+MSGPACK_SUBPROTOCOL = "sonoak.msgpack"
+
+FRAME_TABLE = 0
+FRAME_MESSAGE = 1
+EXT_INTERNED = 1
+# fixarray de 2 éléments suivi de l'entier 1 : en-tête d'une trame message
+_MESSAGE_PREFIX = b"\x92\x01"
+
+
+def negotiate(websocket) -> str:
+    """Encodage demandé par le client : JSON ou MSGPACK (JSON si msgpack est absent)"""
+    wanted = websocket.query_params.get("encoding", JSON)
+    if MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+        wanted = MSGPACK
+    if wanted == MSGPACK and msgpack is None:
+        logger.warning("msgpack non installé : encodage JSON imposé")
+        wanted = JSON
+    return wanted if wanted in (JSON, MSGPACK) else JSON
+
+
+class InternTable:
+    """Table partagée chaîne -> index, bornée (au-delà, les chaînes passent en clair)"""
+
+    def __init__(self, max_entries: int = 4096, max_length: int = 128):
+        self.max_entries = max_entries
+        self.max_length = max_length
+        self.strings: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def lookup(self, value: str) -> Optional[int]:
+        index = self.index.get(value)
+        if index is None and len(value) <= self.max_length and len(self.strings) < self.max_entries:
+            index = len(self.strings)
+            self.strings.append(value)
+            self.index[value] = index
+        return index
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class MsgpackEncoder:
+    def __init__(self, table: Optional[InternTable] = None):
+        self.table = table or InternTable()
+
+    def _intern(self, value):
+        if isinstance(value, str):
+            index = self.table.lookup(value)
+            return value if index is None else msgpack.ExtType(EXT_INTERNED, msgpack.packb(index))
+        if isinstance(value, dict):
+            return {self._intern(key): self._intern(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._intern(item) for item in value]
+        return value
+
+    def encode(self, message: dict) -> bytes:
+        """Trame message, encodée une fois pour toutes les connexions"""
+        return _MESSAGE_PREFIX + msgpack.packb(self._intern(message), default=str)
+
+    def table_frame(self, start: int, end: Optional[int] = None) -> bytes:
+        """Entrées de la table de `start` à `end` (à envoyer avant le message)"""
+        return msgpack.packb([FRAME_TABLE, start, self.table.strings[start:end]])
+
+
+def encode_json(message: dict) -> str:
+    return json.dumps(message, ensure_ascii=False, default=str)
+
+
+def decode(raw: dict) -> dict:
+    """Décode un message ASGI websocket.receive (texte JSON ou binaire MessagePack)"""
+    if raw.get("text") is not None:
+        return json.loads(raw["text"])
+    if raw.get("bytes") is not None:
+        if msgpack is None:
+            raise ValueError("Binary message received but msgpack is not installed")
+        return msgpack.unpackb(raw["bytes"])
+    raise ValueError("Empty WebSocket message")
@@ -0,0 +1,203 @@
+# websocket/dispatcher.py
+"""
+Traitement concurrent et borné des messages d'une connexion WebSocket.
+
+Chaque message est rangé dans une file (lane) selon sa politique : les messages
+d'une même file sont traités dans l'ordre, les files avancent en parallèle dans
+la limite de `max_workers`. Une commande de volume n'attend donc plus un
+get_status snapcast ou un changement de source.
+
+Modes :
+    ordered   tout est exécuté, dans l'ordre (crans de volume)
+    latest    un message en attente de même clé est retiré, le plus récent va en fin de file
+              (l'ordre avec les messages ordered de la même file est conservé)
+    coalesce  ignoré si un message identique attend déjà (demandes d'état)
+Un message qui a attendu plus que son délai est rejeté sans être exécuté ; un
+handler qui dépasse son délai est annulé. À la déconnexion, seules les demandes
+d'état en cours sont annulées : une commande déjà lancée va au bout.
+"""
+import asyncio
+import logging
+from collections import deque
+from time import monotonic
+from typing import Awaitable, Callable, Deque, Dict, NamedTuple, Optional, Tuple
+
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+ORDERED = "ordered"
+LATEST = "latest"
+COALESCE = "coalesce"
+
+WS_DISPATCH_DROPPED = metrics.counter(
+    "sonoak_websocket_dispatch_dropped_total", "Messages WebSocket non exécutés par raison", ["service", "reason"]
+)
+WS_DISPATCH_WAIT_SECONDS = metrics.histogram(
+    "sonoak_websocket_dispatch_wait_seconds", "Attente en file avant traitement d'un message", ["service"]
+)
+
+
+class MessagePolicy(NamedTuple):
+    lane: str
+    mode: str = ORDERED
+    deadline: Optional[float] = None
+    # Champs du message qui distinguent deux commandes « latest » (ex. client_id)
+    key_fields: Tuple[str, ...] = ()
+
+
+POLICIES: Dict[Tuple[str, str], MessagePolicy] = {
+    ("volume", "get_volume"): MessagePolicy("status", COALESCE),
+    ("volume", "set_volume"): MessagePolicy("volume", LATEST),
+    ("volume", "adjust_volume"): MessagePolicy("volume", ORDERED),
+    ("volume", "set_mute"): MessagePolicy("volume", LATEST),
+    ("audio", "get_status"): MessagePolicy("status", COALESCE),
+    ("audio", "switch_source"): MessagePolicy("source", LATEST, deadline=15.0),
+    ("snapcast", "get_status"): MessagePolicy("status", COALESCE, deadline=10.0),
+    ("snapcast", "set_client_volume"): MessagePolicy("volume", LATEST, key_fields=("client_id",)),
+    ("snapcast", "set_clients_volume"): MessagePolicy("volume", ORDERED),
+    ("snapcast", "set_client_mute"): MessagePolicy("volume", LATEST, key_fields=("client_id",)),
+    ("snapcast", "set_group_volume"): MessagePolicy("volume", LATEST, key_fields=("group_id",)),
+    ("snapcast", "set_group_mute"): MessagePolicy("volume", LATEST, key_fields=("group_id",)),
+    ("snapcast", "set_all_volume"): MessagePolicy("volume", LATEST),
+    ("snapcast", "set_client_latency"): MessagePolicy("latency", LATEST, key_fields=("client_id",)),
+    ("spotify", "get_status"): MessagePolicy("status", COALESCE),
+    ("spotify", "get_playback_status"): MessagePolicy("status", COALESCE),
+    ("spotify", "play_pause"): MessagePolicy("player", ORDERED),
+    ("spotify", "play"): MessagePolicy("player", ORDERED),
+    ("spotify", "pause"): MessagePolicy("player", ORDERED),
+    ("spotify", "next_track"): MessagePolicy("player", ORDERED),
+    ("spotify", "previous_track"): MessagePolicy("player", ORDERED),
+    ("spotify", "seek"): MessagePolicy("player", LATEST),
+    ("bluetooth", "get_status"): MessagePolicy("status", COALESCE),
+    ("bluetooth", "disconnect_device"): MessagePolicy("device", ORDERED),
+    ("display", "get_status"): MessagePolicy("status", COALESCE),
+    ("display", "wake"): MessagePolicy("power", LATEST),
+    ("display", "sleep"): MessagePolicy("power", LATEST),
+    ("display", "set_timeout"): MessagePolicy("timeout", LATEST),
+}
+
+
+def policy_for(service: str, message_type: Optional[str]) -> MessagePolicy:
+    # Types inconnus : une file par type, dans l'ordre
+    return POLICIES.get((service, message_type)) or MessagePolicy(f"type:{message_type}")
+
+
+class _Pending:
+    __slots__ = ("message", "policy", "key", "enqueued_at")
+
+    def __init__(self, message: dict, policy: MessagePolicy, key: tuple):
+        self.message = message
+        self.policy = policy
+        self.key = key
+        self.enqueued_at = monotonic()
+
+
+class ConnectionDispatcher:
+    def __init__(self, service: str,
+                 handler: Callable[[str, dict], Awaitable],
+                 on_error: Callable[[dict, str], Awaitable],
+                 max_workers: int = 4, max_queue: int = 32, default_deadline: float = 5.0):
+        self.service = service
+        self.handler = handler
+        self.on_error = on_error
+        self.max_queue = max_queue
+        self.default_deadline = default_deadline
+        self._workers = asyncio.Semaphore(max_workers)
+        self._lanes: Dict[str, Deque[_Pending]] = {}
+        self._runners: Dict[str, asyncio.Task] = {}
+        self._current: Dict[str, _Pending] = {}
+        self._queued = 0
+        self._wait_seconds = WS_DISPATCH_WAIT_SECONDS.labels(service)
+
+    def _drop(self, reason: str):
+        WS_DISPATCH_DROPPED.labels(self.service, reason).inc()
+
+    def submit(self, message: dict):
+        """Met le message en file sans attendre son traitement"""
+        message_type = message.get("type")
+        policy = policy_for(self.service, message_type)
+        key = (message_type,) + tuple(message.get(field) for field in policy.key_fields)
+        lane = self._lanes.setdefault(policy.lane, deque())
+
+        if policy.mode == COALESCE and any(p.key == key and p.message == message for p in lane):
+            self._drop("coalesced")
+            return
+        if policy.mode == LATEST:
+            for pending in lane:
+                if pending.key == key:
+                    # Pas de remplacement sur place : set_volume(60) passerait avant un
+                    # adjust_volume reçu entre-temps
+                    lane.remove(pending)
+                    self._queued -= 1
+                    self._drop("superseded")
+                    break
+
+        if self._queued >= self.max_queue:
+            self._drop("busy")
+            asyncio.create_task(self.on_error(message, "Too many pending requests"))
+            return
+
+        lane.append(_Pending(message, policy, key))
+        self._queued += 1
+        if policy.lane not in self._runners:
+            self._runners[policy.lane] = asyncio.create_task(self._run_lane(policy.lane))
+
+    async def _run_lane(self, name: str):
+        lane = self._lanes[name]
+        try:
+            while lane:
+                async with self._workers:
+                    if not lane:
+                        break
+                    pending = lane.popleft()
+                    self._queued -= 1
+                    self._current[name] = pending
+                    try:
+                        await self._execute(pending)
+                    finally:
+                        self._current.pop(name, None)
+        finally:
+            self._runners.pop(name, None)
+
+    async def _execute(self, pending: _Pending):
+        deadline = pending.policy.deadline or self.default_deadline
+        waited = monotonic() - pending.enqueued_at
+        self._wait_seconds.observe(waited)
+        if waited > deadline:
+            self._drop("expired")
+            await self.on_error(pending.message, "Request expired before processing")
+            return
+        try:
+            async with asyncio.timeout(deadline - waited):
+                await self.handler(self.service, pending.message)
+        except TimeoutError:
+            self._drop("timeout")
+            logger.error(f"Timeout processing {pending.message.get('type')} for {self.service}")
+            await self.on_error(pending.message, "Request timeout")
+        except Exception as e:
+            logger.error(f"Error handling {self.service} message: {e}", exc_info=True)
+            await self.on_error(pending.message, str(e))
+
+    def get_stats(self) -> dict:
+        return {
+            "queued": self._queued,
+            "lanes": {name: len(lane) for name, lane in self._lanes.items() if lane},
+            "running": sorted(self._runners)
+        }
+
+    async def close(self):
+        """Vide les files à la déconnexion et annule les demandes d'état en cours"""
+        for lane in self._lanes.values():
+            lane.clear()
+        self._queued = 0
+        cancelled = []
+        for name, task in list(self._runners.items()):
+            current = self._current.get(name)
+            # Une commande interrompue laisserait l'état à moitié appliqué (script de
+            # changement de source lancé, current_source inchangé) : elle va au bout,
+            # dans la limite de son délai, puis la file vide s'arrête d'elle-même
+            if current is None or current.policy.mode == COALESCE:
+                task.cancel()
+                cancelled.append(task)
+        await asyncio.gather(*cancelled, return_exceptions=True)
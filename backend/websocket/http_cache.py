@@ -0,0 +1,112 @@
+# websocket/http_cache.py
+# Réponses REST servies depuis l'état versionné : ETag, If-None-Match, Cache-Control, long-poll
+import asyncio
+import json
+import zlib
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+
+from websocket.state import ServiceStateStore
+
+MAX_LONG_POLL = 60.0
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _encode(body: Any) -> bytes:
+    return json.dumps(body, ensure_ascii=False, default=str, separators=(",", ":")).encode()
+
+
+def _content_tag(content: bytes) -> str:
+    return f"{zlib.crc32(content):08x}"
+
+
+def _parse_since(store: ServiceStateStore, since: str) -> Optional[int]:
+    """
+    Version d'un jeton "<epoch>-<version>" (ou d'une version seule) ;
+    None si le jeton vient d'un autre démarrage ou est illisible
+    """
+    epoch, _, version = since.rpartition("-")
+    if epoch and epoch != store.epoch:
+        return None
+    try:
+        return int(version)
+    except ValueError:
+        return None
+
+
+def cached_json(request: Request, body: Any, etag: Optional[str] = None, max_age: int = 0) -> Response:
+    """JSON avec ETag (contenu haché si absent) ; 304 si le client a déjà cette version"""
+    content = _encode(body)
+    etag = etag or f'"{_content_tag(content)}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"max-age={max_age}, must-revalidate" if max_age else "no-cache"
+    }
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type="application/json", headers=headers)
+
+
+async def state_response(request: Request, store: ServiceStateStore, service: str,
+                         build: Callable[[], Any], since: Optional[str] = None,
+                         timeout: float = 25.0, max_age: int = 1) -> Response:
+    """
+    Sert build() versionné par l'état diffusé du service.
+    Avec since (jeton X-State-Version "<epoch>-<version>"), attend (au plus timeout s)
+    une version plus récente ; 304 si rien n'a changé. Un jeton d'un autre démarrage
+    répond tout de suite.
+    """
+    known = _parse_since(store, since) if since is not None else None
+    if known is not None:
+        await store.wait_for_change(service, known, min(max(timeout, 0.0), MAX_LONG_POLL))
+
+    version = store.version(service)
+    token = f"{store.epoch}-{version}"
+    etag = f'"{store.epoch}-{service}-{version}"'
+    if known is not None and version == known:
+        return Response(status_code=304, headers={"ETag": etag, "X-State-Version": token})
+
+    response = cached_json(request, build(), etag, max_age)
+    response.headers["X-State-Version"] = token
+    return response
+
+
+async def content_response(request: Request, store: ServiceStateStore, service: str,
+                           build: Callable[[], Any], since: Optional[str] = None,
+                           timeout: float = 25.0, max_age: int = 1) -> Response:
+    """
+    Comme state_response, mais versionné par le contenu de build() : pour les vues
+    qui ne couvrent qu'une partie des messages diffusés par le service (les autres
+    diffusions réveillent l'attente sans produire de réponse).
+    Le jeton X-State-Version (et l'ETag) est le hachage du contenu.
+    """
+    content = _encode(build())
+    tag = _content_tag(content)
+    if since is not None and tag == since:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(max(timeout, 0.0), MAX_LONG_POLL)
+        while tag == since:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return Response(status_code=304, headers={"ETag": f'"{tag}"', "X-State-Version": tag})
+            await store.wait_for_change(service, store.version(service), remaining)
+            content = _encode(build())
+            tag = _content_tag(content)
+
+    etag = f'"{tag}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"max-age={max_age}, must-revalidate" if max_age else "no-cache",
+        "X-State-Version": tag
+    }
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type="application/json", headers=headers)
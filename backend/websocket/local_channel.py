@@ -0,0 +1,189 @@
+# websocket/local_channel.py
+"""
+Canal d'état local (socket Unix) pour l'interface kiosque et les overlays natifs du Pi.
+
+Chaque mise à jour du ServiceStateStore est encodée une seule fois puis poussée à
+tous les lecteurs locaux, avant les envois WebSocket. Trame :
+    u32 longueur | u8 type | u8 service | u32 version | charge
+Types :
+    1 VOLUME  charge = u8 volume affiché, u8 cible, u8 volume ALSA, u8 drapeaux, i16 dB x 100
+              (bit 0 = show_volume_bar, bit 1 = is_initial_status, bit 2 = muted, bit 3 = stale)
+    2 JSON    charge = message JSON compact (UTF-8)
+Un volume_status portant un champ que la trame binaire ne sait pas transporter
+part en JSON : aucun champ n'est perdu pour les lecteurs locaux.
+À la connexion, un lecteur reçoit le dernier état de chaque service.
+
+Lecteur de démonstration (depuis backend/) :
+    python -m websocket.local_channel /run/sonoak/state.sock
+"""
+import asyncio
+import json
+import logging
+import os
+import struct
+import sys
+from typing import Dict, Optional, Set, Tuple
+
+from monitoring import metrics
+from websocket.state import ServiceStateStore
+
+logger = logging.getLogger(__name__)
+
+FRAME_LENGTH = struct.Struct("<I")
+FRAME_HEADER = struct.Struct("<BBI")
+VOLUME_PAYLOAD = struct.Struct("<BBBBh")
+
+# Champs d'un volume_status transportés par la trame binaire (target et db requis)
+VOLUME_FIELDS = {"type", "volume", "target", "muted", "alsa_volume", "db", "show_volume_bar",
+                 "is_initial_status", "stale"}
+
+KIND_VOLUME = 1
+KIND_JSON = 2
+
+SERVICES = ["audio", "volume", "bluetooth", "snapcast", "spotify"]
+SERVICE_IDS = {name: index for index, name in enumerate(SERVICES)}
+UNKNOWN_SERVICE = 255
+
+LOCAL_CLIENTS = metrics.gauge(
+    "sonoak_local_channel_clients", "Lecteurs connectés au canal d'état local"
+)
+LOCAL_FRAMES_DROPPED = metrics.counter(
+    "sonoak_local_channel_frames_dropped_total", "Trames abandonnées pour un lecteur local trop lent"
+)
+
+
+def _byte(value) -> int:
+    return max(0, min(255, int(value or 0)))
+
+
+def _centi_db(value) -> int:
+    return max(-32768, min(32767, round(float(value) * 100)))
+
+
+def _binary_volume(message: dict) -> bool:
+    return (message.get("type") == "volume_status" and message.keys() <= VOLUME_FIELDS
+            and "target" in message and message.get("db") is not None)
+
+
+def encode_frame(service: str, version: int, message: dict) -> bytes:
+    service_id = SERVICE_IDS.get(service, UNKNOWN_SERVICE)
+    if _binary_volume(message):
+        flags = (bool(message.get("show_volume_bar")) | bool(message.get("is_initial_status")) << 1
+                 | bool(message.get("muted")) << 2 | bool(message.get("stale")) << 3)
+        body = FRAME_HEADER.pack(KIND_VOLUME, service_id, version & 0xFFFFFFFF) + VOLUME_PAYLOAD.pack(
+            _byte(message.get("volume")), _byte(message.get("target")), _byte(message.get("alsa_volume")),
+            flags, _centi_db(message["db"])
+        )
+    else:
+        payload = json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+        body = FRAME_HEADER.pack(KIND_JSON, service_id, version & 0xFFFFFFFF) + payload
+    return FRAME_LENGTH.pack(len(body)) + body
+
+
+def decode_frame(body: bytes) -> Tuple[str, int, dict]:
+    kind, service_id, version = FRAME_HEADER.unpack_from(body)
+    service = SERVICES[service_id] if service_id < len(SERVICES) else "unknown"
+    payload = body[FRAME_HEADER.size:]
+    if kind == KIND_VOLUME:
+        volume, target, alsa_volume, flags, centi_db = VOLUME_PAYLOAD.unpack(payload)
+        message = {
+            "type": "volume_status",
+            "volume": volume,
+            "target": target,
+            "muted": bool(flags & 4),
+            "alsa_volume": alsa_volume,
+            "db": centi_db / 100,
+            "show_volume_bar": bool(flags & 1),
+            "is_initial_status": bool(flags & 2)
+        }
+        if flags & 8:
+            message["stale"] = True
+        return service, version, message
+    return service, version, json.loads(payload)
+
+
+class LocalStateChannel:
+    def __init__(self, path: str, store: ServiceStateStore, queue_size: int = 256):
+        self.path = path
+        self.store = store
+        self.queue_size = queue_size
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients: Set[asyncio.Queue] = set()
+        self.frames_published = 0
+
+    async def start(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle_client, path=self.path)
+        os.chmod(self.path, 0o660)
+        self.store.add_listener(self._publish)
+        logger.info(f"Local state channel listening on {self.path}")
+
+    def _publish(self, service: str, version: int, message: dict):
+        if not self._clients:
+            return
+        frame = encode_frame(service, version, message)
+        self.frames_published += 1
+        for queue in self._clients:
+            self._enqueue(queue, frame)
+
+    def _enqueue(self, queue: asyncio.Queue, frame: bytes):
+        if queue.full():
+            # Lecteur en retard : on sacrifie la trame la plus ancienne
+            queue.get_nowait()
+            LOCAL_FRAMES_DROPPED.inc()
+        queue.put_nowait(frame)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        for service in SERVICES:
+            for version, message in self.store.snapshot(service):
+                self._enqueue(queue, encode_frame(service, version, message))
+        self._clients.add(queue)
+        LOCAL_CLIENTS.set(len(self._clients))
+        try:
+            while True:
+                frame = await queue.get()
+                writer.write(frame)
+                # Regroupe les trames déjà en attente dans la même écriture
+                while not queue.empty():
+                    writer.write(queue.get_nowait())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(queue)
+            LOCAL_CLIENTS.set(len(self._clients))
+            writer.close()
+
+    def get_stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "clients": len(self._clients),
+            "frames_published": self.frames_published
+        }
+
+    async def stop(self):
+        self.store.remove_listener(self._publish)
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+async def _read(path: str):
+    reader, _ = await asyncio.open_unix_connection(path)
+    while True:
+        length = FRAME_LENGTH.unpack(await reader.readexactly(FRAME_LENGTH.size))[0]
+        print(decode_frame(await reader.readexactly(length)))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_read(sys.argv[1]))
+    except (KeyboardInterrupt, asyncio.IncompleteReadError):
+        pass
@@ -2,11 +2,36 @@
 import logging
 import asyncio
 from fastapi import WebSocket
-from typing import Dict, Set, Optional
+from starlette.websockets import WebSocketDisconnect
+from typing import Dict, Set, Optional, Tuple
 from datetime import datetime
+from time import perf_counter
+
+from monitoring import metrics
+from websocket import codec
+from websocket.state import ServiceStateStore
 
 logger = logging.getLogger(__name__)
 
+WS_CONNECTIONS = metrics.gauge(
+    "sonoak_websocket_connections", "Connexions WebSocket ouvertes par service", ["service"]
+)
+WS_BROADCAST_SECONDS = metrics.histogram(
+    "sonoak_websocket_broadcast_seconds", "Durée d'un broadcast vers tous les clients d'un service", ["service"]
+)
+WS_MESSAGES_SENT = metrics.counter(
+    "sonoak_websocket_messages_sent_total", "Messages envoyés aux clients WebSocket", ["service"]
+)
+WS_SEND_ERRORS = metrics.counter(
+    "sonoak_websocket_send_errors_total", "Échecs d'envoi vers un client WebSocket", ["service"]
+)
+WS_BYTES_SENT = metrics.counter(
+    "sonoak_websocket_bytes_sent_total", "Octets envoyés aux clients WebSocket", ["service", "encoding"]
+)
+WS_SEND_QUEUE_DEPTH = metrics.gauge(
+    "sonoak_websocket_send_queue_depth", "Envois en attente (broadcasts en cours) par service", ["service"]
+)
+
 class WebSocketManager:
     def __init__(self):
         self.active_connections: Dict[str, Set[WebSocket]] = {}
@@ -14,21 +39,39 @@ class WebSocketManager:
         self.connection_timeouts: Dict[WebSocket, datetime] = {}
         self.reconnect_attempts: Dict[str, int] = {}
         self.max_reconnect_attempts = 5
+        # Dernier état diffusé par service (canal local, reprise des clients)
+        self.state = ServiceStateStore()
+        # Encodage négocié par connexion et entrées de la table d'internement déjà envoyées
+        self.encodings: Dict[WebSocket, str] = {}
+        self.table_sent: Dict[WebSocket, int] = {}
+        self.msgpack_encoder = codec.MsgpackEncoder() if codec.msgpack else None
 
     async def connect(self, websocket: WebSocket, service: str) -> bool:
         """
         Handle new WebSocket connection with improved error handling
         """
         try:
-            await websocket.accept()
+            encoding = codec.negotiate(websocket)
+            subprotocol = None
+            if encoding == codec.MSGPACK and codec.MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+                subprotocol = codec.MSGPACK_SUBPROTOCOL
+            await websocket.accept(subprotocol=subprotocol)
+            self.encodings[websocket] = encoding
+            self.table_sent[websocket] = 0
             if service not in self.active_connections:
                 self.active_connections[service] = set()
             self.active_connections[service].add(websocket)
             self.connection_timeouts[websocket] = datetime.now()
+            WS_CONNECTIONS.labels(service).set(len(self.active_connections[service]))
             
             # Start heartbeat for this connection
             asyncio.create_task(self._heartbeat(websocket, service))
-            
+
+            # État restauré au démarrage : servi tout de suite, en attendant les valeurs fraîches
+            for _, message in self.state.snapshot(service):
+                if message.get("stale"):
+                    await self.send(websocket, message, service)
+
             return True
         except Exception as e:
             logger.error(f"Error connecting WebSocket for {service}: {e}")
@@ -43,26 +86,92 @@ class WebSocketManager:
             if service in self.active_connections:
                 self.active_connections[service].discard(websocket)
                 self.connection_timeouts.pop(websocket, None)
+                self.encodings.pop(websocket, None)
+                self.table_sent.pop(websocket, None)
+                WS_CONNECTIONS.labels(service).set(len(self.active_connections[service]))
             
             # Reset reconnection attempts on clean disconnect
             self.reconnect_attempts[service] = 0
         except Exception as e:
             logger.error(f"Error during WebSocket disconnect for {service}: {e}")
 
-    async def broadcast_to_service(self, message: dict, service: str):
+    async def send(self, websocket: WebSocket, message: dict, service: str = ""):
+        """Envoie un message à une seule connexion dans son encodage négocié"""
+        if self.encodings.get(websocket) == codec.MSGPACK:
+            await self._send_msgpack(websocket, self.msgpack_encoder.encode(message), service)
+        else:
+            text = codec.encode_json(message)
+            await websocket.send_text(text)
+            WS_BYTES_SENT.labels(service, codec.JSON).inc(len(text))
+
+    async def receive(self, websocket: WebSocket) -> dict:
+        """Reçoit et décode un message (texte JSON ou binaire MessagePack)"""
+        raw = await websocket.receive()
+        if raw["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(raw.get("code", 1000))
+        return codec.decode(raw)
+
+    async def _send_msgpack(self, websocket: WebSocket, frame: bytes, service: str,
+                            table_frames: Optional[Dict[Tuple[int, int], bytes]] = None):
+        known = self.table_sent.get(websocket, 0)
+        # Borne relevée avant l'envoi : un broadcast concurrent peut allonger la table pendant l'await
+        end = len(self.msgpack_encoder.table)
+        if known < end:
+            # Entrées de table manquantes pour ce client, partagées entre clients au même point
+            table_frame = table_frames.get((known, end)) if table_frames is not None else None
+            if table_frame is None:
+                table_frame = self.msgpack_encoder.table_frame(known, end)
+                if table_frames is not None:
+                    table_frames[(known, end)] = table_frame
+            await websocket.send_bytes(table_frame)
+            self.table_sent[websocket] = max(end, self.table_sent.get(websocket, 0))
+            WS_BYTES_SENT.labels(service, codec.MSGPACK).inc(len(table_frame))
+        await websocket.send_bytes(frame)
+        WS_BYTES_SENT.labels(service, codec.MSGPACK).inc(len(frame))
+
+    async def broadcast_to_service(self, message: dict, service: str, retain: bool = True):
         """
-        Broadcast message to all clients of a service with error handling
+        Broadcast message to all clients of a service with error handling.
+        retain=False : flux continu (mesure de niveau) non conservé dans le ServiceStateStore
         """
+        if retain:
+            self.state.update(service, message)
         if service not in self.active_connections:
             return
 
+        connections = self.active_connections[service].copy()
+        queue_depth = WS_SEND_QUEUE_DEPTH.labels(service)
+        queue_depth.inc(len(connections))
+        start = perf_counter()
+
+        # Encodé une seule fois par encodage, quel que soit le nombre de clients
+        text = None
+        frame = None
+        table_frames: Dict[Tuple[int, int], bytes] = {}
+        json_bytes = WS_BYTES_SENT.labels(service, codec.JSON)
+
         dead_connections = set()
-        for connection in self.active_connections[service].copy():
+        for connection in connections:
             try:
-                await connection.send_json(message)
+                if self.encodings.get(connection) == codec.MSGPACK:
+                    if frame is None:
+                        frame = self.msgpack_encoder.encode(message)
+                    await self._send_msgpack(connection, frame, service, table_frames)
+                else:
+                    if text is None:
+                        text = codec.encode_json(message)
+                    await connection.send_text(text)
+                    json_bytes.inc(len(text))
             except Exception as e:
                 logger.error(f"Error broadcasting to {service}: {e}")
                 dead_connections.add(connection)
+            finally:
+                queue_depth.dec()
+
+        WS_BROADCAST_SECONDS.labels(service).observe(perf_counter() - start)
+        WS_MESSAGES_SENT.labels(service).inc(len(connections) - len(dead_connections))
+        if dead_connections:
+            WS_SEND_ERRORS.labels(service).inc(len(dead_connections))
 
         # Clean up dead connections
         for dead_conn in dead_connections:
@@ -77,7 +186,7 @@ class WebSocketManager:
                 if websocket not in self.connection_timeouts:
                     break
                 
-                await websocket.send_json({"type": "ping"})
+                await self.send(websocket, {"type": "ping"}, service)
                 self.connection_timeouts[websocket] = datetime.now()
                 await asyncio.sleep(self.heartbeat_interval)
             except Exception as e:
@@ -0,0 +1,164 @@
+# websocket/persistence.py
+"""
+État persistant pour un redémarrage à chaud.
+
+Les derniers messages utiles (source, volume, appareil Bluetooth, piste en cours)
+sont recopiés depuis le ServiceStateStore dans un petit fichier JSON compact,
+écrit de façon atomique (fichier temporaire + fsync + rename) et au plus une
+fois par `save_interval` pour ménager la carte SD.
+
+Au démarrage, seed() réinjecte ces messages dans le store marqués `"stale": true` :
+REST, long-poll, canal local et nouveaux clients WebSocket les servent tout de
+suite, puis les managers les remplacent au fil de leurs premières mises à jour.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# (service, type) conservés d'un démarrage à l'autre
+PERSISTED = {
+    ("audio", "audio_state_change"),
+    ("volume", "volume_status"),
+    ("bluetooth", "devices_status"),
+    ("spotify", "playback_status"),
+}
+
+
+def _compact(service: str, message: dict) -> dict:
+    """Retire ce qui n'a pas de sens après un redémarrage (et changerait à chaque seconde)"""
+    if service == "spotify" and message.get("status"):
+        status = {key: value for key, value in message["status"].items() if key != "position"}
+        return {**message, "status": status}
+    if service == "volume":
+        return {**message, "show_volume_bar": False, "is_initial_status": True}
+    return message
+
+
+def write_atomic(path: str, data: bytes):
+    """Remplace le fichier d'un seul coup : un crash laisse l'ancienne ou la nouvelle version"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+class PersistentState:
+    def __init__(self, path: str, store, save_interval: float = 5.0):
+        self.path = path
+        self.store = store
+        self.save_interval = save_interval
+        self.messages: Dict[str, dict] = {}
+        self.saved_at: Optional[float] = None
+        self.saves = 0
+        self._dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+
+    def load(self) -> Dict[str, dict]:
+        """Lit le fichier ; un fichier absent, illisible ou d'un autre format est ignoré"""
+        try:
+            with open(self.path, "rb") as f:
+                content = json.loads(f.read())
+            if content.get("v") != FORMAT_VERSION:
+                raise ValueError(f"format {content.get('v')}")
+            self.messages = {
+                service: message for service, message in content.get("messages", {}).items()
+                if (service, message.get("type")) in PERSISTED
+            }
+            self.saved_at = content.get("saved_at")
+        except FileNotFoundError:
+            self.messages = {}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"État persistant ignoré ({self.path}): {e}")
+            self.messages = {}
+        return self.messages
+
+    def seed(self):
+        """Publie l'état chargé dans le store, marqué périmé, puis suit les mises à jour"""
+        for service, message in self.messages.items():
+            self.store.update(service, {**message, "stale": True})
+        if self.messages:
+            age = time.time() - self.saved_at if self.saved_at else 0
+            logger.info(f"État restauré depuis {self.path} ({len(self.messages)} services, {age:.0f}s)")
+        self.store.add_listener(self._on_state)
+
+    def last_source(self) -> Optional[str]:
+        message = self.messages.get("audio")
+        return message["data"].get("current_source") if message and message.get("data") else None
+
+    def last_device(self) -> Optional[dict]:
+        message = self.messages.get("bluetooth")
+        return message.get("activeDevice") if message else None
+
+    def _on_state(self, service: str, version: int, message: dict):
+        if message.get("stale") or (service, message.get("type")) not in PERSISTED:
+            return
+        compact = _compact(service, message)
+        if self.messages.get(service) == compact:
+            return
+        self.messages[service] = compact
+        self._dirty = True
+        if self._save_task is None:
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self):
+        try:
+            await asyncio.sleep(self.save_interval)
+            await self.save()
+        finally:
+            self._save_task = None
+        # Changement arrivé pendant l'écriture (ou écriture en échec) : nouvelle échéance
+        if self._dirty:
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def save(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        self.saved_at = time.time()
+        data = json.dumps(
+            {"v": FORMAT_VERSION, "saved_at": self.saved_at, "messages": self.messages},
+            separators=(",", ":"), ensure_ascii=False, default=str
+        ).encode()
+        try:
+            # fsync hors de la boucle : peut prendre plusieurs dizaines de ms sur carte SD
+            await asyncio.to_thread(write_atomic, self.path, data)
+            self.saves += 1
+        except OSError as e:
+            self._dirty = True
+            logger.error(f"Écriture de l'état persistant impossible ({self.path}): {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            "path": self.path,
+            "services": sorted(self.messages),
+            "saved_at": self.saved_at,
+            "saves": self.saves,
+            "dirty": self._dirty
+        }
+
+    async def close(self):
+        """Arrête le suivi et écrit immédiatement les derniers changements"""
+        self.store.remove_listener(self._on_state)
+        if self._save_task:
+            self._save_task.cancel()
+            try:
+                await self._save_task
+            except asyncio.CancelledError:
+                pass
+        await self.save()
@@ -0,0 +1,84 @@
+# websocket/protocol.py
+"""
+Déclaration des messages acceptés sur /ws/{service}.
+
+Chaque type est relié au manager qui le traite ; les champs sont vérifiés à
+l'entrée par le registre (websocket/registry.py) avant toute mise en file.
+Les lectures d'état sont déclarées mutating=False : elles ne réveillent pas les
+services mis en veille (le kiosque en envoie toutes les 2 à 5 s).
+"""
+from services.audio.manager import AudioSource
+from websocket.registry import Field, MessageRegistry
+
+VOLUME = Field(float, minimum=0, maximum=100, description="Volume affiché (0-100)")
+MUTED = Field(bool)
+CLIENT_ID = Field(str, description="Identifiant du client snapcast")
+GROUP_ID = Field(str, description="Identifiant du groupe snapcast")
+
+
+def build_registry(services) -> MessageRegistry:
+    """Construit la table de routage à partir des managers initialisés"""
+    registry = MessageRegistry()
+    audio = services.audio_manager.handle_message
+    volume = services.volume_manager.handle_message
+    bluetooth = services.bluetooth_manager.handle_message
+    snapcast = services.snapcast_manager.handle_message
+    player = services.spotify_player.handle_message
+
+    registry.register("audio", "get_status", audio, description="Diffuse l'état de la source audio", mutating=False)
+    registry.register("audio", "switch_source", audio, {
+        "data": Field(dict, fields={
+            "source": Field(str, choices=tuple(source.value for source in AudioSource))
+        })
+    }, "Change de source audio")
+
+    registry.register("volume", "get_volume", volume, description="Diffuse le volume courant", mutating=False)
+    registry.register("volume", "set_volume", volume, {"volume": VOLUME}, "Volume absolu")
+    registry.register("volume", "adjust_volume", volume, {
+        "delta": Field(int, minimum=-100, maximum=100, description="Crans relatifs")
+    }, "Volume relatif (rotation de l'encodeur)")
+    registry.register("volume", "set_mute", volume, {"muted": MUTED}, "Coupe ou rétablit le son")
+
+    registry.register("bluetooth", "get_status", bluetooth, description="Diffuse l'état des appareils", mutating=False)
+    registry.register("bluetooth", "disconnect_device", bluetooth, {
+        "data": Field(dict, fields={"address": Field(str, description="Adresse MAC")})
+    }, "Déconnecte un appareil")
+
+    registry.register("snapcast", "get_status", snapcast, description="Diffuse l'état des clients", mutating=False)
+    registry.register("snapcast", "set_client_volume", snapcast,
+                      {"client_id": CLIENT_ID, "volume": VOLUME}, "Volume d'un client")
+    registry.register("snapcast", "set_clients_volume", snapcast, {
+        "volumes": Field(dict, description="client_id -> volume")
+    }, "Volumes de plusieurs clients en un seul lot")
+    registry.register("snapcast", "set_client_mute", snapcast,
+                      {"client_id": CLIENT_ID, "muted": MUTED}, "Sourdine d'un client")
+    registry.register("snapcast", "set_group_volume", snapcast,
+                      {"group_id": GROUP_ID, "volume": VOLUME}, "Volume d'un groupe")
+    registry.register("snapcast", "set_group_mute", snapcast,
+                      {"group_id": GROUP_ID, "muted": MUTED}, "Sourdine d'un groupe")
+    registry.register("snapcast", "set_all_volume", snapcast, {"volume": VOLUME}, "Volume de tous les clients")
+    registry.register("snapcast", "set_client_latency", snapcast, {
+        "client_id": CLIENT_ID,
+        "latency": Field(int, minimum=0, maximum=10000, description="Latence en ms")
+    }, "Latence d'un client")
+
+    # get_status était routé vers le lecteur, qui l'ignore : comportement conservé
+    # (le manager Spotify basculerait la source audio à chaque demande d'état)
+    registry.register("spotify", "get_status", player, description="Sans effet (compatibilité)", mutating=False)
+    registry.register("spotify", "get_playback_status", player, description="Diffuse l'état de lecture", mutating=False)
+    for command in ("play_pause", "play", "pause", "next_track", "previous_track"):
+        registry.register("spotify", command, player, description="Commande du lecteur")
+    registry.register("spotify", "seek", player, {
+        "position": Field(int, required=False, minimum=0, description="Position en ms")
+    }, "Déplace la lecture")
+
+    if services.display_manager:
+        display = services.display_manager.handle_message
+        registry.register("display", "get_status", display, description="Diffuse l'état de l'écran", mutating=False)
+        registry.register("display", "wake", display, description="Rallume l'écran et repousse la veille")
+        registry.register("display", "sleep", display, description="Éteint l'écran")
+        registry.register("display", "set_timeout", display, {
+            "timeout": Field(float, minimum=10, maximum=86400, description="Délai de mise en veille (s)")
+        }, "Délai de mise en veille")
+
+    return registry
@@ -0,0 +1,178 @@
+# websocket/registry.py
+"""
+Table de routage des messages WebSocket : (service, type) -> handler + schéma compilé.
+
+Chaque trame est validée une fois à l'entrée (validate), puis exécutée sans
+nouvelle vérification (invoke). describe() produit la description du protocole.
+"""
+import logging
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from monitoring import metrics
+
+logger = logging.getLogger(__name__)
+
+WS_MESSAGE_CALLS = metrics.counter(
+    "sonoak_websocket_message_calls_total", "Messages traités par service, type et résultat",
+    ["service", "type", "result"]
+)
+WS_MESSAGE_SECONDS = metrics.histogram(
+    "sonoak_websocket_message_seconds", "Durée de traitement par type de message", ["service", "type"]
+)
+
+_TYPE_NAMES = {int: "integer", float: "number", str: "string", bool: "boolean", dict: "object", list: "array"}
+
+
+class MessageValidationError(ValueError):
+    pass
+
+
+class Field:
+    """Champ attendu d'un message ; fields décrit un objet imbriqué"""
+
+    def __init__(self, kind: type, required: bool = True, choices: Optional[tuple] = None,
+                 minimum: Optional[float] = None, maximum: Optional[float] = None,
+                 fields: Optional[Dict[str, "Field"]] = None, description: str = ""):
+        self.kind = kind
+        self.required = required
+        self.choices = choices
+        self.minimum = minimum
+        self.maximum = maximum
+        self.fields = fields
+        self.description = description
+
+    def describe(self) -> Dict[str, Any]:
+        spec = {"type": _TYPE_NAMES.get(self.kind, self.kind.__name__), "required": self.required}
+        if self.choices is not None:
+            spec["enum"] = list(self.choices)
+        if self.minimum is not None:
+            spec["minimum"] = self.minimum
+        if self.maximum is not None:
+            spec["maximum"] = self.maximum
+        if self.fields:
+            spec["properties"] = {name: field.describe() for name, field in self.fields.items()}
+        if self.description:
+            spec["description"] = self.description
+        return spec
+
+
+def compile_schema(fields: Dict[str, Field], path: str = "") -> Callable[[dict], None]:
+    """Transforme un schéma en fonction de validation (vérifications pré-calculées)"""
+    checks = []
+    for name, field in fields.items():
+        # bool est un int en Python : on l'exclut explicitement des champs numériques
+        accepted = (int, float) if field.kind is float else (field.kind,)
+        nested = compile_schema(field.fields, f"{path}{name}.") if field.fields else None
+        checks.append((name, f"{path}{name}", field, accepted, field.kind is not bool, nested))
+
+    def validate(message: dict):
+        for name, label, field, accepted, reject_bool, nested in checks:
+            value = message.get(name)
+            if value is None:
+                if field.required:
+                    raise MessageValidationError(f"Missing field '{label}'")
+                continue
+            if not isinstance(value, accepted) or (reject_bool and isinstance(value, bool)):
+                raise MessageValidationError(f"Field '{label}' must be {_TYPE_NAMES.get(field.kind, field.kind.__name__)}")
+            if field.choices is not None and value not in field.choices:
+                raise MessageValidationError(f"Field '{label}' must be one of {list(field.choices)}")
+            if field.minimum is not None and value < field.minimum:
+                raise MessageValidationError(f"Field '{label}' must be >= {field.minimum}")
+            if field.maximum is not None and value > field.maximum:
+                raise MessageValidationError(f"Field '{label}' must be <= {field.maximum}")
+            if nested:
+                nested(value)
+
+    return validate
+
+
+class Route(NamedTuple):
+    service: str
+    type: str
+    handler: Callable[[dict], Awaitable]
+    validate: Callable[[dict], None]
+    schema: Dict[str, Field]
+    description: str
+    calls_ok: Any
+    calls_error: Any
+    seconds: Any
+    # False pour une simple lecture d'état
+    mutating: bool = True
+
+
+class MessageRegistry:
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], Route] = {}
+        # Appelé avant toute commande (WebSocket, MQTT, REST) : relance des services en veille
+        self.before_command: Optional[Callable[[str], Awaitable]] = None
+
+    def register(self, service: str, message_type: str, handler: Callable[[dict], Awaitable],
+                 schema: Optional[Dict[str, Field]] = None, description: str = "", mutating: bool = True):
+        schema = schema or {}
+        self.routes[(service, message_type)] = Route(
+            service, message_type, handler, compile_schema(schema), schema, description,
+            WS_MESSAGE_CALLS.labels(service, message_type, "ok"),
+            WS_MESSAGE_CALLS.labels(service, message_type, "error"),
+            WS_MESSAGE_SECONDS.labels(service, message_type),
+            mutating
+        )
+
+    def validate(self, service: str, message: dict) -> Route:
+        """Vérifie la trame à l'entrée ; lève MessageValidationError"""
+        route = self.routes.get((service, message.get("type")))
+        if route is None:
+            raise MessageValidationError(f"Unknown message type '{message.get('type')}' for service '{service}'")
+        route.validate(message)
+        return route
+
+    async def wake(self, service: str):
+        if self.before_command is not None:
+            await self.before_command(service)
+
+    async def invoke(self, service: str, message: dict):
+        """Exécute un message déjà validé"""
+        route = self.routes[(service, message.get("type"))]
+        if route.mutating:
+            await self.wake(service)
+        start = perf_counter()
+        try:
+            await route.handler(message)
+        except BaseException:
+            route.calls_error.inc()
+            raise
+        finally:
+            route.seconds.observe(perf_counter() - start)
+        route.calls_ok.inc()
+
+    async def dispatch(self, service: str, message: dict):
+        self.validate(service, message)
+        await self.invoke(service, message)
+
+    def describe(self, policy_for: Optional[Callable] = None) -> Dict[str, Any]:
+        """Description du protocole (messages, champs, politique de traitement)"""
+        services: Dict[str, Dict[str, Any]] = {}
+        for (service, message_type), route in sorted(self.routes.items()):
+            entry = {
+                "description": route.description,
+                "mutating": route.mutating,
+                "fields": {name: field.describe() for name, field in route.schema.items()}
+            }
+            if policy_for:
+                policy = policy_for(service, message_type)
+                entry["policy"] = {"lane": policy.lane, "mode": policy.mode, "deadline": policy.deadline}
+            services.setdefault(service, {})[message_type] = entry
+        return {"services": services}
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        stats = []
+        for (service, message_type), route in sorted(self.routes.items()):
+            count, total = route.seconds.count, route.seconds.sum
+            stats.append({
+                "service": service,
+                "type": message_type,
+                "ok": route.calls_ok.value,
+                "errors": route.calls_error.value,
+                "mean_ms": round(1000 * total / count, 3) if count else None
+            })
+        return stats
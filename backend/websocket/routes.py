@@ -0,0 +1,31 @@
+# websocket/routes.py
+from fastapi import APIRouter, HTTPException, Request
+from typing import Optional
+
+from websocket.http_cache import state_response
+
+router = APIRouter()
+
+# Référence au manager WebSocket (sera initialisé dans main.py)
+websocket_manager = None
+
+def init_routes(manager):
+    global websocket_manager
+    websocket_manager = manager
+
+@router.get("/{service}")
+async def get_service_state(request: Request, service: str, since: Optional[str] = None, timeout: float = 25.0):
+    """Derniers messages diffusés par un service ; ?since=<X-State-Version> pour attendre un changement"""
+    if not websocket_manager:
+        raise HTTPException(status_code=500, detail="WebSocket manager not initialized")
+
+    store = websocket_manager.state
+
+    def build():
+        return {
+            "service": service,
+            "version": store.version(service),
+            "messages": {message.get("type", ""): message for _, message in store.snapshot(service)}
+        }
+
+    return await state_response(request, store, service, build, since, timeout)
@@ -0,0 +1,65 @@
+# websocket/state.py
+import asyncio
+import logging
+import uuid
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceStateStore:
+    """
+    Dernier message diffusé par (service, type), versionné par service.
+
+    Alimenté par WebSocketManager.broadcast_to_service : un consommateur qui
+    arrive en cours de route obtient l'état courant sans attendre le prochain
+    broadcast. Les listeners sont appelés de façon synchrone à chaque mise à jour.
+    `epoch` change à chaque démarrage : une version n'a de sens qu'avec lui.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.versions: Dict[str, int] = {}
+        self.messages: Dict[str, Dict[str, Tuple[int, dict]]] = {}
+        self._listeners: List[Callable[[str, int, dict], None]] = []
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    def add_listener(self, callback: Callable[[str, int, dict], None]):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str, int, dict], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def update(self, service: str, message: dict) -> int:
+        version = self.versions.get(service, 0) + 1
+        self.versions[service] = version
+        self.messages.setdefault(service, {})[message.get("type", "")] = (version, message)
+        # Réveille les long-polls en attente sur ce service
+        changed = self._changed.pop(service, None)
+        if changed:
+            changed.set()
+        for callback in list(self._listeners):
+            try:
+                callback(service, version, message)
+            except Exception as e:
+                logger.error(f"State listener failed for {service}: {e}")
+        return version
+
+    def version(self, service: str) -> int:
+        return self.versions.get(service, 0)
+
+    def snapshot(self, service: str) -> List[Tuple[int, dict]]:
+        """Derniers messages du service, du plus ancien au plus récent"""
+        return sorted(self.messages.get(service, {}).values(), key=lambda item: item[0])
+
+    async def wait_for_change(self, service: str, since: int, timeout: float) -> bool:
+        """Attend une version > since ; True si l'état a changé (since : version de ce démarrage)"""
+        if self.version(service) != since:
+            return True
+        changed = self._changed.setdefault(service, asyncio.Event())
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True